@@ -0,0 +1,6 @@
+"""
+Benchmarks del pipeline de analítica con datos sintéticos.
+
+Uso:
+    python -m benchmarks.run --scale 1k --output benchmark_results.json --compare benchmarks/baseline.json
+"""
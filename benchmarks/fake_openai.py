@@ -0,0 +1,55 @@
+# benchmarks/fake_openai.py
+import json
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Union
+
+from political_discourse_analyzer.utils.openai_stub import fake_embedding, fake_topic_percentages
+
+class _Embeddings:
+    def __init__(self, client: 'FakeOpenAI'):
+        self._client = client
+
+    def create(self, model: str, input: Union[str, List[str]], **kwargs):
+        self._client._call('embeddings')
+        inputs = [input] if isinstance(input, str) else list(input)
+        return SimpleNamespace(
+            model=model,
+            data=[SimpleNamespace(index=i, embedding=fake_embedding(text)) for i, text in enumerate(inputs)],
+            usage=SimpleNamespace(prompt_tokens=sum(len(text.split()) for text in inputs),
+                                  total_tokens=sum(len(text.split()) for text in inputs))
+        )
+
+class _Completions:
+    def __init__(self, client: 'FakeOpenAI'):
+        self._client = client
+
+    def create(self, model: str, messages: List[Dict], **kwargs):
+        self._client._call('chat.completions')
+        prompt = messages[-1]['content']
+        content = json.dumps(fake_topic_percentages(prompt), ensure_ascii=False)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                     message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt.split()), completion_tokens=len(content.split()),
+                                  total_tokens=len(prompt.split()) + len(content.split()))
+        )
+
+class FakeOpenAI:
+    """
+    Cliente de OpenAI determinista para benchmarks: implementa sólo
+    `embeddings.create` y `chat.completions.create`, con una latencia fija
+    opcional por llamada, y cuenta las llamadas realizadas.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self.embeddings = _Embeddings(self)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _call(self, endpoint: str):
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
@@ -0,0 +1,339 @@
+# benchmarks/run.py
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import SCALES
+
+# Iteraciones por defecto de cada caso (las más costosas se repiten menos)
+DEFAULT_ITERATIONS = {
+    'topic_distribution': 20,
+    'analyze_topic_with_spacy': 200,
+    'openai_scoring': 200,
+    'topic_relationships': 5,
+    'citizen_metrics': 200,
+    'report_rendering': 3,
+    'score_pending': 1
+}
+
+# Métricas comparadas con la línea base y si un valor mayor es mejor. El p99
+# se informa pero no se compara: con pocas iteraciones es demasiado ruidoso
+COMPARED_METRICS = {'p50_ms': False, 'throughput': True, 'peak_rss_mb': False}
+
+# Iteraciones iniciales descartadas (cachés de SQLAlchemy, importaciones perezosas)
+WARMUP_ITERATIONS = 1
+
+class CaseSkipped(Exception):
+    """El caso no puede ejecutarse en este entorno (p. ej. falta el modelo de spaCy)."""
+
+# Cada caso devuelve una lista de (segundos, elementos procesados) por iteración
+Samples = List[Tuple[float, int]]
+
+def _timed(samples: Samples, func: Callable, items: int = 1):
+    start = time.perf_counter()
+    result = func()
+    samples.append((time.perf_counter() - start, items))
+    return result
+
+def _require_spacy_model():
+    import spacy
+    if not spacy.util.is_package('es_core_news_md'):
+        # La propiedad nlp intentaría descargarlo
+        raise CaseSkipped("modelo de spaCy es_core_news_md no instalado")
+
+def _sample_queries(analyzer, size: int) -> List[str]:
+    queries = []
+    for query in analyzer.get_basic_statistics()['queries']:
+        queries.append(query)
+        if len(queries) >= size:
+            break
+    return queries
+
+def _analyzer(context: Dict):
+    from benchmarks.fake_openai import FakeOpenAI
+    from political_discourse_analyzer.utils.analysis_script import CitizenInterestAnalyzer
+
+    analyzer = CitizenInterestAnalyzer(figure_dpi=context['figure_dpi'])
+    analyzer.analytics_service.client = FakeOpenAI(latency=context['openai_latency'])
+    return analyzer
+
+def case_topic_distribution(context: Dict, iterations: int) -> Samples:
+    """Distribución de temas con bordes de día parciales (agregados diarios + puntuaciones crudas)."""
+    analyzer = _analyzer(context)
+    start = context['start'] + timedelta(hours=12)
+    end = context['end'] - timedelta(hours=12)
+    samples = []
+    for _ in range(iterations):
+        result = _timed(samples, lambda: asyncio.run(
+            analyzer.analytics_service.get_topic_distribution(start, end, score_pending=False)
+        ))
+        samples[-1] = (samples[-1][0], result.get('total_interactions', 0))
+    return samples
+
+def case_analyze_topic_with_spacy(context: Dict, iterations: int) -> Samples:
+    _require_spacy_model()
+    analyzer = _analyzer(context)
+    queries = _sample_queries(analyzer, iterations)
+    # Carga del modelo fuera de la medida
+    analyzer.analytics_service.nlp
+    samples = []
+    for query in queries:
+        _timed(samples, lambda: analyzer.analytics_service.analyze_topic_with_spacy(query))
+    return samples
+
+def case_openai_scoring(context: Dict, iterations: int) -> Samples:
+    """Embeddings y clasificación LLM de una consulta contra el cliente falso."""
+    analyzer = _analyzer(context)
+    service = analyzer.analytics_service
+
+    async def score(query: str):
+        return await asyncio.gather(
+            service.analyze_topic_with_embeddings(query),
+            service.analyze_topic_with_llm(query)
+        )
+
+    samples = []
+    for query in _sample_queries(analyzer, iterations):
+        _timed(samples, lambda: asyncio.run(score(query)))
+    return samples
+
+def case_topic_relationships(context: Dict, iterations: int) -> Samples:
+    analyzer = _analyzer(context)
+    samples = []
+    for _ in range(iterations):
+        result = _timed(samples, analyzer.analyze_topic_relationships)
+        samples[-1] = (samples[-1][0], result['n_interactions'])
+    return samples
+
+def case_citizen_metrics(context: Dict, iterations: int) -> Samples:
+    analyzer = _analyzer(context)
+    topic_analysis = asyncio.run(analyzer.analytics_service.get_topic_distribution(score_pending=False))
+    samples = []
+    for _ in range(iterations):
+        _timed(samples, lambda: analyzer.calculate_citizen_interest_metrics(topic_analysis))
+    return samples
+
+def case_report_rendering(context: Dict, iterations: int) -> Samples:
+    """Figuras (sin caché), markdown, HTML, LaTeX y ZIP a partir de resultados ya calculados."""
+    from political_discourse_analyzer.utils.report_generator import ReportGenerator
+
+    analyzer = _analyzer(context)
+    basic_stats = analyzer.get_basic_statistics()
+    basic_stats.pop('queries')
+    topic_analysis = asyncio.run(analyzer.analytics_service.get_topic_distribution(score_pending=False))
+    topic_relationships = analyzer.analyze_topic_relationships()
+    citizen_metrics = analyzer.calculate_citizen_interest_metrics(topic_analysis)
+
+    def render(output_dir: str):
+        figures = analyzer.generate_analysis_visualizations(topic_analysis, topic_relationships, output_dir)
+        report = analyzer.generate_research_report(
+            basic_stats, topic_analysis, topic_relationships, citizen_metrics, output_dir
+        )
+        images = [{'path': path, 'description': name} for name, path in figures.items()]
+        generator = ReportGenerator(output_dir)
+        generator.generate_html_report(report, images)
+        generator.generate_latex_report(report, images)
+        generator.create_report_package()
+
+    samples = []
+    for _ in range(iterations):
+        with tempfile.TemporaryDirectory() as output_dir:
+            _timed(samples, lambda: render(output_dir))
+    return samples
+
+def case_score_pending(context: Dict, iterations: int) -> Samples:
+    """Puntuación completa de las interacciones pendientes; modifica la base de datos, por eso va al final."""
+    _require_spacy_model()
+    analyzer = _analyzer(context)
+    analyzer.analytics_service.nlp
+    samples = []
+    for _ in range(iterations):
+        scored = _timed(samples, lambda: asyncio.run(
+            analyzer.analytics_service.score_pending_interactions()
+        ))
+        samples[-1] = (samples[-1][0], scored)
+    return samples
+
+CASES: Dict[str, Callable[[Dict, int], Samples]] = {
+    'topic_distribution': case_topic_distribution,
+    'analyze_topic_with_spacy': case_analyze_topic_with_spacy,
+    'openai_scoring': case_openai_scoring,
+    'topic_relationships': case_topic_relationships,
+    'citizen_metrics': case_citizen_metrics,
+    'report_rendering': case_report_rendering,
+    'score_pending': case_score_pending
+}
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _run_case(name: str, context: Dict, iterations: int) -> Dict:
+    """Se ejecuta en un proceso nuevo para que el pico de memoria sea el del caso."""
+    import logging
+    import warnings
+    logging.disable(logging.INFO)
+    # Los avisos numéricos del propio análisis se repetirían en cada iteración
+    warnings.simplefilter('ignore', RuntimeWarning)
+    os.environ.update(context['environment'])
+    try:
+        samples = CASES[name](context, iterations + WARMUP_ITERATIONS)[WARMUP_ITERATIONS:]
+    except CaseSkipped as e:
+        return {'status': 'skipped', 'reason': str(e)}
+    return {'status': 'ok', 'samples': samples, 'peak_rss_mb': _peak_rss_mb()}
+
+def summarize(samples: Samples, peak_rss_mb: float) -> Dict:
+    latencies = np.array([seconds for seconds, _ in samples]) * 1000
+    total_seconds = sum(seconds for seconds, _ in samples)
+    total_items = sum(items for _, items in samples)
+    return {
+        'iterations': len(samples),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'throughput': round(total_items / total_seconds, 3) if total_seconds else None,
+        'peak_rss_mb': round(peak_rss_mb, 1)
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Devuelve las regresiones de más de `tolerance` (relativa) respecto a la línea base."""
+    regressions = []
+    for name, case in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if case.get('status') != 'ok' or not reference or reference.get('status') != 'ok':
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, previous = case.get(metric), reference.get(metric)
+            if not current or not previous:
+                continue
+            change = (previous - current) / previous if higher_is_better else (current - previous) / previous
+            if change > tolerance:
+                regressions.append(f"{name}.{metric}: {previous} -> {current} ({change:+.0%})")
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _environment(database_url: str) -> Dict[str, str]:
+    return {
+        'ENVIRONMENT': 'production',
+        'DATABASE_URL': database_url,
+        # El cliente real nunca se usa: se sustituye por FakeOpenAI
+        'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY') or 'sk-benchmark'
+    }
+
+def prepare_database(database_url: str, scale: str, seed: int, scored_fraction: float) -> Dict:
+    """Crea las tablas y carga los datos sintéticos en una base de datos vacía."""
+    os.environ.update(_environment(database_url))
+    from political_discourse_analyzer.services.database_service import DatabaseService
+    from benchmarks.synthetic import populate_database
+
+    # El constructor crea las tablas
+    db_service = DatabaseService()
+    start = time.perf_counter()
+    info = populate_database(db_service, SCALES[scale], seed=seed, scored_fraction=scored_fraction)
+    info['populate_seconds'] = round(time.perf_counter() - start, 2)
+    db_service.engine.dispose()
+    return info
+
+def run_benchmarks(args) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        # Deja sin puntuar como mucho 200 interacciones para el caso score_pending
+        n = SCALES[args.scale]
+        dataset = prepare_database(database_url, args.scale, args.seed, 1 - min(200, n // 10) / n)
+        print(f"Datos sintéticos: {dataset['interactions']} interacciones en {dataset['populate_seconds']}s")
+
+        context = {
+            'environment': _environment(database_url),
+            'start': dataset['start'],
+            'end': dataset['end'],
+            'figure_dpi': args.figure_dpi,
+            'openai_latency': args.openai_latency
+        }
+        names = args.cases.split(',') if args.cases else list(CASES)
+        cases = {}
+        for name in names:
+            iterations = args.iterations or DEFAULT_ITERATIONS[name]
+            # spawn: cada caso empieza con un intérprete limpio y su propio pico de RSS
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                outcome = pool.submit(_run_case, name, context, iterations).result()
+            if outcome['status'] == 'skipped':
+                cases[name] = {'status': 'skipped', 'reason': outcome['reason']}
+                print(f"{name:<26} omitido: {outcome['reason']}")
+                continue
+            cases[name] = {'status': 'ok', **summarize(outcome['samples'], outcome['peak_rss_mb'])}
+            case = cases[name]
+            print(f"{name:<26} p50 {case['p50_ms']:>10.2f} ms  p99 {case['p99_ms']:>10.2f} ms  "
+                  f"{case['throughput']:>12.1f}/s  RSS {case['peak_rss_mb']:>7.1f} MB")
+
+    return {
+        'metadata': {
+            'scale': args.scale,
+            'seed': args.seed,
+            'interactions': dataset['interactions'],
+            'scored': dataset['scored'],
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'database': database_url.split(':', 1)[0] if args.database_url else 'sqlite'
+        },
+        'cases': cases
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del pipeline de analítica con datos sintéticos')
+    parser.add_argument('--scale', choices=list(SCALES), default='1k')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url',
+                        help='Base de datos vacía a usar (por defecto, SQLite en un directorio temporal)')
+    parser.add_argument('--cases', help=f"Casos separados por comas: {','.join(CASES)}")
+    parser.add_argument('--iterations', type=int, help='Iteraciones por caso (sustituye a las de por defecto)')
+    parser.add_argument('--figure-dpi', type=int, default=100)
+    parser.add_argument('--openai-latency', type=float, default=0.0,
+                        help='Latencia simulada por llamada a OpenAI, en segundos')
+    parser.add_argument('--output', help='Guardar los resultados en JSON')
+    parser.add_argument('--compare', help='Comparar con una línea base y salir con código 1 si hay regresiones')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Empeoramiento relativo tolerado antes de marcar una regresión')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regresiones respecto a la línea base:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("Sin regresiones respecto a la línea base")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/search_round_trips.py
+"""
+Peticiones a OpenAI y latencia de `AssistantService.process_query` contra el
+servidor local de utils/openai_stub.py, comparadas con el flujo anterior
+(recuperar o crear el thread, crear el mensaje, run en streaming y listar los
+mensajes para leer la respuesta).
+
+    python -m benchmarks.search_round_trips --latency 0.05 --conversations 20
+"""
+import io
+import os
+import json
+import time
+import asyncio
+import argparse
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+import openai
+
+from political_discourse_analyzer.models.settings import AISettings, ApplicationSettings
+from political_discourse_analyzer.services.assistant_service import AssistantService
+from political_discourse_analyzer.utils.openai_stub import FaultProfile, run_stub_server
+from benchmarks.synthetic import generate_queries
+
+def legacy_process_query(client: openai.Client, assistant_id: str, query: str,
+                         thread_id: Optional[str] = None) -> Dict:
+    """Flujo anterior de process_query, con una petición por paso."""
+    thread = client.beta.threads.retrieve(thread_id) if thread_id else client.beta.threads.create()
+    client.beta.threads.messages.create(thread_id=thread.id, role="user", content=query)
+    with client.beta.threads.runs.stream(thread_id=thread.id, assistant_id=assistant_id) as stream:
+        stream.until_done()
+    messages = client.beta.threads.messages.list(thread_id=thread.id)
+    return {'response': messages.data[0].content[0].text.value, 'thread_id': thread.id}
+
+def _conversations(count: int, follow_ups: int, seed: int) -> List[List[str]]:
+    """Primeras preguntas sintéticas, cada una con `follow_ups` seguimientos."""
+    firsts = {}
+    for thread_id, query, _ in generate_queries(count * 4, seed):
+        firsts.setdefault(thread_id, query)
+    firsts = list(firsts.values())[:count]
+    return [[first] + [f"¿Y qué más propone sobre esto? ({turn})" for turn in range(1, follow_ups + 1)]
+            for first in firsts]
+
+def _summary(samples: List[Dict]) -> Dict:
+    latencies = [sample['seconds'] * 1000 for sample in samples]
+    return {
+        'queries': len(samples),
+        'requests_per_query': round(float(np.mean([sample['requests'] for sample in samples])), 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 1)
+    }
+
+async def run_benchmark(args) -> Dict:
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    faults = FaultProfile(latency=args.latency, stream_delay=args.stream_delay)
+    with run_stub_server(faults, seed=args.seed) as base_url:
+        requests = {'count': 0}
+
+        def count_request(request: httpx.Request):
+            requests['count'] += 1
+
+        service = AssistantService(ApplicationSettings(ai_settings=AISettings(base_url=base_url)))
+        service.client = openai.Client(
+            api_key="sk-bench", base_url=base_url,
+            http_client=httpx.Client(event_hooks={"request": [count_request]})
+        )
+        with redirect_stdout(io.StringIO()):
+            service.vector_store = service._create_or_get_vector_store()
+            service.init_assistants()
+        assistant_id = service.assistants["neutral"]
+
+        async def current(query, thread_id):
+            return await service.process_query(query, "neutral", thread_id)
+
+        async def legacy(query, thread_id):
+            return legacy_process_query(service.client, assistant_id, query, thread_id)
+
+        results = {}
+        for name, flow in (("legacy", legacy), ("current", current)):
+            samples = {'first': [], 'follow_up': []}
+            for conversation in _conversations(args.conversations, args.follow_ups, args.seed):
+                thread_id = None
+                for query in conversation:
+                    before = requests['count']
+                    start = time.perf_counter()
+                    with redirect_stdout(io.StringIO()):
+                        response = await flow(query, thread_id)
+                    samples['follow_up' if thread_id else 'first'].append({
+                        'seconds': time.perf_counter() - start,
+                        'requests': requests['count'] - before
+                    })
+                    thread_id = response['thread_id']
+            results[name] = {turn: _summary(turn_samples) for turn, turn_samples in samples.items()}
+
+    return {
+        'latency_s': args.latency,
+        'stream_delay_s': args.stream_delay,
+        'results': results
+    }
+
+def format_report(report: Dict) -> str:
+    lines = [f"Latencia simulada por petición: {report['latency_s'] * 1000:.0f} ms", "",
+             f"{'flujo':<10}{'turno':<12}{'peticiones':>12}{'p50 ms':>10}{'p90 ms':>10}"]
+    for name, turns in report['results'].items():
+        for turn, summary in turns.items():
+            lines.append(f"{name:<10}{turn:<12}{summary['requests_per_query']:>12}"
+                         f"{summary['p50_ms']:>10}{summary['p90_ms']:>10}")
+    legacy, current = report['results']['legacy'], report['results']['current']
+    lines.append("")
+    for turn in ('first', 'follow_up'):
+        saved = 1 - current[turn]['p50_ms'] / legacy[turn]['p50_ms']
+        lines.append(f"{turn}: {legacy[turn]['requests_per_query']:g} -> "
+                     f"{current[turn]['requests_per_query']:g} peticiones, p50 {saved:.0%} menor")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Peticiones a OpenAI por consulta de /search")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia simulada por petición (s)")
+    parser.add_argument("--stream-delay", type=float, default=0.002, help="Pausa entre eventos del stream (s)")
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--follow-ups", type=int, default=2, help="Seguimientos por conversación")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Guardar el resultado en JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
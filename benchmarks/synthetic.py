@@ -0,0 +1,179 @@
+# benchmarks/synthetic.py
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, select, text
+
+from political_discourse_analyzer.services.database_service import (
+    DatabaseService, Interaction, Conversation, InteractionTopicScore, TopicDailyRollup
+)
+from political_discourse_analyzer.services.analytics_service import SCORING_VERSION
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+PARTIES = ['el PSOE', 'el PP', 'Vox', 'Sumar', 'ERC', 'Bildu', 'Junts', 'el PNV']
+
+TOPIC_TERMS = {
+    'economía': ['los impuestos', 'el empleo', 'las pensiones', 'el salario mínimo', 'la inflación',
+                 'los autónomos', 'el paro juvenil'],
+    'sanidad': ['la sanidad pública', 'las listas de espera', 'la atención primaria',
+                'los centros de salud', 'la salud mental', 'las urgencias'],
+    'educación': ['la educación pública', 'las becas', 'la universidad', 'el profesorado',
+                  'la formación profesional', 'la investigación'],
+    'vivienda': ['el acceso a la vivienda', 'el precio del alquiler', 'las hipotecas',
+                 'la vivienda pública', 'los desahucios'],
+    'medio_ambiente': ['el cambio climático', 'las energías renovables', 'la transición ecológica',
+                       'la contaminación', 'las emisiones'],
+    'derechos_sociales': ['la igualdad', 'la violencia de género', 'la brecha salarial',
+                          'la conciliación', 'la inclusión'],
+    'seguridad': ['la seguridad ciudadana', 'la policía', 'la delincuencia', 'la ciberseguridad',
+                  'la justicia']
+}
+CATEGORIES = list(TOPIC_TERMS)
+
+TEMPLATES = [
+    '¿Qué propone {party} sobre {term}?',
+    '¿Cuál es la postura de {party} respecto a {term}?',
+    'Compara las propuestas de {party} y {other} sobre {term}',
+    '¿Cómo piensa {party} mejorar {term}?',
+    '¿Qué medidas plantea {party} para {term} y {second}?',
+    'Explícame el programa de {party} en {term}'
+]
+FOLLOW_UPS = [
+    '¿Y cómo lo financiarían?',
+    '¿Qué plazos dan para {term}?',
+    '¿En qué se diferencia de lo que propone {other}?'
+]
+MODES = ['neutral', 'personal']
+
+def generate_queries(n: int, seed: int = 0) -> Iterator[Tuple[str, str, str]]:
+    """
+    Genera `n` consultas sintéticas en español como (thread_id, consulta, tema
+    principal). Un tercio de las conversaciones incluye preguntas de seguimiento.
+    """
+    rng = np.random.default_rng(seed)
+    generated, thread = 0, 0
+    while generated < n:
+        thread += 1
+        thread_id = f"thread_bench_{seed}_{thread:08d}"
+        topic = CATEGORIES[rng.integers(len(CATEGORIES))]
+        second_topic = CATEGORIES[rng.integers(len(CATEGORIES))]
+        party, other = rng.choice(PARTIES, size=2, replace=False)
+        values = {
+            'party': party,
+            'other': other,
+            'term': rng.choice(TOPIC_TERMS[topic]),
+            'second': rng.choice(TOPIC_TERMS[second_topic])
+        }
+        turns = 1 + (rng.integers(1, 4) if rng.random() < 1 / 3 else 0)
+        for turn in range(min(turns, n - generated)):
+            template = TEMPLATES[rng.integers(len(TEMPLATES))] if turn == 0 else \
+                FOLLOW_UPS[rng.integers(len(FOLLOW_UPS))]
+            yield thread_id, template.format(**values), topic
+            generated += 1
+
+def synthetic_scores(topic: str, rng: np.random.Generator) -> Dict[str, Dict[str, float]]:
+    """Puntuaciones verosímiles por método: similitudes coseno, porcentajes del LLM y spaCy en [0, 1]."""
+    main = np.array([1.0 if category == topic else 0.0 for category in CATEGORIES])
+    llm = rng.dirichlet(1 + 8 * main) * 100
+    return {
+        'embedding_analysis': dict(zip(CATEGORIES, (0.15 + 0.25 * main + 0.05 * rng.random(len(CATEGORIES))).tolist())),
+        'llm_analysis': dict(zip(CATEGORIES, llm.round(2).tolist())),
+        'linguistic_analysis': dict(zip(CATEGORIES, (0.3 * main + 0.4 * rng.random(len(CATEGORIES))).tolist()))
+    }
+
+def populate_database(db_service: DatabaseService,
+                      n: int,
+                      seed: int = 0,
+                      scored_fraction: float = 1.0,
+                      days: int = 60,
+                      batch_size: int = 5000,
+                      end: Optional[datetime] = None) -> Dict:
+    """
+    Carga `n` interacciones sintéticas repartidas en `days` días, con sus
+    puntuaciones y agregados diarios, mediante inserciones por lotes. Las
+    interacciones a partir de `scored_fraction` quedan sin puntuar.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2024, 7, 1)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+    n_scored = int(n * scored_fraction)
+    threads = {}
+    # thread_id -> [interacciones, primera, última]
+    thread_activity = {}
+
+    with db_service.SessionLocal() as db:
+        next_id = (db.query(func.max(Interaction.id)).scalar() or 0) + 1
+        interactions, scores = [], []
+
+        def flush():
+            if interactions:
+                db.execute(insert(Interaction), interactions)
+            if scores:
+                db.execute(insert(InteractionTopicScore), scores)
+            interactions.clear()
+            scores.clear()
+
+        offsets = np.sort(rng.random(n)) * span
+        for index, (thread_id, query, topic) in enumerate(generate_queries(n, seed)):
+            mode = threads.setdefault(thread_id, MODES[rng.integers(len(MODES))])
+            interaction_id = next_id + index
+            timestamp = start + timedelta(seconds=float(offsets[index]))
+            activity = thread_activity.setdefault(thread_id, [0, timestamp, timestamp])
+            activity[0] += 1
+            activity[2] = timestamp
+            interactions.append({
+                'id': interaction_id,
+                'thread_id': thread_id,
+                'query': query,
+                'response': 'Respuesta sintética. ' * 20,
+                'mode': mode,
+                'citations': '',
+                'timestamp': timestamp
+            })
+            if index < n_scored:
+                for method, category_scores in synthetic_scores(topic, rng).items():
+                    for category, score in category_scores.items():
+                        scores.append({
+                            'interaction_id': interaction_id,
+                            'method': method,
+                            'category': category,
+                            'score': score,
+                            'scoring_version': SCORING_VERSION
+                        })
+            if len(interactions) >= batch_size:
+                flush()
+        flush()
+        if db.bind.dialect.name == 'postgresql':
+            # Los ids explícitos no avanzan la secuencia: la siguiente inserción de la API fallaría
+            db.execute(text("SELECT setval(pg_get_serial_sequence('interactions', 'id'), max(id)) FROM interactions"))
+
+        db.execute(insert(Conversation), [
+            {'thread_id': thread_id, 'mode': mode, 'created_at': thread_activity[thread_id][1],
+             'last_interaction': thread_activity[thread_id][2],
+             'total_interactions': thread_activity[thread_id][0]}
+            for thread_id, mode in threads.items()
+        ])
+
+        # Agregados diarios equivalentes a los que mantiene save_topic_scores
+        day = func.date(Interaction.timestamp)
+        db.execute(insert(TopicDailyRollup).from_select(
+            ['day', 'mode', 'method', 'category', 'scoring_version', 'score_sum', 'interaction_count'],
+            select(
+                day, func.coalesce(Interaction.mode, ''), InteractionTopicScore.method,
+                InteractionTopicScore.category, InteractionTopicScore.scoring_version,
+                func.sum(InteractionTopicScore.score), func.count(InteractionTopicScore.id)
+            ).join(
+                Interaction, Interaction.id == InteractionTopicScore.interaction_id
+            ).where(
+                Interaction.id >= next_id
+            ).group_by(
+                day, func.coalesce(Interaction.mode, ''), InteractionTopicScore.method,
+                InteractionTopicScore.category, InteractionTopicScore.scoring_version
+            )
+        ))
+        db.commit()
+
+    return {'interactions': n, 'scored': n_scored, 'threads': len(threads), 'start': start, 'end': end}
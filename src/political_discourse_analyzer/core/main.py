@@ -1,20 +1,36 @@
 # src/political_discourse_analyzer/core/main.py
 import os
+import json
+import math
+import asyncio
 import uvicorn 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Callable, List, Optional
 from dotenv import load_dotenv
 import logging
 import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 # Importaciones locales
-from political_discourse_analyzer.models.settings import ApplicationSettings
+from political_discourse_analyzer.models.settings import ApplicationSettings, TimingSettings
 from political_discourse_analyzer.services.assistant_service import AssistantService
-from political_discourse_analyzer.services.database_service import DatabaseService
+from political_discourse_analyzer.services.database_service import DatabaseService, OPENAI_USAGE_GROUPS
 from political_discourse_analyzer.services.analytics_service import AnalyticsService
+from political_discourse_analyzer.services.result_cache import ResultCache
+from political_discourse_analyzer.utils.admission import AdmissionMiddleware
+from political_discourse_analyzer.utils.export_interactions import EXPORT_FORMATS, MEDIA_TYPES, stream_export
+from political_discourse_analyzer.utils.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY, stage
+from political_discourse_analyzer.utils.openai_ledger import LEDGER, openai_feature
+from political_discourse_analyzer.utils.openai_client import close_openai_clients, openai_pool_stats
+from political_discourse_analyzer.utils.openai_resilience import OPENAI_GUARD, OpenAIUnavailable
+from political_discourse_analyzer.utils.profiler import ProfilerMiddleware
+from political_discourse_analyzer.utils.server_timing import RequestTimings, collect_timings
+from political_discourse_analyzer.utils.tracing import TRACER, configure_tracing
 
 # Configurar logging
 logging.basicConfig(
@@ -31,13 +47,80 @@ class SearchQuery(BaseModel):
     mode: str = "neutral"
     thread_id: Optional[str] = None
 
+class Citation(BaseModel):
+    text: str
+    quote: str
+    file_id: Optional[str] = None
+
 class SearchResponse(BaseModel):
     response: str
     thread_id: str
-    citations: Optional[List[str]] = None
+    citations: Optional[List[Citation]] = None
+
+class AnalyticsJobRequest(BaseModel):
+    kind: str = "report"
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    mode: Optional[str] = None
+
+ANALYTICS_JOB_KINDS = {"report", "topics", "score"}
+SEARCH_MODES = {"neutral", "personal"}
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Servicios: se crean al arrancar la aplicación (ver create_app)
+settings: Optional[ApplicationSettings] = None
+assistant_service: Optional[AssistantService] = None
+db_service: Optional[DatabaseService] = None
+analytics_service: Optional[AnalyticsService] = None
+result_cache: Optional[ResultCache] = None
+
+def initialize_services():
+    """Crea los servicios y prepara el vector store y los asistentes."""
+    global settings, assistant_service, db_service, analytics_service, result_cache
+    try:
+        settings = ApplicationSettings.from_env(openai_api_key=os.getenv("OPENAI_API_KEY"))
+        assistant_service = AssistantService(settings)
+        db_service = DatabaseService()
+        analytics_service = AnalyticsService(db_service, settings.ai_settings)
+        result_cache = ResultCache(
+            max_entries=settings.cache_settings.max_entries,
+            stale_seconds=settings.cache_settings.stale_seconds
+        )
+        configure_tracing(settings.tracing_settings, service_name="political-discourse-analyzer-api")
+        OPENAI_GUARD.configure(settings.resilience_settings)
+        if settings.ai_settings.usage_ledger:
+            LEDGER.configure(db_service.save_openai_usage, settings.ai_settings.usage_flush_seconds)
+        
+        # Initialize assistant service
+        assistant_service.init_service()
+        logger.info("Services initialized successfully")
+    except Exception as e:
+        logger.error(f"Error initializing services: {str(e)}")
+        raise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if app.state.init_services:
+        initialize_services()
+    yield
+    # Exportar los spans y el uso de OpenAI pendientes antes de salir
+    TRACER.shutdown()
+    LEDGER.shutdown()
+    close_openai_clients()
 
 # Initialize FastAPI app
-app = FastAPI(title="Political Discourse Analyzer API")
+app = FastAPI(title="Political Discourse Analyzer API", lifespan=lifespan)
+app.state.init_services = True
+
+# Los middlewares se deciden al importar: después de arrancar ya no se pueden añadir.
+# Los desactivados no se registran, así que no añaden coste a las peticiones.
+middleware_settings = ApplicationSettings.from_env(openai_api_key=None)
+
+# Control de admisión por prioridad (dentro de CORS, para que los 503 lleven sus cabeceras)
+if middleware_settings.admission_settings.enabled:
+    app.add_middleware(AdmissionMiddleware, settings=middleware_settings.admission_settings)
 
 # Configurar CORS
 app.add_middleware(
@@ -46,24 +129,109 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Cargar variables de entorno
-load_dotenv()
+profiler_settings = middleware_settings.profiler_settings
+if profiler_settings.enabled:
+    if not profiler_settings.token and not profiler_settings.sample_rate:
+        logger.warning("Profiler enabled without PROFILER_TOKEN or PROFILER_SAMPLE_RATE: nothing will be profiled")
+    app.add_middleware(ProfilerMiddleware, settings=profiler_settings)
+
+def _wants_debug_timings(request: Request) -> bool:
+    return (request.query_params.get("debug") == "timings"
+            or request.headers.get("x-debug-timings", "").lower() in ("1", "true"))
+
+async def _with_debug_timings(response: Response, timings: RequestTimings) -> Response:
+    """Añade `debug.timings` al cuerpo de una respuesta JSON de tipo objeto."""
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    try:
+        content = json.loads(body)
+    except ValueError:
+        content = None
+    if isinstance(content, dict):
+        content.setdefault("debug", {})["timings"] = timings.as_dict()
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+    headers = {key: value for key, value in response.headers.items() if key.lower() != "content-length"}
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Registra la duración de cada petición por plantilla de ruta (no por URL),
+    abre el span raíz de su traza, continuando la del `traceparent` entrante, y
+    devuelve el desglose de tiempos en `Server-Timing` (y en `debug.timings` si
+    se pide).
+    """
+    start = time.perf_counter()
+    status = 500
+    timing_settings = settings.timing_settings if settings else TimingSettings()
+    with TRACER.span(request.method, kind="server", traceparent=request.headers.get("traceparent")) as span, \
+            collect_timings() as timings:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if span.recording:
+                response.headers["traceparent"] = span.traceparent
+            if timing_settings.debug_timings and _wants_debug_timings(request):
+                response = await _with_debug_timings(response, timings)
+            if timing_settings.server_timing:
+                response.headers["Server-Timing"] = timings.header()
+                response.headers["Timing-Allow-Origin"] = "*"
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route,
+                status=str(status)
+            )
+            if span.recording:
+                span.name = f"{request.method} {route}"
+                span.set_attribute("http.method", request.method)
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status)
+
+def create_app(init_services: bool = True) -> FastAPI:
+    """
+    Devuelve la aplicación. Con `init_services=False` no se crean los servicios
+    al arrancar, para probar rutas que no los necesitan.
+    """
+    app.state.init_services = init_services
+    return app
 
-# Initialize services
-try:
-    settings = ApplicationSettings.from_env(openai_api_key=os.getenv("OPENAI_API_KEY"))
-    assistant_service = AssistantService(settings)
-    db_service = DatabaseService()
-    analytics_service = AnalyticsService(db_service)
-    
-    # Initialize assistant service
-    assistant_service.init_service()
-    logger.info("Services initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing services: {str(e)}")
-    raise
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Comprueba si la cabecera If-None-Match coincide con el ETag actual."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def _cached_response(request: Request, key: tuple, version: Callable[[], str], compute) -> Response:
+    """
+    Sirve un resultado de analítica desde la caché versionada con soporte de ETag.
+
+    La versión y el cálculo usan SQLAlchemy y pandas de forma síncrona, así que
+    se ejecutan en un hilo (el cálculo, con su propio bucle de eventos) para no
+    bloquear el bucle que atiende /search.
+    """
+    entry, cache_status = await result_cache.get_or_compute(
+        key, await asyncio.to_thread(version),
+        lambda: asyncio.to_thread(asyncio.run, compute()),
+        cacheable=lambda result: result.get("status") != "error"
+    )
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+        "X-Cache": cache_status
+    }
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=entry.value, headers=headers)
 
 @app.get("/")
 async def read_root():
@@ -80,44 +248,53 @@ async def read_root():
 
 @app.post("/search", response_model=SearchResponse)
 async def search_documents(query: SearchQuery):
+    if query.mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Modo no válido: {query.mode}")
     try:
         logger.info(f"Processing search request with thread_id: {query.thread_id}")
         
         # Procesar la consulta a través del asistente
-        response = await assistant_service.process_query(
-            query=query.query,
-            thread_id=query.thread_id,
-            mode=query.mode
-        )
-        
-        # Si no hay thread_id (nueva conversación), crear una en la base de datos
-        if not query.thread_id:
-            await db_service.save_conversation(
-                thread_id=response['thread_id'],
+        with openai_feature("search"):
+            response = await assistant_service.process_query(
+                query=query.query,
+                thread_id=query.thread_id,
                 mode=query.mode
             )
         
-        # Guardar la interacción
-        await db_service.save_interaction(
-            thread_id=response['thread_id'],
-            query=query.query,
-            response=response['response'],
-            mode=query.mode,
-            citations=[c['quote'] for c in response.get('citations', [])]
-        )
+        with stage("db_save"), TRACER.span("db_save", root=False):
+            # Guardar la interacción; si no hay thread_id (nueva conversación), la
+            # conversación se crea en la misma transacción
+            await db_service.save_interaction(
+                thread_id=response['thread_id'],
+                query=query.query,
+                response=response['response'],
+                mode=query.mode,
+                citations=[c['quote'] for c in response.get('citations', [])],
+                new_conversation=not query.thread_id
+            )
         
         return SearchResponse(**response)
         
+    except OpenAIUnavailable as e:
+        # Fallo rápido durante incidencias de OpenAI: el cliente sabe cuándo reintentar
+        logger.warning(f"Search rejected ({e.reason}): {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         logger.error(f"Error in search endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/diagnostic/db")
 async def database_diagnostic():
     """Endpoint de diagnóstico para verificar la conexión a la base de datos."""
     try:
         # Intentar realizar operaciones básicas
-        stats = await db_service.get_analytics()
+        stats = db_service.get_analytics()
         
         return {
             "status": "healthy",
@@ -135,51 +312,245 @@ async def database_diagnostic():
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@app.get("/diagnostic/openai")
+async def openai_diagnostic():
+    """Estado del pool de conexiones compartido con la API de OpenAI."""
+    return {
+        "pools": openai_pool_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def _enqueue_analytics_job(kind: str,
+                           start_date: Optional[str],
+                           end_date: Optional[str],
+                           mode: Optional[str] = None) -> dict:
+    """Encola un trabajo de analítica reutilizando uno existente para los mismos datos."""
+    if kind not in ANALYTICS_JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Tipo de trabajo no válido: {kind}")
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+
+    params = {
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "mode": mode
+    }
+    # El trabajo puntúa lo que falte, así que su resultado sólo depende de las interacciones
+    data_version = analytics_service.get_data_version(start, end, include_scores=False)
+    dedupe_key = f"{kind}:{json.dumps(params, sort_keys=True)}:{data_version}"
+    return db_service.enqueue_job(kind, params, dedupe_key=dedupe_key)
+
+def _job_response(job: dict, status_code: int = 202) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content=job,
+        headers={"Location": f"/analytics/jobs/{job['id']}"}
+    )
+
+@app.post("/analytics/jobs", status_code=202)
+def submit_analytics_job(job_request: AnalyticsJobRequest):
+    """Encola un trabajo de analítica para que lo ejecute el worker."""
+    try:
+        job = _enqueue_analytics_job(
+            job_request.kind, job_request.start_date, job_request.end_date, job_request.mode
+        )
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting analytics job: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/jobs/{job_id}")
+def get_analytics_job(job_id: int):
+    """Estado, progreso y resultado de un trabajo de analítica."""
+    job = db_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
 @app.get("/analytics/report")
-async def get_analytics_report(
+def get_analytics_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
     """
     Genera un informe completo de análisis de las consultas.
     Fechas en formato ISO: YYYY-MM-DD
+
+    El informe se calcula en el worker: si ya existe para los datos actuales se
+    devuelve directamente; si no, se responde 202 con el trabajo encolado.
+    """
+    try:
+        job = _enqueue_analytics_job("report", start_date, end_date)
+        if job["status"] == "succeeded":
+            return db_service.get_job(job["id"])["result"]
+        return _job_response(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating analytics report: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/topics")
+async def get_topic_analysis(
+    request: Request,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    mode: Optional[str] = None
+):
+    """
+    Análisis de distribución de temas en las consultas.
+
+    Sólo incluye interacciones ya puntuadas por el worker; `pending_interactions`
+    indica cuántas quedan por puntuar en el período.
     """
     try:
         start = datetime.fromisoformat(start_date) if start_date else None
         end = datetime.fromisoformat(end_date) if end_date else None
         
-        report = await analytics_service.generate_comprehensive_report(start, end)
-        return report
+        return await _cached_response(
+            request,
+            ("topics", start, end, mode),
+            lambda: analytics_service.get_data_version(start, end),
+            lambda: analytics_service.get_topic_distribution(start, end, mode, score_pending=False)
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
     except Exception as e:
-        logger.error(f"Error generating analytics report: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/topics")
-async def get_topic_analysis(
+@app.get("/analytics/trends")
+async def get_topic_trends(
+    request: Request,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    mode: Optional[str] = None,
+    freq: str = "D",
+    window: int = 7
 ):
-    """Análisis de distribución de temas en las consultas."""
+    """Evolución temporal de los temas (freq: D diaria, W semanal)."""
+    if freq not in ("D", "W"):
+        raise HTTPException(status_code=400, detail="freq debe ser 'D' o 'W'")
+    if window < 1:
+        raise HTTPException(status_code=400, detail="window debe ser mayor que 0")
     try:
         start = datetime.fromisoformat(start_date) if start_date else None
         end = datetime.fromisoformat(end_date) if end_date else None
-        
-        return await analytics_service.get_topic_distribution(start, end)
+
+        return await _cached_response(
+            request,
+            ("trends", start, end, mode, freq, window),
+            lambda: analytics_service.get_data_version(start, end),
+            lambda: analytics_service.get_topic_trends(
+                start, end, mode, freq=freq, window=window, score_pending=False
+            )
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/analytics/engagement")
-async def get_engagement_metrics():
-    """Métricas de engagement de usuarios."""
+async def get_engagement_metrics(
+    request: Request,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    mode: Optional[str] = None,
+    idle_gap_minutes: Optional[float] = None
+):
+    """
+    Métricas de engagement de usuarios, con percentiles y desglose por modo.
+    Con idle_gap_minutes se incluye la sesionización de los threads.
+    """
+    if idle_gap_minutes is not None and idle_gap_minutes <= 0:
+        raise HTTPException(status_code=400, detail="idle_gap_minutes debe ser mayor que 0")
     try:
-        return await analytics_service.get_engagement_metrics()
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+
+        # Las conversaciones se filtran por fecha de inicio pero siguen creciendo
+        # después, así que se usa la versión global de los datos
+        return await _cached_response(
+            request,
+            ("engagement", start, end, mode, idle_gap_minutes),
+            analytics_service.get_data_version,
+            lambda: analytics_service.get_engagement_metrics(start, end, mode, idle_gap_minutes)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/analytics/openai-usage")
+def get_openai_usage(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: str = "day,feature"
+):
+    """
+    Uso de OpenAI (llamadas, errores, reintentos, tokens, coste estimado en USD y
+    latencia) agrupado por day, feature, operation y/o model.
+    """
+    groups = tuple(name.strip() for name in group_by.split(",") if name.strip())
+    invalid = [name for name in groups if name not in OPENAI_USAGE_GROUPS]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by no válido: {', '.join(invalid)}. Use: {', '.join(OPENAI_USAGE_GROUPS)}"
+        )
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+    try:
+        rows = db_service.get_openai_usage_summary(start, end, groups)
+        totals = db_service.get_openai_usage_summary(start, end, ())
+        return {
+            "status": "success",
+            "period": {"start": start_date, "end": end_date},
+            "group_by": list(groups),
+            "rows": rows,
+            "totals": totals[0] if totals else {}
+        }
+    except Exception as e:
+        logger.error(f"Error getting OpenAI usage: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/export/interactions")
+async def export_interactions(
+    format: str = "csv",
+    gzip: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    mode: Optional[str] = None,
+    after_id: Optional[int] = None,
+    header: bool = True
+):
+    """
+    Exporta las interacciones en streaming (CSV o NDJSON, opcionalmente gzip),
+    en orden de id. Para continuar una descarga interrumpida se pasa como
+    after_id el último id recibido.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no válido. Use: {', '.join(EXPORT_FORMATS)}")
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+
+    filename = f"interactions.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(db_service, format, gzip, start, end, mode, after_id, header),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -0,0 +1,168 @@
+# src/political_discourse_analyzer/core/worker.py
+import os
+import sys
+import signal
+import socket
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from political_discourse_analyzer.services.database_service import DatabaseService
+from political_discourse_analyzer.services.analytics_service import AnalyticsService
+from political_discourse_analyzer.models.settings import ApplicationSettings
+from political_discourse_analyzer.utils.openai_ledger import LEDGER
+from political_discourse_analyzer.utils.openai_client import close_openai_clients
+from political_discourse_analyzer.utils.openai_resilience import OPENAI_GUARD, OpenAIUnavailable
+from political_discourse_analyzer.utils.tracing import TRACER, configure_tracing
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout
+)
+
+logger = logging.getLogger(__name__)
+
+class AnalyticsWorker:
+    """
+    Ejecuta los trabajos de analítica encolados en la tabla `analytics_jobs`.
+
+    Cuando no hay trabajos pendientes puntúa en segundo plano las interacciones
+    nuevas, de forma que la API pueda servir la distribución de temas sin llamar
+    a OpenAI ni cargar spaCy.
+    """
+
+    def __init__(self,
+                 db_service: DatabaseService,
+                 analytics_service: AnalyticsService,
+                 poll_interval: float = 5.0,
+                 scoring_batch_size: int = 50,
+                 retry_base_delay: float = 30.0,
+                 worker_id: Optional[str] = None):
+        self.db_service = db_service
+        self.analytics_service = analytics_service
+        self.poll_interval = poll_interval
+        self.scoring_batch_size = scoring_batch_size
+        self.retry_base_delay = retry_base_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+
+    def stop(self):
+        """Termina el bucle después del trabajo en curso."""
+        logger.info("Stopping analytics worker after current job")
+        self._stopping = True
+
+    async def run_forever(self):
+        logger.info(f"Analytics worker {self.worker_id} started")
+        while not self._stopping:
+            try:
+                if await self.run_once():
+                    continue
+                if self.scoring_batch_size and await self.analytics_service.score_pending_interactions(
+                    limit=self.scoring_batch_size
+                ):
+                    continue
+            except OpenAIUnavailable as e:
+                logger.warning(f"OpenAI unavailable, pausing scoring for {e.retry_after:.0f}s: {str(e)}")
+                await asyncio.sleep(max(self.poll_interval, e.retry_after))
+                continue
+            except Exception as e:
+                logger.error(f"Error in analytics worker loop: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.poll_interval)
+        logger.info(f"Analytics worker {self.worker_id} stopped")
+
+    async def run_once(self) -> bool:
+        """Ejecuta un trabajo si hay alguno disponible. Devuelve True si ejecutó uno."""
+        job = self.db_service.claim_job(self.worker_id)
+        if not job:
+            return False
+
+        logger.info(f"Running analytics job {job['id']} ({job['kind']}), attempt {job['attempts']}")
+
+        def progress(fraction: float, message: str):
+            self.db_service.update_job_progress(job['id'], self.worker_id, round(fraction, 4), message)
+
+        try:
+            with TRACER.span(f"job {job['kind']}", job_id=job['id'], attempt=job['attempts']):
+                result = await self._execute(job, progress)
+            if isinstance(result, dict) and result.get("status") == "error":
+                raise RuntimeError(result.get("message", "Error desconocido"))
+            if self.db_service.complete_job(job['id'], self.worker_id, result):
+                logger.info(f"Analytics job {job['id']} finished")
+            else:
+                logger.warning(f"Analytics job {job['id']} finished after its lease was taken over; result discarded")
+        except OpenAIUnavailable as e:
+            # La saturación del proveedor no es un fallo del trabajo: se reintenta sin gastar intentos
+            requeued = self.db_service.requeue_job(job['id'], self.worker_id, str(e), e.retry_after)
+            logger.warning(
+                f"Analytics job {job['id']} postponed {e.retry_after:.0f}s "
+                f"({'requeued' if requeued else 'lease lost'}): {str(e)}"
+            )
+        except Exception as e:
+            delay = self.retry_base_delay * 2 ** (job['attempts'] - 1)
+            failed = self.db_service.fail_job(job['id'], self.worker_id, str(e), retry_delay_seconds=delay)
+            logger.error(
+                f"Analytics job {job['id']} failed ({failed['status'] if failed else 'lease lost'}): {str(e)}",
+                exc_info=True
+            )
+        return True
+
+    async def _execute(self, job: Dict, progress) -> Dict:
+        params = job['params']
+        start = datetime.fromisoformat(params['start_date']) if params.get('start_date') else None
+        end = datetime.fromisoformat(params['end_date']) if params.get('end_date') else None
+
+        if job['kind'] == "report":
+            return await self.analytics_service.generate_comprehensive_report(
+                start, end, progress=progress
+            )
+        if job['kind'] == "topics":
+            return await self.analytics_service.get_topic_distribution(
+                start, end, params.get('mode'), progress=progress
+            )
+        if job['kind'] == "score":
+            scored = await self.analytics_service.score_pending_interactions(
+                start, end, params.get('mode'), progress=progress
+            )
+            return {"status": "success", "scored_interactions": scored}
+        raise ValueError(f"Tipo de trabajo desconocido: {job['kind']}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Worker de trabajos de analítica")
+    parser.add_argument("--poll-interval", type=float,
+                        default=float(os.getenv("WORKER_POLL_INTERVAL", "5")))
+    parser.add_argument("--scoring-batch-size", type=int,
+                        default=int(os.getenv("WORKER_SCORING_BATCH_SIZE", "50")),
+                        help="Interacciones puntuadas por ciclo inactivo (0 para desactivar)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    settings = ApplicationSettings.from_env(openai_api_key=os.getenv("OPENAI_API_KEY"))
+    configure_tracing(settings.tracing_settings, service_name="political-discourse-analyzer-worker")
+    OPENAI_GUARD.configure(settings.resilience_settings)
+    db_service = DatabaseService()
+    if settings.ai_settings.usage_ledger:
+        LEDGER.configure(db_service.save_openai_usage, settings.ai_settings.usage_flush_seconds)
+    worker = AnalyticsWorker(
+        db_service,
+        AnalyticsService(db_service, settings.ai_settings),
+        poll_interval=args.poll_interval,
+        scoring_batch_size=args.scoring_batch_size
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run_forever()
+    finally:
+        TRACER.shutdown()
+        LEDGER.shutdown()
+        close_openai_clients()
+
+if __name__ == "__main__":
+    asyncio.run(main())
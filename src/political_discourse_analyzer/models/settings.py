@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 from pathlib import Path
 import os
@@ -6,6 +6,22 @@ import os
 class AISettings(BaseModel):
     openai_api_key: Optional[str] = Field(None, description="OpenAI API key")
     model: str = Field(default="gpt-4-turbo-preview", description="Modelo a utilizar")
+    base_url: Optional[str] = Field(
+        None,
+        description="URL base de la API (p. ej. el servidor local de utils/openai_stub.py)"
+    )
+    max_connections: int = Field(default=20, ge=1, description="Conexiones simultáneas con la API")
+    max_keepalive_connections: int = Field(default=10, ge=0, description="Conexiones inactivas conservadas")
+    keepalive_expiry: float = Field(default=60.0, description="Segundos que se conserva una conexión inactiva")
+    http2: bool = Field(default=True, description="Usar HTTP/2 si el paquete h2 está instalado")
+    max_retries: int = Field(default=2, ge=0, description="Reintentos del SDK por llamada")
+    connect_timeout: float = Field(default=5.0, description="Tiempo máximo para conectar")
+    stream_timeout: float = Field(default=180.0, description="Tiempo máximo entre eventos de un run en streaming")
+    embeddings_timeout: float = Field(default=15.0, description="Tiempo máximo de una llamada de embeddings")
+    chat_timeout: float = Field(default=60.0, description="Tiempo máximo de una llamada de chat")
+    default_timeout: float = Field(default=30.0, description="Tiempo máximo del resto de llamadas")
+    usage_ledger: bool = Field(default=True, description="Guardar cada llamada en la tabla openai_usage")
+    usage_flush_seconds: float = Field(default=5.0, gt=0, description="Intervalo de escritura del registro de uso")
 
 class DatabaseSettings(BaseModel):
     path: Path = Field(
@@ -13,9 +29,89 @@ class DatabaseSettings(BaseModel):
         description="Ruta de la base de datos SQLite"
     )
 
+class CacheSettings(BaseModel):
+    max_entries: int = Field(default=128, description="Número máximo de resultados de analítica en caché")
+    stale_seconds: float = Field(
+        default=300,
+        description="Segundos durante los que se sirve un resultado obsoleto mientras se recalcula"
+    )
+
+class TracingSettings(BaseModel):
+    enabled: bool = Field(default=False, description="Registrar y exportar trazas")
+    sample_rate: float = Field(default=0.1, ge=0, le=1, description="Fracción de trazas que se exportan siempre")
+    slow_threshold_ms: Optional[float] = Field(
+        default=None,
+        description="Exportar también las trazas no muestreadas que superen esta duración"
+    )
+    exporter: str = Field(default="jsonl", description="Destino de las trazas: jsonl u otlp")
+    path: Path = Field(default=Path("traces/spans.jsonl"), description="Fichero del exportador jsonl")
+    otlp_endpoint: str = Field(
+        default="http://localhost:4318/v1/traces",
+        description="Endpoint OTLP/HTTP del colector"
+    )
+
+class TimingSettings(BaseModel):
+    server_timing: bool = Field(default=True, description="Añadir la cabecera Server-Timing a las respuestas")
+    debug_timings: bool = Field(
+        default=True,
+        description="Permitir el campo debug.timings con ?debug=timings o la cabecera X-Debug-Timings"
+    )
+
+class ProfilerSettings(BaseModel):
+    enabled: bool = Field(default=False, description="Registrar el middleware de perfilado")
+    token: Optional[str] = Field(None, description="Valor de la cabecera X-Profile que activa el perfilado")
+    sample_rate: float = Field(default=0.0, ge=0, le=1, description="Fracción de peticiones perfiladas sin cabecera")
+    mode: str = Field(default="sampling", description="sampling (pilas collapsed) o cprofile (.prof)")
+    interval_ms: float = Field(default=5, gt=0, description="Intervalo de muestreo del modo sampling")
+    min_duration_ms: float = Field(default=0, ge=0, description="Guardar sólo perfiles de peticiones más lentas")
+    output_dir: Path = Field(default=Path("profiles"), description="Directorio de los perfiles")
+    max_files: int = Field(default=50, ge=1, description="Perfiles conservados; se borran los más antiguos")
+
+class ResilienceSettings(BaseModel):
+    concurrency_initial: int = Field(default=8, ge=1, description="Límite inicial de llamadas simultáneas a OpenAI")
+    concurrency_min: int = Field(default=1, ge=1, description="Límite mínimo tras reducirlo por sobrecarga")
+    concurrency_max: int = Field(default=16, ge=1, description="Límite máximo al que puede crecer")
+    queue_timeout: float = Field(default=2.0, ge=0, description="Segundos que una llamada espera hueco antes del 503")
+    breaker_failures: int = Field(default=5, ge=1, description="Errores de sobrecarga seguidos que abren el circuito")
+    breaker_reset_seconds: float = Field(default=10.0, gt=0, description="Tiempo base con el circuito abierto")
+    breaker_max_reset_seconds: float = Field(default=120.0, gt=0, description="Tiempo máximo con el circuito abierto")
+
+class AdmissionSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Registrar el middleware de control de admisión")
+    capacity: int = Field(default=32, ge=1, description="Peticiones clasificadas en curso a la vez")
+    analytics_max_concurrent: int = Field(
+        default=2, ge=1,
+        description="Huecos que puede ocupar la analítica; el resto queda reservado a /search"
+    )
+    interactive_max_queue: int = Field(default=64, ge=0, description="Consultas interactivas en cola")
+    interactive_queue_timeout: float = Field(default=5.0, ge=0, description="Espera máxima en cola de /search")
+    analytics_max_queue: int = Field(default=4, ge=0, description="Peticiones de analítica en cola")
+    analytics_queue_timeout: float = Field(default=10.0, ge=0, description="Espera máxima en cola de analítica")
+    export_max_concurrent: int = Field(
+        default=2, ge=1, description="Exportaciones en curso; cada una ocupa su hueco hasta terminar de enviarse"
+    )
+    export_max_queue: int = Field(default=2, ge=0, description="Exportaciones en cola")
+    export_queue_timeout: float = Field(default=10.0, ge=0, description="Espera máxima en cola de exportación")
+
+    @model_validator(mode="after")
+    def _reserve_interactive_capacity(self):
+        # Sin huecos reservados, la analítica y las exportaciones podrían ocuparlos todos
+        if self.analytics_max_concurrent + self.export_max_concurrent >= self.capacity:
+            raise ValueError(
+                "analytics_max_concurrent + export_max_concurrent debe ser menor que capacity "
+                "para reservar huecos a /search"
+            )
+        return self
+
 class ApplicationSettings(BaseModel):
     ai_settings: AISettings = Field(default_factory=AISettings)
     db_settings: DatabaseSettings = Field(default_factory=DatabaseSettings)
+    cache_settings: CacheSettings = Field(default_factory=CacheSettings)
+    tracing_settings: TracingSettings = Field(default_factory=TracingSettings)
+    timing_settings: TimingSettings = Field(default_factory=TimingSettings)
+    profiler_settings: ProfilerSettings = Field(default_factory=ProfilerSettings)
+    resilience_settings: ResilienceSettings = Field(default_factory=ResilienceSettings)
+    admission_settings: AdmissionSettings = Field(default_factory=AdmissionSettings)
     documents_path: Path = Field(
         default=Path("data/programs"),
         description="Ruta de los documentos políticos"
@@ -32,8 +128,68 @@ class ApplicationSettings(BaseModel):
         return cls(
             ai_settings=AISettings(
                 openai_api_key=openai_api_key,
-                model=os.getenv("MODEL_NAME", "gpt-4-turbo-preview")
+                model=os.getenv("MODEL_NAME", "gpt-4-turbo-preview"),
+                base_url=os.getenv("OPENAI_BASE_URL"),
+                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")),
+                keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60")),
+                http2=os.getenv("OPENAI_HTTP2", "true").lower() in ("1", "true", "yes"),
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+                connect_timeout=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5")),
+                stream_timeout=float(os.getenv("OPENAI_STREAM_TIMEOUT", "180")),
+                embeddings_timeout=float(os.getenv("OPENAI_EMBEDDINGS_TIMEOUT", "15")),
+                chat_timeout=float(os.getenv("OPENAI_CHAT_TIMEOUT", "60")),
+                default_timeout=float(os.getenv("OPENAI_DEFAULT_TIMEOUT", "30")),
+                usage_ledger=os.getenv("OPENAI_USAGE_LEDGER", "true").lower() in ("1", "true", "yes"),
+                usage_flush_seconds=float(os.getenv("OPENAI_USAGE_FLUSH_SECONDS", "5"))
             ),
             db_settings=DatabaseSettings(),
+            cache_settings=CacheSettings(
+                max_entries=int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "128")),
+                stale_seconds=float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "300"))
+            ),
+            tracing_settings=TracingSettings(
+                enabled=os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes"),
+                sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "0.1")),
+                slow_threshold_ms=float(os.environ["TRACING_SLOW_MS"]) if os.getenv("TRACING_SLOW_MS") else None,
+                exporter=os.getenv("TRACING_EXPORTER", "jsonl"),
+                path=Path(os.getenv("TRACING_FILE", "traces/spans.jsonl")),
+                otlp_endpoint=os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+            ),
+            timing_settings=TimingSettings(
+                server_timing=os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes"),
+                debug_timings=os.getenv("DEBUG_TIMINGS_ENABLED", "true").lower() in ("1", "true", "yes")
+            ),
+            profiler_settings=ProfilerSettings(
+                enabled=os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes"),
+                token=os.getenv("PROFILER_TOKEN") or None,
+                sample_rate=float(os.getenv("PROFILER_SAMPLE_RATE", "0")),
+                mode=os.getenv("PROFILER_MODE", "sampling"),
+                interval_ms=float(os.getenv("PROFILER_INTERVAL_MS", "5")),
+                min_duration_ms=float(os.getenv("PROFILER_MIN_DURATION_MS", "0")),
+                output_dir=Path(os.getenv("PROFILER_DIR", "profiles")),
+                max_files=int(os.getenv("PROFILER_MAX_FILES", "50"))
+            ),
+            resilience_settings=ResilienceSettings(
+                concurrency_initial=int(os.getenv("OPENAI_CONCURRENCY_INITIAL", "8")),
+                concurrency_min=int(os.getenv("OPENAI_CONCURRENCY_MIN", "1")),
+                concurrency_max=int(os.getenv("OPENAI_CONCURRENCY_MAX", "16")),
+                queue_timeout=float(os.getenv("OPENAI_QUEUE_TIMEOUT", "2")),
+                breaker_failures=int(os.getenv("OPENAI_BREAKER_FAILURES", "5")),
+                breaker_reset_seconds=float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "10")),
+                breaker_max_reset_seconds=float(os.getenv("OPENAI_BREAKER_MAX_RESET_SECONDS", "120"))
+            ),
+            admission_settings=AdmissionSettings(
+                enabled=os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes"),
+                capacity=int(os.getenv("ADMISSION_CAPACITY", "32")),
+                analytics_max_concurrent=int(os.getenv("ADMISSION_ANALYTICS_MAX_CONCURRENT", "2")),
+                interactive_max_queue=int(os.getenv("ADMISSION_INTERACTIVE_MAX_QUEUE", "64")),
+                interactive_queue_timeout=float(os.getenv("ADMISSION_INTERACTIVE_QUEUE_TIMEOUT", "5")),
+                analytics_max_queue=int(os.getenv("ADMISSION_ANALYTICS_MAX_QUEUE", "4")),
+                analytics_queue_timeout=float(os.getenv("ADMISSION_ANALYTICS_QUEUE_TIMEOUT", "10")),
+                export_max_concurrent=int(os.getenv("ADMISSION_EXPORT_MAX_CONCURRENT", "2")),
+                export_max_queue=int(os.getenv("ADMISSION_EXPORT_MAX_QUEUE", "2")),
+                export_queue_timeout=float(os.getenv("ADMISSION_EXPORT_QUEUE_TIMEOUT", "10"))
+            ),
             documents_path=Path("data/programs")
         )
\ No newline at end of file
@@ -1,30 +1,54 @@
 # src/political_discourse_analyzer/services/analytics_service.py
+import math
 import logging
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import spacy
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from openai import OpenAI
-from sqlalchemy import func 
+import pandas as pd
+from sqlalchemy import func, case
 from .database_service import DatabaseService, Interaction, Conversation
+from political_discourse_analyzer.utils.topic_trends import ROLLUP_COLUMNS, compute_topic_trends
+from political_discourse_analyzer.utils.metrics import ANALYTICS_SECONDS, openai_call, timed
+from political_discourse_analyzer.utils.tracing import traced
+from political_discourse_analyzer.utils.openai_ledger import openai_feature
+from political_discourse_analyzer.utils.openai_client import get_openai_clients
+from political_discourse_analyzer.utils.openai_resilience import OpenAIUnavailable
+from political_discourse_analyzer.models.settings import AISettings
 
 logger = logging.getLogger(__name__)
 
+# Versión del modelo de puntuación; cambiarla invalida las puntuaciones guardadas
+SCORING_VERSION = "1"
+SCORING_METHODS = ('embedding_analysis', 'llm_analysis', 'linguistic_analysis')
+
+# Una interacción que no se puede puntuar se reintenta con espera exponencial
+# (10 min, 20 min, ... hasta un día) y se abandona tras SCORING_MAX_FAILURES fallos
+SCORING_RETRY_BASE_SECONDS = 600
+SCORING_RETRY_MAX_SECONDS = 24 * 3600
+SCORING_MAX_FAILURES = 5
+
+ENGAGEMENT_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Callback de progreso: (fracción completada entre 0 y 1, mensaje)
+ProgressCallback = Callable[[float, str], None]
+
+class ScoringError(Exception):
+    """Un método de análisis no pudo puntuar la consulta; no se guarda ninguna puntuación."""
+
 class AnalyticsService:
-    def __init__(self, db_service: DatabaseService):
+    def __init__(self, db_service: DatabaseService, ai_settings: Optional[AISettings] = None):
         self.db_service = db_service
-        try:
-            self.nlp = spacy.load('es_core_news_md')
-        except OSError:
-            logger.warning("Descargando modelo de spaCy...")
-            import os
-            os.system('python -m spacy download es_core_news_md')
-            self.nlp = spacy.load('es_core_news_md')
+        # El modelo de spaCy se carga bajo demanda: la API sólo lee resultados
+        # ya puntuados y no debe pagar su carga
+        self._nlp = None
         
-        self.client = OpenAI()
+        # Cliente compartido con el resto de servicios (mismo pool de conexiones)
+        self.openai_clients = get_openai_clients(ai_settings)
+        self.client = self.openai_clients.client
         
         # Categorías políticas con descriptores expandidos
         self.categories = {
@@ -65,21 +89,43 @@ class AnalyticsService:
             }
         }
 
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            try:
+                self._nlp = spacy.load('es_core_news_md')
+            except OSError:
+                logger.warning("Descargando modelo de spaCy...")
+                import os
+                os.system('python -m spacy download es_core_news_md')
+                self._nlp = spacy.load('es_core_news_md')
+        return self._nlp
+
+    @timed(ANALYTICS_SECONDS, method="analyze_topic_with_embeddings")
+    @traced("AnalyticsService.analyze_topic_with_embeddings")
     async def analyze_topic_with_embeddings(self, query: str) -> List[Tuple[str, float]]:
         """Análisis mediante embeddings de OpenAI."""
         try:
-            query_embedding = self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=query
-            ).data[0].embedding
+            with openai_call("embeddings.create", "text-embedding-3-small") as call:
+                response = self.client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=query,
+                    timeout=self.openai_clients.timeout("embeddings")
+                )
+                call.usage = response.usage
+            query_embedding = response.data[0].embedding
 
             category_scores = []
             for category, descriptors in self.categories.items():
                 category_text = f"{category}: {', '.join(descriptors['keywords'] + descriptors['descriptors'])}"
-                category_embedding = self.client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=category_text
-                ).data[0].embedding
+                with openai_call("embeddings.create", "text-embedding-3-small") as call:
+                    response = self.client.embeddings.create(
+                        model="text-embedding-3-small",
+                        input=category_text,
+                        timeout=self.openai_clients.timeout("embeddings")
+                    )
+                    call.usage = response.usage
+                category_embedding = response.data[0].embedding
 
                 similarity = cosine_similarity(
                     [query_embedding],
@@ -89,10 +135,14 @@ class AnalyticsService:
                 category_scores.append((category, float(similarity)))
 
             return sorted(category_scores, key=lambda x: x[1], reverse=True)
+        except OpenAIUnavailable:
+            # Sin puntuar: se reintentará cuando OpenAI vuelva a estar disponible
+            raise
         except Exception as e:
-            logger.error(f"Error en análisis de embeddings: {str(e)}")
-            return [(category, 0.0) for category in self.categories]
+            raise ScoringError(f"Error en análisis de embeddings: {str(e)}") from e
 
+    @timed(ANALYTICS_SECONDS, method="analyze_topic_with_llm")
+    @traced("AnalyticsService.analyze_topic_with_llm")
     async def analyze_topic_with_llm(self, query: str) -> Dict[str, float]:
         """Análisis mediante GPT-4-turbo."""
         try:
@@ -104,26 +154,43 @@ class AnalyticsService:
             Tu respuesta debe ser un objeto JSON con las categorías como claves y los porcentajes como valores.
             Por ejemplo: {{"economía": 60, "sanidad": 40}}"""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[
-                    {"role": "system", "content": "Eres un analista experto en política española. Responde siempre en formato JSON."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with openai_call("chat.completions.create", "gpt-4-turbo") as call:
+                response = self.client.chat.completions.create(
+                    model="gpt-4-turbo",
+                    messages=[
+                        {"role": "system", "content": "Eres un analista experto en política española. Responde siempre en formato JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    timeout=self.openai_clients.timeout("chat")
+                )
+                call.usage = response.usage
 
             # Parsear la respuesta como JSON
             try:
-                return json.loads(response.choices[0].message.content)
+                scores = json.loads(response.choices[0].message.content)
             except json.JSONDecodeError as e:
-                logger.error(f"Error decodificando JSON de GPT-4-turbo: {str(e)}")
                 logger.error(f"Contenido recibido: {response.choices[0].message.content}")
-                return {category: 0.0 for category in self.categories}
+                raise ScoringError(f"Error decodificando JSON de GPT-4-turbo: {str(e)}") from e
+            if not isinstance(scores, dict):
+                raise ScoringError(f"Respuesta de GPT-4-turbo sin objeto JSON: {scores!r}")
+
+            # Las categorías que falten cuentan como 0; un valor no numérico invalida la respuesta
+            values = {}
+            for category in self.categories:
+                value = scores.get(category, 0)
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                    raise ScoringError(f"Puntuación no numérica de GPT-4-turbo para {category}: {value!r}")
+                values[category] = float(value)
+            return values
 
+        except (OpenAIUnavailable, ScoringError):
+            # Sin puntuar: se reintentará más adelante
+            raise
         except Exception as e:
-            logger.error(f"Error en análisis LLM: {str(e)}")
-            return {category: 0.0 for category in self.categories}
+            raise ScoringError(f"Error en análisis LLM: {str(e)}") from e
 
+    @timed(ANALYTICS_SECONDS, method="analyze_topic_with_spacy")
+    @traced("AnalyticsService.analyze_topic_with_spacy")
     def analyze_topic_with_spacy(self, query: str) -> Dict[str, float]:
         """Análisis lingüístico con spaCy."""
         try:
@@ -144,105 +211,361 @@ class AnalyticsService:
 
             return scores
         except Exception as e:
-            logger.error(f"Error en análisis spaCy: {str(e)}")
-            return {category: 0.0 for category in self.categories}
+            raise ScoringError(f"Error en análisis spaCy: {str(e)}") from e
+
+    def get_data_version(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         include_scores: bool = True) -> str:
+        """Token de versión de los datos de análisis, incluido el modelo de puntuación."""
+        version = self.db_service.get_data_version(start_date, end_date, include_scores)
+        return f"{version}-v{SCORING_VERSION}"
+
+    @timed(ANALYTICS_SECONDS, method="score_interaction")
+    @traced("AnalyticsService.score_interaction")
+    async def score_interaction(self, query: str) -> Dict[str, Dict[str, float]]:
+        """
+        Puntúa una consulta con los tres métodos de análisis. Si alguno falla
+        lanza `ScoringError` (u `OpenAIUnavailable`) en lugar de devolver ceros.
+        """
+        with openai_feature("topic_scoring"):
+            embedding_scores = await self.analyze_topic_with_embeddings(query)
+            llm_scores = await self.analyze_topic_with_llm(query)
+        spacy_scores = self.analyze_topic_with_spacy(query)
+
+        return {
+            'embedding_analysis': {
+                category: [score for cat, score in embedding_scores if cat == category][0]
+                for category in self.categories
+            },
+            'llm_analysis': {
+                category: llm_scores[category]
+                for category in self.categories
+            },
+            'linguistic_analysis': {
+                category: spacy_scores.get(category, 0)
+                for category in self.categories
+            }
+        }
 
+    @timed(ANALYTICS_SECONDS, method="score_pending_interactions")
+    @traced("AnalyticsService.score_pending_interactions")
+    async def score_pending_interactions(self,
+                                         start_date: Optional[datetime] = None,
+                                         end_date: Optional[datetime] = None,
+                                         mode: Optional[str] = None,
+                                         limit: Optional[int] = None,
+                                         progress: Optional[ProgressCallback] = None) -> int:
+        """
+        Puntúa las interacciones que aún no tienen puntuaciones guardadas. Las
+        que no se pueden puntuar se dejan sin puntuación, en lugar de guardar
+        ceros en los rollups, y se anota el fallo: se reintentan más tarde y
+        detrás de las nuevas, y tras `SCORING_MAX_FAILURES` fallos se abandonan.
+        """
+        pending = self.db_service.get_unscored_interactions(
+            SCORING_VERSION, start_date, end_date, mode, limit, max_failures=SCORING_MAX_FAILURES
+        )
+        scored = failed = 0
+        for index, (interaction_id, query, interaction_mode, timestamp) in enumerate(pending, start=1):
+            try:
+                scores = await self.score_interaction(query)
+            except ScoringError as e:
+                failed += 1
+                failures = self.db_service.record_scoring_failure(
+                    interaction_id, SCORING_VERSION, str(e),
+                    SCORING_RETRY_BASE_SECONDS, SCORING_RETRY_MAX_SECONDS
+                )
+                logger.warning(f"Interacción {interaction_id} sin puntuar (fallo {failures}): {str(e)}")
+            else:
+                if self.db_service.save_topic_scores(
+                    interaction_id, timestamp, interaction_mode, scores, SCORING_VERSION
+                ):
+                    scored += 1
+            if progress:
+                progress(index / len(pending), f"Puntuadas {index} de {len(pending)} interacciones")
+
+        if scored:
+            logger.info(f"Puntuadas {scored} interacciones nuevas")
+        if failed:
+            logger.warning(f"{failed} interacciones quedan pendientes por errores de análisis")
+        return scored
+
+    @timed(ANALYTICS_SECONDS, method="get_topic_distribution")
+    @traced("AnalyticsService.get_topic_distribution")
     async def get_topic_distribution(self, 
                                    start_date: Optional[datetime] = None,
-                                   end_date: Optional[datetime] = None) -> Dict:
-        """Análisis combinado de distribución de temas."""
-        with self.db_service.SessionLocal() as db:
-            query = db.query(Interaction.query)
-            if start_date:
-                query = query.filter(Interaction.timestamp >= start_date)
-            if end_date:
-                query = query.filter(Interaction.timestamp <= end_date)
-            
-            interactions = query.all()
-            
-            if not interactions:
-                return {
-                    "status": "no_data",
-                    "message": "No se encontraron interacciones en el período especificado"
-                }
-            
-            results = {
-                'embedding_analysis': {},
-                'llm_analysis': {},
-                'linguistic_analysis': {},
-                'combined_analysis': {}
+                                   end_date: Optional[datetime] = None,
+                                   mode: Optional[str] = None,
+                                   score_pending: bool = True,
+                                   progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Análisis combinado de distribución de temas.
+
+        Con `score_pending=False` sólo se usan las interacciones ya puntuadas (por
+        el worker) y no se hace ninguna llamada a OpenAI ni a spaCy.
+        """
+        pending_interactions = 0
+        if score_pending:
+            await self.score_pending_interactions(start_date, end_date, mode, progress=progress)
+        else:
+            pending_interactions = self.db_service.count_unscored_interactions(
+                SCORING_VERSION, start_date, end_date, mode
+            )
+        totals = self.db_service.get_topic_score_totals(
+            SCORING_VERSION, start_date, end_date, mode
+        )
+
+        # Todas las interacciones puntuadas aportan a cada método y categoría
+        n_interactions = max(
+            (count for categories in totals.values() for _, count in categories.values()),
+            default=0
+        )
+        if not n_interactions:
+            return {
+                "status": "no_data",
+                "message": "No se encontraron interacciones en el período especificado",
+                "pending_interactions": pending_interactions
             }
-            
-            for interaction in interactions:
-                embedding_scores = await self.analyze_topic_with_embeddings(interaction.query)
-                llm_scores = await self.analyze_topic_with_llm(interaction.query)
-                spacy_scores = self.analyze_topic_with_spacy(interaction.query)
-                
-                for category in self.categories:
-                    results['embedding_analysis'][category] = results['embedding_analysis'].get(category, 0) + \
-                        [score for cat, score in embedding_scores if cat == category][0]
-                    results['llm_analysis'][category] = results['llm_analysis'].get(category, 0) + \
-                        float(llm_scores.get(category, 0))
-                    results['linguistic_analysis'][category] = results['linguistic_analysis'].get(category, 0) + \
-                        spacy_scores.get(category, 0)
-
-            # Normalizar resultados
-            n_interactions = len(interactions)
-            for analysis_type in results:
-                for category in results[analysis_type]:
-                    results[analysis_type][category] /= n_interactions
-
-            # Análisis combinado
+
+        results = {
+            'embedding_analysis': {},
+            'llm_analysis': {},
+            'linguistic_analysis': {},
+            'combined_analysis': {}
+        }
+
+        # Normalizar resultados
+        for analysis_type in SCORING_METHODS:
             for category in self.categories:
-                results['combined_analysis'][category] = (
-                    results['embedding_analysis'][category] +
-                    results['llm_analysis'][category] +
-                    results['linguistic_analysis'][category]
-                ) / 3
+                score_sum, count = totals.get(analysis_type, {}).get(category, (0.0, 0))
+                results[analysis_type][category] = score_sum / count if count else 0.0
 
-            return {
-                "status": "success",
-                "total_interactions": n_interactions,
-                "period": {
-                    "start": start_date.isoformat() if start_date else "all",
-                    "end": end_date.isoformat() if end_date else "all"
-                },
-                "results": results
+        # Análisis combinado
+        for category in self.categories:
+            results['combined_analysis'][category] = (
+                results['embedding_analysis'][category] +
+                results['llm_analysis'][category] +
+                results['linguistic_analysis'][category]
+            ) / 3
+
+        return {
+            "status": "success",
+            "total_interactions": n_interactions,
+            "pending_interactions": pending_interactions,
+            "period": {
+                "start": start_date.isoformat() if start_date else "all",
+                "end": end_date.isoformat() if end_date else "all"
+            },
+            "results": results
+        }
+
+    @timed(ANALYTICS_SECONDS, method="get_topic_trends")
+    @traced("AnalyticsService.get_topic_trends")
+    async def get_topic_trends(self,
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               mode: Optional[str] = None,
+                               freq: str = 'D',
+                               window: int = 7,
+                               z_threshold: float = 3.0,
+                               score_pending: bool = True) -> Dict:
+        """
+        Evolución temporal de la cuota de cada tema (diaria o semanal), con media
+        móvil, tasa de crecimiento y detección de puntos de cambio. Se calcula
+        sobre los agregados diarios, por lo que los extremos del período se
+        toman como días completos.
+        """
+        if score_pending:
+            await self.score_pending_interactions(start_date, end_date, mode)
+        rows = self.db_service.get_topic_daily_rollups(SCORING_VERSION, start_date, end_date, mode)
+        trends = compute_topic_trends(
+            pd.DataFrame(rows, columns=ROLLUP_COLUMNS),
+            freq=freq,
+            window=window,
+            z_threshold=z_threshold,
+            start=start_date.date() if start_date else None,
+            end=end_date.date() if end_date else None
+        )
+        trends["period"] = {
+            "start": start_date.isoformat() if start_date else "all",
+            "end": end_date.isoformat() if end_date else "all"
+        }
+        return trends
+
+    def get_topic_categories(self) -> List[str]:
+        return self.db_service.get_topic_categories(SCORING_VERSION)
+
+    def iter_interaction_topic_shares(self,
+                                      start_date: Optional[datetime] = None,
+                                      end_date: Optional[datetime] = None,
+                                      mode: Optional[str] = None) -> Iterator[Tuple[int, str, float]]:
+        """Cuotas de cada tema por interacción ya puntuada (ver DatabaseService)."""
+        return self.db_service.iter_interaction_topic_shares(SCORING_VERSION, start_date, end_date, mode)
+
+    @staticmethod
+    def _percentile_columns(column, label: str) -> List:
+        return [
+            func.percentile_cont(q).within_group(column).label(f"{label}_p{int(q * 100)}")
+            for q in ENGAGEMENT_PERCENTILES
+        ]
+
+    @staticmethod
+    def _percentiles_from_row(row, label: str, scale: float = 1) -> Dict[str, float]:
+        return {
+            f"p{int(q * 100)}": round(float(getattr(row, f"{label}_p{int(q * 100)}") or 0) / scale, 2)
+            for q in ENGAGEMENT_PERCENTILES
+        }
+
+    def _conversation_metrics(self, db,
+                              start_date: Optional[datetime],
+                              end_date: Optional[datetime],
+                              mode: Optional[str]) -> Dict:
+        """Métricas por conversación en una única consulta agregada por modo y total."""
+        duration = func.extract('epoch', Conversation.last_interaction - Conversation.created_at)
+        query = db.query(
+            Conversation.mode.label('mode'),
+            func.grouping(Conversation.mode).label('is_total'),
+            func.count(Conversation.id).label('total'),
+            func.count(Conversation.id).filter(Conversation.total_interactions > 1).label('followups'),
+            func.avg(Conversation.total_interactions).label('avg_interactions'),
+            func.avg(duration).label('avg_duration'),
+            *self._percentile_columns(Conversation.total_interactions, 'interactions'),
+            *self._percentile_columns(duration, 'duration')
+        )
+        if start_date:
+            query = query.filter(Conversation.created_at >= start_date)
+        if end_date:
+            query = query.filter(Conversation.created_at <= end_date)
+        if mode is not None:
+            query = query.filter(Conversation.mode == mode)
+
+        metrics = {"overall": None, "by_mode": {}}
+        for row in query.group_by(func.rollup(Conversation.mode)).all():
+            followup_rate = (row.followups / row.total * 100) if row.total else 0
+            row_metrics = {
+                "average_interactions_per_conversation": round(float(row.avg_interactions or 0), 2),
+                "average_conversation_duration_minutes": round(float(row.avg_duration or 0) / 60, 2),
+                "followup_rate_percentage": round(followup_rate, 2),
+                "total_conversations": row.total,
+                "total_followup_conversations": row.followups,
+                "conversation_length_percentiles": self._percentiles_from_row(row, 'interactions'),
+                "conversation_duration_minutes_percentiles": self._percentiles_from_row(row, 'duration', 60)
             }
+            if row.is_total:
+                metrics["overall"] = row_metrics
+            else:
+                metrics["by_mode"][row.mode or "unknown"] = row_metrics
+        return metrics
 
-    async def get_engagement_metrics(self) -> Dict:
-        """Métricas de engagement de usuarios."""
-        with self.db_service.SessionLocal() as db:
-            try:
-                avg_interactions = db.query(
-                    func.avg(Conversation.total_interactions)
-                ).scalar() or 0
-
-                duration_query = db.query(
-                    func.avg(
-                        func.extract('epoch', 
-                            Conversation.last_interaction - Conversation.created_at
-                        )
-                    )
-                ).scalar() or 0
+    def _session_metrics(self, db,
+                         idle_gap_minutes: float,
+                         start_date: Optional[datetime],
+                         end_date: Optional[datetime],
+                         mode: Optional[str]) -> Dict:
+        """
+        Divide cada thread en sesiones cuando pasan más de `idle_gap_minutes`
+        entre interacciones consecutivas, usando funciones de ventana.
+        """
+        previous = func.lag(Interaction.timestamp).over(
+            partition_by=Interaction.thread_id, order_by=Interaction.timestamp
+        )
+        gaps = self.db_service.filter_interactions(
+            db.query(
+                Interaction.thread_id.label('thread_id'),
+                Interaction.mode.label('mode'),
+                Interaction.timestamp.label('timestamp'),
+                case(
+                    (previous.is_(None), 1),
+                    (func.extract('epoch', Interaction.timestamp - previous) > idle_gap_minutes * 60, 1),
+                    else_=0
+                ).label('new_session')
+            ),
+            start_date, end_date, mode
+        ).subquery()
 
-                total_conversations = db.query(Conversation).count()
-                followup_conversations = db.query(Conversation).filter(
-                    Conversation.total_interactions > 1
-                ).count()
+        numbered = db.query(
+            gaps.c.thread_id,
+            gaps.c.mode,
+            gaps.c.timestamp,
+            func.sum(gaps.c.new_session).over(
+                partition_by=gaps.c.thread_id,
+                order_by=gaps.c.timestamp,
+                rows=(None, 0)
+            ).label('session_number')
+        ).subquery()
 
-                followup_rate = (followup_conversations / total_conversations * 100) if total_conversations > 0 else 0
+        sessions = db.query(
+            numbered.c.thread_id,
+            numbered.c.mode,
+            func.count().label('length'),
+            func.extract('epoch', func.max(numbered.c.timestamp) - func.min(numbered.c.timestamp)).label('duration')
+        ).group_by(numbered.c.thread_id, numbered.c.mode, numbered.c.session_number).subquery()
 
-                return {
+        query = db.query(
+            sessions.c.mode.label('mode'),
+            func.grouping(sessions.c.mode).label('is_total'),
+            func.count().label('sessions'),
+            func.count(func.distinct(sessions.c.thread_id)).label('threads'),
+            func.count().filter(sessions.c.length > 1).label('multi_turn_sessions'),
+            *self._percentile_columns(sessions.c.length, 'length'),
+            *self._percentile_columns(sessions.c.duration, 'duration')
+        ).group_by(func.rollup(sessions.c.mode))
+
+        metrics = {"idle_gap_minutes": idle_gap_minutes, "overall": None, "by_mode": {}}
+        for row in query.all():
+            row_metrics = {
+                "total_sessions": row.sessions,
+                "sessions_per_thread": round(row.sessions / row.threads, 2) if row.threads else 0,
+                "multi_turn_sessions": row.multi_turn_sessions,
+                "session_length_percentiles": self._percentiles_from_row(row, 'length'),
+                "session_duration_minutes_percentiles": self._percentiles_from_row(row, 'duration', 60)
+            }
+            if row.is_total:
+                metrics["overall"] = row_metrics
+            else:
+                metrics["by_mode"][row.mode or "unknown"] = row_metrics
+        return metrics
+
+    @timed(ANALYTICS_SECONDS, method="get_engagement_metrics")
+    @traced("AnalyticsService.get_engagement_metrics")
+    async def get_engagement_metrics(self,
+                                     start_date: Optional[datetime] = None,
+                                     end_date: Optional[datetime] = None,
+                                     mode: Optional[str] = None,
+                                     idle_gap_minutes: Optional[float] = None) -> Dict:
+        """
+        Métricas de engagement de usuarios.
+
+        Las métricas por conversación (medias, tasa de seguimiento y percentiles
+        p50/p90/p99 de longitud y duración) se obtienen en una sola consulta,
+        desglosadas por modo. Con `idle_gap_minutes` se añade la sesionización de
+        los threads por periodos de inactividad.
+        """
+        with self.db_service.SessionLocal() as db:
+            try:
+                conversations = self._conversation_metrics(db, start_date, end_date, mode)
+                overall = conversations["overall"] or {
+                    "average_interactions_per_conversation": 0,
+                    "average_conversation_duration_minutes": 0,
+                    "followup_rate_percentage": 0,
+                    "total_conversations": 0,
+                    "total_followup_conversations": 0
+                }
+
+                result = {
                     "status": "success",
-                    "metrics": {
-                        "average_interactions_per_conversation": round(float(avg_interactions), 2),
-                        "average_conversation_duration_minutes": round(duration_query / 60, 2),
-                        "followup_rate_percentage": round(followup_rate, 2),
-                        "total_conversations": total_conversations,
-                        "total_followup_conversations": followup_conversations
-                    }
+                    "period": {
+                        "start": start_date.isoformat() if start_date else "all",
+                        "end": end_date.isoformat() if end_date else "all"
+                    },
+                    "metrics": overall,
+                    "by_mode": conversations["by_mode"]
                 }
+                if idle_gap_minutes:
+                    result["sessions"] = self._session_metrics(
+                        db, idle_gap_minutes, start_date, end_date, mode
+                    )
+                return result
             except Exception as e:
                 logger.error(f"Error getting engagement metrics: {str(e)}")
                 return {
@@ -250,13 +573,16 @@ class AnalyticsService:
                     "message": str(e)
                 }
 
+    @timed(ANALYTICS_SECONDS, method="generate_comprehensive_report")
+    @traced("AnalyticsService.generate_comprehensive_report")
     async def generate_comprehensive_report(self, 
                                          start_date: Optional[datetime] = None,
-                                         end_date: Optional[datetime] = None) -> Dict:
+                                         end_date: Optional[datetime] = None,
+                                         progress: Optional[ProgressCallback] = None) -> Dict:
         """Genera un informe completo de análisis."""
         try:
-            topics = await self.get_topic_distribution(start_date, end_date)
-            engagement = await self.get_engagement_metrics()
+            topics = await self.get_topic_distribution(start_date, end_date, progress=progress)
+            engagement = await self.get_engagement_metrics(start_date, end_date)
 
             return {
                 "status": "success",
@@ -268,6 +594,9 @@ class AnalyticsService:
                 "topic_analysis": topics,
                 "engagement_metrics": engagement
             }
+        except OpenAIUnavailable:
+            # El worker lo reencola sin gastar intentos
+            raise
         except Exception as e:
             logger.error(f"Error generating comprehensive report: {str(e)}")
             return {
@@ -1,19 +1,34 @@
 import time
 import re
 import asyncio
-import os
 import logging
 from typing import Optional, Dict, List
 from pathlib import Path
-import openai
 from political_discourse_analyzer.models.settings import ApplicationSettings
 from openai import AssistantEventHandler
+from political_discourse_analyzer.utils.metrics import openai_call, stage
+from political_discourse_analyzer.utils.openai_client import get_openai_clients
+from political_discourse_analyzer.utils.openai_resilience import backoff_delay, retry_after_from
+from political_discourse_analyzer.utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
 # --- EventHandler para streaming ---
 class MyEventHandler(AssistantEventHandler):
+    def _span_event(self, name: str, **attributes):
+        # Los eventos se anotan en el span del run (ver process_query)
+        span = current_span()
+        if span is not None:
+            span.add_event(name, **attributes)
+
+    def on_run_step_created(self, run_step) -> None:
+        self._span_event("run_step.created", step_type=run_step.type)
+
+    def on_run_step_done(self, run_step) -> None:
+        self._span_event("run_step.done", step_type=run_step.type, status=run_step.status)
+
     def on_text_created(self, text) -> None:
+        self._span_event("text.created")
         print(f"\nassistant > ", end="", flush=True)
       
     def on_text_delta(self, delta, snapshot):
@@ -36,10 +51,10 @@ class MyEventHandler(AssistantEventHandler):
 class AssistantService:
     def __init__(self, settings: ApplicationSettings):
         self.settings = settings
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self.client = openai.Client(api_key=api_key)
+        # Cliente compartido con el resto de servicios (mismo pool de conexiones).
+        # Sin base_url se usa la API real (o OPENAI_BASE_URL si está definida)
+        self.openai_clients = get_openai_clients(settings.ai_settings)
+        self.client = self.openai_clients.client
         self.assistants: Dict[str, str] = {}
         self.vector_store = None
 
@@ -120,7 +135,7 @@ class AssistantService:
         Inicializa el servicio creando el Vector Store, cargando documentos y configurando los asistentes.
         """
         print("Iniciando servicio...")
-        max_attempts = 3
+        max_attempts = 5
         for attempt in range(max_attempts):
             try:
                 self.vector_store = self._create_or_get_vector_store()
@@ -144,8 +159,9 @@ class AssistantService:
                 if attempt == max_attempts - 1:
                     print("Todos los intentos fallaron")
                     raise
-                print("Reintentando...")
-                time.sleep(1)
+                delay = backoff_delay(attempt, retry_after=retry_after_from(e))
+                print(f"Reintentando en {delay:.1f}s...")
+                time.sleep(delay)
 
     def init_assistants(self):
         assistant_configs = {
@@ -241,6 +257,7 @@ class AssistantService:
             print(f"Error listando asistentes: {e}")
             raise
 
+    @stage("format_response")
     def _format_response(self, raw_response: str) -> str:
         """
         Reformatea la respuesta para mejorar su legibilidad y el formato Markdown.
@@ -270,6 +287,7 @@ class AssistantService:
         
         return formatted
 
+    @traced("AssistantService.process_query")
     async def process_query(self, query: str, mode: str = "neutral", thread_id: Optional[str] = None) -> dict:
         """
         Procesa una consulta usando el asistente configurado y obtiene la respuesta.
@@ -278,51 +296,74 @@ class AssistantService:
             raise ValueError(f"Modo no válido: {mode}")
 
         try:
-            # Crear o recuperar thread
-            thread = (self.client.beta.threads.retrieve(thread_id)
-                    if thread_id else self.client.beta.threads.create())
-
             context_prompts = {
                 "neutral": "Por favor, proporciona una respuesta estructurada con citas específicas de los documentos.",
                 "personal": "Por favor, explica esto de forma conversacional pero incluyendo referencias específicas."
             }
             full_query = f"{context_prompts[mode]}\n\nConsulta del usuario: {query}"
-            
-            # Enviar mensaje de consulta
-            self.client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=full_query
-            )
+            message = {"role": "user", "content": full_query}
 
-            # Procesar la respuesta con streaming
+            # Una sola petición en streaming: las conversaciones nuevas crean el
+            # thread con el mensaje y el run a la vez; en los seguimientos el
+            # mensaje viaja con el run (un thread_id inexistente falla aquí)
             event_handler = MyEventHandler()
-            with self.client.beta.threads.runs.stream(
-                thread_id=thread.id,
-                assistant_id=self.assistants[mode],
-                event_handler=event_handler,
-            ) as stream:
-                stream.until_done()
+            if thread_id:
+                operation = "runs.stream"
+                stream_manager = self.client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=self.assistants[mode],
+                    additional_messages=[message],
+                    event_handler=event_handler,
+                    timeout=self.openai_clients.timeout("stream"),
+                )
+            else:
+                operation = "threads.create_and_run_stream"
+                stream_manager = self.client.beta.threads.create_and_run_stream(
+                    assistant_id=self.assistants[mode],
+                    thread={"messages": [message]},
+                    event_handler=event_handler,
+                    timeout=self.openai_clients.timeout("stream"),
+                )
+
+            def run_stream():
+                with stage("run_stream"), openai_call(operation) as call:
+                    with stream_manager as stream:
+                        stream.until_done()
+                    run = stream.current_run
+                    if run is not None:
+                        call.model, call.usage = run.model, run.usage
+                    # El mensaje final llega completo en el evento thread.message.completed
+                    messages = [m for m in stream.get_final_messages() if m.role == "assistant"]
+                return run, messages
+
+            # El cliente es síncrono: el run se consume en un hilo para no bloquear el
+            # bucle de eventos mientras OpenAI responde (o tarda en hacerlo)
+            run, messages = await asyncio.to_thread(run_stream)
+            if not messages:
+                status = run.status if run is not None else "unknown"
+                raise RuntimeError(f"El run terminó sin respuesta del asistente (estado: {status})")
+            last_message = messages[-1]
+
+            span = current_span()
+            if span is not None:
+                span.set_attribute("search.mode", mode)
+                span.set_attribute("openai.thread_id", last_message.thread_id)
 
-            # Recuperar el mensaje final
-            messages = self.client.beta.threads.messages.list(thread_id=thread.id)
-            last_message = messages.data[0]
-            
             # Extraer la respuesta y citas
+            text = last_message.content[0].text
             response = {
-                'response': last_message.content[0].text.value,
-                'thread_id': thread.id,
+                'response': text.value,
+                'thread_id': last_message.thread_id,
                 'citations': []
             }
 
             # Extraer citas si existen
-            annotations = getattr(last_message.content[0], 'annotations', []) or []
-            for annotation in annotations:
+            for annotation in text.annotations or []:
                 if getattr(annotation, 'type', None) == "file_citation":
                     citation = {
                         'text': annotation.text,
-                        'quote': annotation.file_citation.quote,
-                        'file_path': annotation.file_citation.file_path
+                        'quote': getattr(annotation.file_citation, 'quote', None) or annotation.text,
+                        'file_id': getattr(annotation.file_citation, 'file_id', None)
                     }
                     response['citations'].append(citation)
 
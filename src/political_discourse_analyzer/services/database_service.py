@@ -1,12 +1,23 @@
 # src/political_discourse_analyzer/services/database_service.py
 import os
+import json
+import time
 import logging
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, func
+from sqlalchemy import (
+    create_engine, event, Column, Integer, String, DateTime, Date, Float, Text,
+    ForeignKey, UniqueConstraint, func, and_, or_, distinct, case
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
-from typing import List, Dict, Optional
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.pool import QueuePool
+from datetime import datetime, timedelta
+from typing import Iterator, List, Dict, Optional, Tuple
+from political_discourse_analyzer.utils.metrics import DB_POOL_WAIT_SECONDS, gauge_callback
+from political_discourse_analyzer.utils.server_timing import record_timing
+from political_discourse_analyzer.utils.tracing import TRACER, traced
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +44,155 @@ class Interaction(Base):
     citations = Column(Text)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class InteractionTopicScore(Base):
+    """Puntuación de una interacción para un método y una categoría."""
+    __tablename__ = "interaction_topic_scores"
+    __table_args__ = (
+        UniqueConstraint('interaction_id', 'method', 'category', 'scoring_version',
+                         name='uq_interaction_topic_score'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    interaction_id = Column(Integer, ForeignKey("interactions.id"), index=True)
+    method = Column(String)
+    category = Column(String)
+    score = Column(Float)
+    scoring_version = Column(String, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class InteractionScoringFailure(Base):
+    """Intentos fallidos de puntuar una interacción con una versión del modelo."""
+    __tablename__ = "interaction_scoring_failures"
+    __table_args__ = (
+        UniqueConstraint('interaction_id', 'scoring_version', name='uq_interaction_scoring_failure'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    interaction_id = Column(Integer, ForeignKey("interactions.id"), index=True)
+    scoring_version = Column(String)
+    failures = Column(Integer, default=0)
+    last_error = Column(Text)
+    last_failed_at = Column(DateTime)
+    retry_after = Column(DateTime)
+
+class TopicDailyRollup(Base):
+    """Suma diaria de puntuaciones por modo, método y categoría."""
+    __tablename__ = "topic_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint('day', 'mode', 'method', 'category', 'scoring_version',
+                         name='uq_topic_daily_rollup'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    mode = Column(String)
+    method = Column(String)
+    category = Column(String)
+    scoring_version = Column(String)
+    score_sum = Column(Float, default=0.0)
+    interaction_count = Column(Integer, default=0)
+
+class AnalyticsJob(Base):
+    """Trabajo de analítica pendiente de ejecutar por el worker."""
+    __tablename__ = "analytics_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)
+    params = Column(Text)
+    dedupe_key = Column(String, index=True)
+    status = Column(String, index=True, default="queued")
+    progress = Column(Float, default=0.0)
+    progress_message = Column(String)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    result = Column(Text)
+    error = Column(Text)
+    worker_id = Column(String)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+
+class OpenAIUsage(Base):
+    """Una llamada a la API de OpenAI: tokens, latencia, intentos y coste estimado."""
+    __tablename__ = "openai_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    feature = Column(String, index=True)
+    operation = Column(String)
+    model = Column(String)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float)
+    attempts = Column(Integer, default=1)
+    outcome = Column(String)
+    cost_usd = Column(Float)
+
+# Columnas por las que se puede agrupar el resumen de uso de OpenAI
+OPENAI_USAGE_GROUPS = ("day", "feature", "operation", "model")
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra cuánto se espera para obtener una conexión."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+# Longitud máxima de la sentencia SQL guardada en los spans
+MAX_TRACED_STATEMENT = 1000
+
+def _instrument_engine(engine):
+    """
+    Crea un span por sentencia SQL dentro de la traza activa (nunca una traza
+    nueva) y suma su duración al desglose `Server-Timing` de la petición.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+        context._pda_start = time.perf_counter()
+        span = TRACER.start_span("sql", kind="client", root=False)
+        if span.recording:
+            span.name = f"sql {statement.lstrip().split(' ', 1)[0].upper()}"
+            span.set_attribute("db.system", engine.dialect.name)
+            span.set_attribute("db.statement", statement[:MAX_TRACED_STATEMENT])
+            span.set_attribute("db.executemany", executemany)
+        context._pda_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+        record_timing("db", time.perf_counter() - context._pda_start)
+        span = getattr(context, "_pda_span", None)
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _fail_statement_span(exception_context):
+        span = getattr(exception_context.execution_context, "_pda_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
 class DatabaseService:
     def __init__(self):
         """Inicializa la conexión a PostgreSQL."""
         try:
             db_url = self._get_database_url()
-            self.engine = create_engine(db_url, pool_size=5, max_overflow=10)
+            self.engine = create_engine(db_url, poolclass=TimedQueuePool, pool_size=5, max_overflow=10)
+            _instrument_engine(self.engine)
+            pool = self.engine.pool
+            gauge_callback(
+                "pda_db_pool_connections", "Conexiones del pool por estado", ("state",),
+                lambda: [(("checked_out",), pool.checkedout()),
+                         (("idle",), pool.checkedin()),
+                         (("overflow",), max(pool.overflow(), 0))]
+            )
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             Base.metadata.create_all(bind=self.engine)
             logger.info("Database connection established successfully")
@@ -72,6 +226,7 @@ class DatabaseService:
             logger.error(f"Error building database URL: {str(e)}")
             raise
 
+    @traced("DatabaseService.save_conversation")
     async def save_conversation(self, thread_id: str, mode: str) -> Conversation:
         """Guarda una nueva conversación."""
         try:
@@ -95,13 +250,19 @@ class DatabaseService:
             logger.error(f"Unexpected error saving conversation: {str(e)}")
             raise
 
+    @traced("DatabaseService.save_interaction")
     async def save_interaction(self, 
                          thread_id: str, 
                          query: str, 
                          response: str, 
                          mode: str,
-                         citations: List[str] = None):
-        """Guarda una nueva interacción y actualiza la conversación."""
+                         citations: List[str] = None,
+                         new_conversation: bool = False):
+        """
+        Guarda una nueva interacción y actualiza la conversación. Con
+        `new_conversation` la conversación se crea en la misma transacción sin
+        buscarla antes.
+        """
         logger.info(f"Attempting to save interaction for thread_id: {thread_id}")
         logger.info(f"Database URL: {self._get_database_url()}")
         
@@ -122,7 +283,7 @@ class DatabaseService:
                 logger.info("Added interaction to session")
                 
                 # Actualizar conversación existente
-                conversation = db.query(Conversation).filter(
+                conversation = None if new_conversation else db.query(Conversation).filter(
                     Conversation.thread_id == thread_id
                 ).first()
                 
@@ -149,6 +310,592 @@ class DatabaseService:
             logger.error(f"Error saving interaction: {str(e)}", exc_info=True)
             raise
         
+    def _insert(self, table):
+        """Devuelve un INSERT con soporte de ON CONFLICT para el dialecto actual."""
+        if self.engine.dialect.name == "sqlite":
+            return sqlite_insert(table)
+        return pg_insert(table)
+
+    def save_topic_scores(self,
+                          interaction_id: int,
+                          timestamp: datetime,
+                          mode: Optional[str],
+                          scores: Dict[str, Dict[str, float]],
+                          scoring_version: str) -> bool:
+        """
+        Guarda las puntuaciones de una interacción y actualiza los agregados diarios
+        en la misma transacción. Devuelve False si la interacción ya estaba puntuada.
+        """
+        day = timestamp.date()
+        mode = mode or ''
+        with self.SessionLocal() as db:
+            try:
+                db.add_all([
+                    InteractionTopicScore(
+                        interaction_id=interaction_id,
+                        method=method,
+                        category=category,
+                        score=float(score),
+                        scoring_version=scoring_version
+                    )
+                    for method, category_scores in scores.items()
+                    for category, score in category_scores.items()
+                ])
+                # Fallar aquí si otro proceso ya puntuó la interacción, antes de tocar los agregados
+                db.flush()
+
+                for method, category_scores in scores.items():
+                    for category, score in category_scores.items():
+                        stmt = self._insert(TopicDailyRollup).values(
+                            day=day,
+                            mode=mode,
+                            method=method,
+                            category=category,
+                            scoring_version=scoring_version,
+                            score_sum=float(score),
+                            interaction_count=1
+                        )
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=['day', 'mode', 'method', 'category', 'scoring_version'],
+                            set_={
+                                'score_sum': TopicDailyRollup.score_sum + stmt.excluded.score_sum,
+                                'interaction_count': TopicDailyRollup.interaction_count + 1
+                            }
+                        )
+                        db.execute(stmt)
+
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+                logger.info(f"Interaction {interaction_id} already scored, skipping")
+                return False
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error saving topic scores: {str(e)}", exc_info=True)
+                raise
+
+    def _unscored_interactions_query(self, db, query, scoring_version: str,
+                                     start_date: Optional[datetime] = None,
+                                     end_date: Optional[datetime] = None,
+                                     mode: Optional[str] = None):
+        scored = db.query(InteractionTopicScore.id).filter(
+            InteractionTopicScore.interaction_id == Interaction.id,
+            InteractionTopicScore.scoring_version == scoring_version
+        ).exists()
+        return self.filter_interactions(query.filter(~scored), start_date, end_date, mode)
+
+    def get_unscored_interactions(self,
+                                  scoring_version: str,
+                                  start_date: Optional[datetime] = None,
+                                  end_date: Optional[datetime] = None,
+                                  mode: Optional[str] = None,
+                                  limit: Optional[int] = None,
+                                  max_failures: Optional[int] = None) -> List[Tuple]:
+        """
+        Devuelve (id, query, mode, timestamp) de las interacciones sin puntuar.
+
+        Las que ya fallaron sólo se devuelven cuando vence su espera
+        (`record_scoring_failure`) y después de las que nunca se intentaron, y
+        con `max_failures` se descartan las que han fallado esas veces.
+        """
+        with self.SessionLocal() as db:
+            query = self._unscored_interactions_query(
+                db,
+                db.query(Interaction.id, Interaction.query, Interaction.mode, Interaction.timestamp),
+                scoring_version, start_date, end_date, mode
+            ).outerjoin(InteractionScoringFailure, and_(
+                InteractionScoringFailure.interaction_id == Interaction.id,
+                InteractionScoringFailure.scoring_version == scoring_version
+            )).filter(or_(
+                InteractionScoringFailure.id.is_(None),
+                InteractionScoringFailure.retry_after <= datetime.utcnow()
+            ))
+            if max_failures:
+                query = query.filter(or_(
+                    InteractionScoringFailure.id.is_(None),
+                    InteractionScoringFailure.failures < max_failures
+                ))
+            query = query.order_by(func.coalesce(InteractionScoringFailure.failures, 0), Interaction.id)
+            if limit:
+                query = query.limit(limit)
+            return query.all()
+
+    def record_scoring_failure(self, interaction_id: int, scoring_version: str, error: str,
+                               retry_base_seconds: float, retry_max_seconds: float) -> int:
+        """
+        Anota un fallo al puntuar la interacción y aplaza el siguiente intento
+        con espera exponencial. Devuelve el número de fallos acumulados.
+        """
+        now = datetime.utcnow()
+        with self.SessionLocal() as db:
+            stmt = self._insert(InteractionScoringFailure).values(
+                interaction_id=interaction_id,
+                scoring_version=scoring_version,
+                failures=1,
+                last_error=error,
+                last_failed_at=now
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['interaction_id', 'scoring_version'],
+                set_={
+                    'failures': InteractionScoringFailure.failures + 1,
+                    'last_error': stmt.excluded.last_error,
+                    'last_failed_at': stmt.excluded.last_failed_at
+                }
+            ).returning(InteractionScoringFailure.id, InteractionScoringFailure.failures)
+            failure_id, failures = db.execute(stmt).one()
+            delay = min(retry_base_seconds * 2 ** (failures - 1), retry_max_seconds)
+            db.query(InteractionScoringFailure).filter(InteractionScoringFailure.id == failure_id).update({
+                InteractionScoringFailure.retry_after: now + timedelta(seconds=delay)
+            })
+            db.commit()
+            return failures
+
+    def count_unscored_interactions(self,
+                                    scoring_version: str,
+                                    start_date: Optional[datetime] = None,
+                                    end_date: Optional[datetime] = None,
+                                    mode: Optional[str] = None) -> int:
+        """Cuenta las interacciones del rango que aún no tienen puntuaciones."""
+        with self.SessionLocal() as db:
+            return self._unscored_interactions_query(
+                db, db.query(func.count(Interaction.id)),
+                scoring_version, start_date, end_date, mode
+            ).scalar() or 0
+
+    def get_topic_score_totals(self,
+                               scoring_version: str,
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               mode: Optional[str] = None) -> Dict[str, Dict[str, Tuple[float, int]]]:
+        """
+        Suma las puntuaciones por método y categoría en un rango de fechas.
+
+        Los días completos del rango se leen de los agregados diarios y sólo los
+        tramos parciales de los extremos se calculan desde las puntuaciones
+        individuales, de modo que el resultado coincide con agregar interacción
+        a interacción. Devuelve {método: {categoría: (suma, número de interacciones)}}.
+        """
+        first_day = None
+        if start_date:
+            first_day = start_date.date()
+            if start_date != datetime.combine(first_day, datetime.min.time()):
+                first_day += timedelta(days=1)
+        last_day = end_date.date() - timedelta(days=1) if end_date else None
+
+        totals: Dict[str, Dict[str, Tuple[float, int]]] = {}
+
+        def accumulate(rows):
+            for method, category, score_sum, count in rows:
+                previous_sum, previous_count = totals.setdefault(method, {}).get(category, (0.0, 0))
+                totals[method][category] = (previous_sum + float(score_sum or 0), previous_count + int(count or 0))
+
+        with self.SessionLocal() as db:
+            if first_day is None or last_day is None or first_day <= last_day:
+                rollups = db.query(
+                    TopicDailyRollup.method,
+                    TopicDailyRollup.category,
+                    func.sum(TopicDailyRollup.score_sum),
+                    func.sum(TopicDailyRollup.interaction_count)
+                ).filter(TopicDailyRollup.scoring_version == scoring_version)
+                if first_day:
+                    rollups = rollups.filter(TopicDailyRollup.day >= first_day)
+                if last_day:
+                    rollups = rollups.filter(TopicDailyRollup.day <= last_day)
+                if mode is not None:
+                    rollups = rollups.filter(TopicDailyRollup.mode == mode)
+                accumulate(rollups.group_by(TopicDailyRollup.method, TopicDailyRollup.category).all())
+
+                # Tramos parciales fuera de los días completos
+                edges = []
+                if first_day:
+                    edges.append(and_(
+                        Interaction.timestamp >= start_date,
+                        Interaction.timestamp < datetime.combine(first_day, datetime.min.time())
+                    ))
+                if last_day:
+                    edges.append(and_(
+                        Interaction.timestamp >= datetime.combine(last_day + timedelta(days=1), datetime.min.time()),
+                        Interaction.timestamp <= end_date
+                    ))
+            else:
+                # El rango no contiene ningún día completo
+                edges = [and_(Interaction.timestamp >= start_date, Interaction.timestamp <= end_date)]
+
+            if edges:
+                raw = db.query(
+                    InteractionTopicScore.method,
+                    InteractionTopicScore.category,
+                    func.sum(InteractionTopicScore.score),
+                    func.count(InteractionTopicScore.id)
+                ).join(
+                    Interaction, Interaction.id == InteractionTopicScore.interaction_id
+                ).filter(
+                    InteractionTopicScore.scoring_version == scoring_version,
+                    or_(*edges)
+                )
+                if mode is not None:
+                    raw = raw.filter(Interaction.mode == mode)
+                accumulate(raw.group_by(InteractionTopicScore.method, InteractionTopicScore.category).all())
+
+        return totals
+
+    def get_topic_categories(self, scoring_version: str) -> List[str]:
+        """Categorías con puntuaciones guardadas para la versión indicada."""
+        with self.SessionLocal() as db:
+            rows = db.query(distinct(InteractionTopicScore.category)).filter(
+                InteractionTopicScore.scoring_version == scoring_version
+            ).order_by(InteractionTopicScore.category).all()
+            return [category for (category,) in rows]
+
+    def iter_interaction_topic_shares(self,
+                                      scoring_version: str,
+                                      start_date: Optional[datetime] = None,
+                                      end_date: Optional[datetime] = None,
+                                      mode: Optional[str] = None,
+                                      batch_size: int = 10000) -> Iterator[Tuple[int, str, float]]:
+        """
+        Recorre (interaction_id, categoría, cuota) ordenado por interacción. La
+        cuota es la media entre métodos de la puntuación de la categoría dividida
+        por el total de la interacción en ese método, lo que pone en la misma
+        escala los porcentajes del LLM y las similitudes de embeddings y spaCy.
+        """
+        with self.SessionLocal() as db:
+            method_total = func.sum(InteractionTopicScore.score).over(
+                partition_by=(InteractionTopicScore.interaction_id, InteractionTopicScore.method)
+            )
+            shares = self.filter_interactions(
+                db.query(
+                    InteractionTopicScore.interaction_id.label('interaction_id'),
+                    InteractionTopicScore.category.label('category'),
+                    (InteractionTopicScore.score / func.nullif(method_total, 0)).label('share')
+                ).join(
+                    Interaction, Interaction.id == InteractionTopicScore.interaction_id
+                ).filter(InteractionTopicScore.scoring_version == scoring_version),
+                start_date, end_date, mode
+            ).subquery()
+            query = db.query(
+                shares.c.interaction_id,
+                shares.c.category,
+                func.avg(func.coalesce(shares.c.share, 0.0))
+            ).group_by(shares.c.interaction_id, shares.c.category).order_by(shares.c.interaction_id)
+            yield from query.yield_per(batch_size)
+
+    def enqueue_job(self,
+                    kind: str,
+                    params: Dict,
+                    dedupe_key: Optional[str] = None,
+                    max_attempts: int = 3) -> Dict:
+        """
+        Encola un trabajo de analítica. Si ya existe un trabajo no fallido con la
+        misma clave de deduplicación se devuelve ese en lugar de crear otro.
+        """
+        with self.SessionLocal() as db:
+            if dedupe_key:
+                existing = db.query(AnalyticsJob).filter(
+                    AnalyticsJob.dedupe_key == dedupe_key,
+                    AnalyticsJob.status != "failed"
+                ).order_by(AnalyticsJob.id.desc()).first()
+                if existing:
+                    return self._job_to_dict(existing)
+
+            job = AnalyticsJob(
+                kind=kind,
+                params=json.dumps(params),
+                dedupe_key=dedupe_key,
+                status="queued",
+                max_attempts=max_attempts,
+                run_after=datetime.utcnow(),
+                created_at=datetime.utcnow()
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            logger.info(f"Queued analytics job {job.id} ({kind})")
+            return self._job_to_dict(job)
+
+    def claim_job(self, worker_id: str, lease_seconds: int = 300) -> Optional[Dict]:
+        """
+        Reserva el siguiente trabajo disponible con FOR UPDATE SKIP LOCKED.
+
+        También recupera trabajos en ejecución cuyo worker no ha dado señales
+        de vida durante `lease_seconds`, siempre que les queden intentos; los
+        que ya los agotaron se marcan como fallidos.
+        """
+        now = datetime.utcnow()
+        expired = AnalyticsJob.heartbeat_at < now - timedelta(seconds=lease_seconds)
+        with self.SessionLocal() as db:
+            abandoned = db.query(AnalyticsJob).filter(
+                AnalyticsJob.status == "running",
+                expired,
+                AnalyticsJob.attempts >= AnalyticsJob.max_attempts
+            ).update({
+                AnalyticsJob.status: "failed",
+                AnalyticsJob.error: "El worker dejó de responder y no quedan intentos",
+                AnalyticsJob.finished_at: now
+            }, synchronize_session=False)
+            if abandoned:
+                logger.warning(f"Marked {abandoned} abandoned analytics jobs as failed")
+
+            job = db.query(AnalyticsJob).filter(or_(
+                and_(AnalyticsJob.status == "queued", AnalyticsJob.run_after <= now),
+                and_(AnalyticsJob.status == "running", expired,
+                     AnalyticsJob.attempts < AnalyticsJob.max_attempts)
+            )).order_by(AnalyticsJob.id).with_for_update(skip_locked=True).first()
+
+            if not job:
+                db.commit()
+                return None
+
+            job.status = "running"
+            job.attempts += 1
+            job.worker_id = worker_id
+            job.started_at = now
+            job.heartbeat_at = now
+            job.error = None
+            db.commit()
+            db.refresh(job)
+            return self._job_to_dict(job)
+
+    @staticmethod
+    def _owned_job(db, job_id: int, worker_id: str):
+        """Consulta del trabajo sólo si sigue en ejecución a nombre de `worker_id`."""
+        return db.query(AnalyticsJob).filter(
+            AnalyticsJob.id == job_id,
+            AnalyticsJob.status == "running",
+            AnalyticsJob.worker_id == worker_id
+        )
+
+    def update_job_progress(self, job_id: int, worker_id: str, progress: float,
+                            message: Optional[str] = None):
+        """Actualiza el progreso de un trabajo y renueva su reserva."""
+        with self.SessionLocal() as db:
+            self._owned_job(db, job_id, worker_id).update({
+                AnalyticsJob.progress: progress,
+                AnalyticsJob.progress_message: message,
+                AnalyticsJob.heartbeat_at: datetime.utcnow()
+            })
+            db.commit()
+
+    def complete_job(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        """
+        Guarda el resultado de un trabajo terminado. Devuelve False si el
+        trabajo ya no pertenece a `worker_id` (otro worker lo recuperó).
+        """
+        with self.SessionLocal() as db:
+            updated = self._owned_job(db, job_id, worker_id).update({
+                AnalyticsJob.status: "succeeded",
+                AnalyticsJob.progress: 1.0,
+                AnalyticsJob.result: json.dumps(result, default=str),
+                AnalyticsJob.finished_at: datetime.utcnow()
+            })
+            db.commit()
+            return bool(updated)
+
+    def fail_job(self, job_id: int, worker_id: str, error: str,
+                 retry_delay_seconds: float = 0) -> Optional[Dict]:
+        """
+        Registra un fallo y vuelve a encolar el trabajo si quedan intentos.
+        Devuelve None si el trabajo ya no pertenece a `worker_id`.
+        """
+        with self.SessionLocal() as db:
+            job = self._owned_job(db, job_id, worker_id).with_for_update().first()
+            if not job:
+                return None
+            job.error = error
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = datetime.utcnow() + timedelta(seconds=retry_delay_seconds)
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+            return self._job_to_dict(job)
+
+    def requeue_job(self, job_id: int, worker_id: str, error: str,
+                    delay_seconds: float) -> Optional[Dict]:
+        """
+        Devuelve el trabajo a la cola sin gastar el intento (p. ej. si OpenAI
+        está saturado y el fallo no es del trabajo). None si ya no pertenece a
+        `worker_id`.
+        """
+        with self.SessionLocal() as db:
+            job = self._owned_job(db, job_id, worker_id).with_for_update().first()
+            if not job:
+                return None
+            job.error = error
+            job.status = "queued"
+            job.attempts = max(job.attempts - 1, 0)
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay_seconds)
+            db.commit()
+            db.refresh(job)
+            return self._job_to_dict(job)
+
+    def get_job(self, job_id: int, include_result: bool = True) -> Optional[Dict]:
+        """Recupera el estado (y opcionalmente el resultado) de un trabajo."""
+        with self.SessionLocal() as db:
+            job = db.query(AnalyticsJob).filter(AnalyticsJob.id == job_id).first()
+            return self._job_to_dict(job, include_result) if job else None
+
+    @staticmethod
+    def _job_to_dict(job: AnalyticsJob, include_result: bool = False) -> Dict:
+        data = {
+            "id": job.id,
+            "kind": job.kind,
+            "params": json.loads(job.params) if job.params else {},
+            "status": job.status,
+            "progress": job.progress,
+            "progress_message": job.progress_message,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+        if include_result:
+            data["result"] = json.loads(job.result) if job.result else None
+        return data
+
+    def get_topic_daily_rollups(self,
+                                scoring_version: str,
+                                start_date: Optional[datetime] = None,
+                                end_date: Optional[datetime] = None,
+                                mode: Optional[str] = None) -> List[Tuple]:
+        """
+        Devuelve (día, método, categoría, suma, interacciones) de los agregados
+        diarios, sumando los modos salvo que se filtre por uno.
+        """
+        with self.SessionLocal() as db:
+            query = db.query(
+                TopicDailyRollup.day,
+                TopicDailyRollup.method,
+                TopicDailyRollup.category,
+                func.sum(TopicDailyRollup.score_sum),
+                func.sum(TopicDailyRollup.interaction_count)
+            ).filter(TopicDailyRollup.scoring_version == scoring_version)
+            if start_date:
+                query = query.filter(TopicDailyRollup.day >= start_date.date())
+            if end_date:
+                query = query.filter(TopicDailyRollup.day <= end_date.date())
+            if mode is not None:
+                query = query.filter(TopicDailyRollup.mode == mode)
+            return query.group_by(
+                TopicDailyRollup.day, TopicDailyRollup.method, TopicDailyRollup.category
+            ).order_by(TopicDailyRollup.day).all()
+
+    def save_openai_usage(self, rows: List[Dict]):
+        """Inserta un lote de filas del registro de uso de OpenAI."""
+        with self.SessionLocal() as db:
+            db.execute(OpenAIUsage.__table__.insert(), rows)
+            db.commit()
+
+    def get_openai_usage_summary(self,
+                                 start_date: Optional[datetime] = None,
+                                 end_date: Optional[datetime] = None,
+                                 group_by: Tuple[str, ...] = ("day", "feature")) -> List[Dict]:
+        """Llamadas, errores, reintentos, tokens, coste y latencia agrupados por `group_by`."""
+        columns = {
+            "day": func.date(OpenAIUsage.timestamp),
+            "feature": OpenAIUsage.feature,
+            "operation": OpenAIUsage.operation,
+            "model": OpenAIUsage.model
+        }
+        keys = [columns[name].label(name) for name in group_by]
+        aggregates = [
+            func.count(OpenAIUsage.id).label("calls"),
+            func.sum(case((OpenAIUsage.outcome != "ok", 1), else_=0)).label("errors"),
+            func.sum(OpenAIUsage.attempts - 1).label("retries"),
+            func.sum(OpenAIUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(OpenAIUsage.completion_tokens).label("completion_tokens"),
+            func.sum(OpenAIUsage.cost_usd).label("cost_usd"),
+            func.avg(OpenAIUsage.latency_ms).label("latency_ms_avg"),
+            func.max(OpenAIUsage.latency_ms).label("latency_ms_max")
+        ]
+        if self.engine.dialect.name == "postgresql":
+            aggregates.append(
+                func.percentile_cont(0.95).within_group(OpenAIUsage.latency_ms).label("latency_ms_p95")
+            )
+        with self.SessionLocal() as db:
+            query = db.query(*keys, *aggregates)
+            if start_date:
+                query = query.filter(OpenAIUsage.timestamp >= start_date)
+            if end_date:
+                query = query.filter(OpenAIUsage.timestamp < end_date + timedelta(days=1))
+            if keys:
+                query = query.group_by(*keys).order_by(*keys)
+            rows = []
+            for row in query.all():
+                item = dict(row._mapping)
+                if "day" in item and item["day"] is not None:
+                    item["day"] = str(item["day"])
+                for name in ("calls", "errors", "retries", "prompt_tokens", "completion_tokens"):
+                    item[name] = int(item[name] or 0)
+                for name in ("cost_usd", "latency_ms_avg", "latency_ms_max", "latency_ms_p95"):
+                    if name in item:
+                        item[name] = round(float(item[name]), 6 if name == "cost_usd" else 1) \
+                            if item[name] is not None else None
+                rows.append(item)
+            return rows
+
+    def get_data_version(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         include_scores: bool = True) -> str:
+        """
+        Devuelve un token que cambia cuando se añaden interacciones en el rango
+        o, con `include_scores`, cuando se guardan nuevas puntuaciones de temas.
+        """
+        with self.SessionLocal() as db:
+            query = db.query(func.count(Interaction.id), func.max(Interaction.id))
+            count, max_id = self.filter_interactions(query, start_date, end_date).one()
+            version = f"{count}-{max_id or 0}"
+            if include_scores:
+                max_score_id = db.query(func.max(InteractionTopicScore.id)).scalar()
+                version += f"-{max_score_id or 0}"
+            return version
+
+    def get_interaction_statistics(self,
+                                   start_date: Optional[datetime] = None,
+                                   end_date: Optional[datetime] = None,
+                                   mode: Optional[str] = None) -> Dict:
+        """Totales de interacciones e hilos distintos calculados en SQL, sin cargar filas."""
+        with self.SessionLocal() as db:
+            query = db.query(func.count(Interaction.id), func.count(distinct(Interaction.thread_id)))
+            total_interactions, unique_threads = self.filter_interactions(
+                query, start_date, end_date, mode
+            ).one()
+            return {"total_interactions": total_interactions, "unique_threads": unique_threads}
+
+    def iter_queries(self,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     mode: Optional[str] = None,
+                     batch_size: int = 1000) -> Iterator[str]:
+        """
+        Recorre el texto de las consultas en orden de id con un cursor de servidor,
+        leyendo sólo esa columna (sin `response` ni `citations`).
+        """
+        with self.SessionLocal() as db:
+            query = self.filter_interactions(db.query(Interaction.query), start_date, end_date, mode)
+            for (text,) in query.order_by(Interaction.id).yield_per(batch_size):
+                yield text
+
+    @staticmethod
+    def filter_interactions(query, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             mode: Optional[str] = None):
+        """Aplica los filtros habituales de fecha y modo sobre Interaction."""
+        if start_date:
+            query = query.filter(Interaction.timestamp >= start_date)
+        if end_date:
+            query = query.filter(Interaction.timestamp <= end_date)
+        if mode is not None:
+            query = query.filter(Interaction.mode == mode)
+        return query
+
     async def get_conversation_history(self, thread_id: str) -> List[Dict]:
             """
             Recupera el historial de una conversación.
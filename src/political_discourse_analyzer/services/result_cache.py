@@ -0,0 +1,115 @@
+# src/political_discourse_analyzer/services/result_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from political_discourse_analyzer.utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    version: str
+    value: Any
+    etag: str
+    created_at: float
+    # Momento en que se vio por primera vez una versión de datos más nueva
+    stale_since: Optional[float] = None
+
+class ResultCache:
+    """
+    Caché LRU de resultados de analítica indexada por clave y versión de datos.
+
+    Una entrada sólo es fresca mientras la versión de datos no cambia. Cuando
+    cambia, la entrada anterior puede servirse como obsoleta durante
+    `stale_seconds` desde ese momento (no desde que se calculó) mientras se
+    recalcula en segundo plano, y las peticiones
+    concurrentes para la misma versión comparten un único cálculo.
+    """
+
+    def __init__(self, max_entries: int = 128, stale_seconds: float = 300):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Tuple[Hashable, str], asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    @staticmethod
+    def make_etag(value: Any) -> str:
+        """Calcula un ETag a partir del contenido serializado."""
+        payload = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+        return f'"{hashlib.sha1(payload).hexdigest()}"'
+
+    async def get_or_compute(self,
+                             key: Hashable,
+                             version: str,
+                             compute: Callable[[], Awaitable[Any]],
+                             cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[CacheEntry, str]:
+        """
+        Devuelve la entrada para `key` en `version` y el estado de la caché
+        ("hit", "stale" o "miss"), calculándola si es necesario.
+        """
+        entry = self._entries.get(key)
+        if entry and entry.version == version:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            CACHE_LOOKUPS.inc(cache="analytics", result="hit")
+            return entry, "hit"
+
+        task = self._start_refresh(key, version, compute, cacheable)
+
+        now = time.monotonic()
+        if entry and entry.stale_since is None:
+            entry.stale_since = now
+        if entry and now - entry.stale_since <= self.stale_seconds:
+            self._entries.move_to_end(key)
+            self.stats["stale"] += 1
+            CACHE_LOOKUPS.inc(cache="analytics", result="stale")
+            return entry, "stale"
+
+        self.stats["misses"] += 1
+        CACHE_LOOKUPS.inc(cache="analytics", result="miss")
+        return await asyncio.shield(task), "miss"
+
+    def _start_refresh(self, key, version, compute, cacheable) -> asyncio.Task:
+        """Lanza (o reutiliza) el cálculo de una versión concreta."""
+        inflight_key = (key, version)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, version, compute, cacheable))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda t: self._on_refresh_done(inflight_key, t))
+        return task
+
+    def _on_refresh_done(self, inflight_key, task: asyncio.Task):
+        self._inflight.pop(inflight_key, None)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error refreshing cached result {inflight_key[0]}: {task.exception()}")
+
+    async def _refresh(self, key, version, compute, cacheable) -> CacheEntry:
+        value = jsonable_encoder(await compute())
+        entry = CacheEntry(
+            version=version,
+            value=value,
+            etag=self.make_etag(value),
+            created_at=time.monotonic()
+        )
+        if cacheable is None or cacheable(value):
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
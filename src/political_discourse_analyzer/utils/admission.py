@@ -0,0 +1,205 @@
+# src/political_discourse_analyzer/utils/admission.py
+"""
+Control de admisión por prioridad entre el tráfico interactivo y el de analítica.
+
+Las peticiones se clasifican por ruta (`ROUTE_CLASSES`): `/search` es
+interactiva, `/analytics/*` es de analítica y `/export/*` de exportación; el
+resto (salud, métricas, diagnóstico y el alta y consulta de trabajos en
+`/analytics/jobs`, que son baratas) no pasa por el control. Hay `capacity`
+huecos para peticiones en curso, de los que la analítica sólo puede ocupar
+`analytics_max_concurrent` y las exportaciones, que retienen el suyo hasta
+enviar todo el cuerpo, `export_max_concurrent`: el resto queda reservado a las
+consultas interactivas, que además tienen preferencia al liberarse un hueco.
+
+Cada clase espera en su propia cola acotada. Una petición que encuentra la
+cola llena se rechaza al momento y una que agota el tiempo de espera, al
+vencer; en ambos casos con 503 y Retry-After. El tiempo en cola se mide por
+clase y aparece como `queue` en Server-Timing.
+"""
+import json
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from political_discourse_analyzer.utils.metrics import counter, gauge_callback, histogram
+from political_discourse_analyzer.utils.server_timing import record_timing
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE, ANALYTICS, EXPORT = "interactive", "analytics", "export"
+
+# Prefijo de ruta -> clase, gana el primero que coincide; las rutas sin clase
+# no pasan por el control de admisión
+ROUTE_CLASSES = (
+    ("/search", INTERACTIVE),
+    ("/analytics/jobs", None),
+    ("/analytics/", ANALYTICS),
+    ("/export/", EXPORT),
+)
+
+ADMISSION_QUEUE_SECONDS = histogram(
+    "pda_admission_queue_seconds", "Tiempo de espera en la cola de admisión por clase", ("class",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+ADMISSION_REJECTED = counter(
+    "pda_admission_rejected_total", "Peticiones rechazadas por el control de admisión",
+    ("class", "reason")
+)
+
+class AdmissionRejected(Exception):
+    def __init__(self, priority_class: str, reason: str, retry_after: float):
+        super().__init__(f"Servicio saturado ({priority_class}): {reason}")
+        self.priority_class = priority_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+@dataclass
+class ClassLimits:
+    max_concurrent: int
+    max_queue: int
+    queue_timeout: float
+
+class AdmissionController:
+    """
+    Huecos compartidos con límite por clase y colas acotadas. Las clases se
+    atienden en el orden de `classes` (la primera es la de más prioridad).
+    Pensado para un único bucle de eventos, así que no usa locks.
+    """
+
+    def __init__(self, capacity: int, classes: Dict[str, ClassLimits]):
+        self.capacity = capacity
+        self.classes = classes
+        self.inflight = 0
+        self.class_inflight = {name: 0 for name in classes}
+        self.queues: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in classes}
+
+    def _can_run(self, priority_class: str) -> bool:
+        return (self.inflight < self.capacity
+                and self.class_inflight[priority_class] < self.classes[priority_class].max_concurrent)
+
+    def _admit(self, priority_class: str):
+        self.inflight += 1
+        self.class_inflight[priority_class] += 1
+
+    def _dispatch(self):
+        """Da los huecos libres a las peticiones en cola, por orden de prioridad."""
+        for priority_class, queue in self.queues.items():
+            while queue and self._can_run(priority_class):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._admit(priority_class)
+                    waiter.set_result(None)
+
+    async def acquire(self, priority_class: str) -> float:
+        """Espera un hueco y devuelve los segundos en cola, o lanza `AdmissionRejected`."""
+        limits = self.classes[priority_class]
+        queue = self.queues[priority_class]
+        # Sin nadie delante en la propia cola, se entra directamente si hay hueco
+        if not queue and self._can_run(priority_class):
+            self._admit(priority_class)
+            return 0.0
+        if len(queue) >= limits.max_queue:
+            raise AdmissionRejected(priority_class, "queue_full", retry_after=max(limits.queue_timeout, 1.0))
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, limits.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(priority_class, "timeout", retry_after=max(limits.queue_timeout, 1.0))
+        except BaseException:
+            # Cliente desconectado: si el hueco ya se había concedido, se devuelve
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority_class)
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+        return time.perf_counter() - start
+
+    def release(self, priority_class: str):
+        self.inflight -= 1
+        self.class_inflight[priority_class] -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"inflight": self.class_inflight[name], "queued": len(self.queues[name])}
+            for name in self.classes
+        }
+
+def classify(path: str) -> Optional[str]:
+    for prefix, priority_class in ROUTE_CLASSES:
+        if path == prefix.rstrip("/") or path.startswith(prefix):
+            return priority_class
+    return None
+
+class AdmissionMiddleware:
+    """Middleware ASGI que aplica el control de admisión a las rutas clasificadas."""
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.controller = AdmissionController(settings.capacity, {
+            INTERACTIVE: ClassLimits(
+                max_concurrent=settings.capacity,
+                max_queue=settings.interactive_max_queue,
+                queue_timeout=settings.interactive_queue_timeout
+            ),
+            ANALYTICS: ClassLimits(
+                max_concurrent=settings.analytics_max_concurrent,
+                max_queue=settings.analytics_max_queue,
+                queue_timeout=settings.analytics_queue_timeout
+            ),
+            EXPORT: ClassLimits(
+                max_concurrent=settings.export_max_concurrent,
+                max_queue=settings.export_max_queue,
+                queue_timeout=settings.export_queue_timeout
+            ),
+        })
+        gauge_callback(
+            "pda_admission_requests", "Peticiones en curso y en cola por clase", ("class", "state"),
+            lambda: [((name, state), value)
+                     for name, counts in self.controller.stats().items()
+                     for state, value in counts.items()]
+        )
+
+    async def __call__(self, scope, receive, send):
+        priority_class = classify(scope["path"]) if scope["type"] == "http" else None
+        if priority_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await self.controller.acquire(priority_class)
+        except AdmissionRejected as e:
+            ADMISSION_REJECTED.inc(**{"class": priority_class, "reason": e.reason})
+            logger.warning(f"Request to {scope['path']} rejected: {str(e)}")
+            await self._reject(send, e)
+            return
+
+        ADMISSION_QUEUE_SECONDS.observe(waited, **{"class": priority_class})
+        if waited:
+            record_timing("queue", waited)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority_class)
+
+    @staticmethod
+    async def _reject(send, error: AdmissionRejected):
+        body = json.dumps({"detail": str(error)}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(error.retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
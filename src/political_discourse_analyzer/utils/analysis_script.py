@@ -4,10 +4,8 @@ import os
 import asyncio
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Tuple
+from typing import Callable, Iterator, Optional, Dict, List, Tuple
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
@@ -16,15 +14,20 @@ from scipy import stats
 import networkx as nx
 from wordcloud import WordCloud
 import re
+import argparse
 import jinja2
 import markdown
 
 # Importar los modelos y servicios
-from political_discourse_analyzer.services.database_service import DatabaseService, Interaction, Conversation
+from political_discourse_analyzer.services.database_service import DatabaseService
 from political_discourse_analyzer.services.analytics_service import AnalyticsService
 
 # Importar el generador de reportes
 from political_discourse_analyzer.utils.report_generator import ReportGenerator
+from political_discourse_analyzer.utils.snapshot import SnapshotStore
+from political_discourse_analyzer.utils.figures import DEFAULT_DPI, FIGURE_FORMATS, FigureJob, FigureRenderer
+from political_discourse_analyzer.utils.report_build import ReportBuild
+from political_discourse_analyzer.utils.topic_relationships import compute_topic_relationships, iter_score_chunks
 
 
 # Configurar logging
@@ -34,7 +37,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_environment():
+def load_environment(require_database: bool = True):
     """Carga las variables de entorno necesarias."""
     # Buscar el archivo .env en la jerarquía de directorios
     current_dir = Path(__file__).resolve().parent
@@ -46,6 +49,10 @@ def load_environment():
             break
         current_dir = current_dir.parent
 
+    if not require_database:
+        # Con un snapshot no se accede a la base de datos ni a OpenAI
+        return
+
     # Configurar el entorno como producción
     os.environ['ENVIRONMENT'] = 'production'
     
@@ -67,16 +74,36 @@ def load_environment():
             f"Faltan las siguientes variables de entorno: {', '.join(missing_vars)}"
         )
 
-# Configuración de estilo para visualizaciones académicas
-plt.style.use('seaborn-v0_8-paper')
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 12
+class QueryStream:
+    """Iterable reutilizable que abre un recorrido nuevo de las consultas en cada iteración."""
+
+    def __init__(self, iter_queries: Callable[[], Iterator[str]]):
+        self._iter_queries = iter_queries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._iter_queries())
 
 class CitizenInterestAnalyzer:
-    def __init__(self):
+    def __init__(self,
+                 snapshot_dir: Optional[str] = None,
+                 figure_format: str = 'png',
+                 figure_dpi: int = DEFAULT_DPI,
+                 preview: bool = False):
+        """
+        Con `snapshot_dir` el análisis se ejecuta sobre un snapshot Parquet
+        (ver utils/snapshot.py) en lugar de la base de datos de producción.
+        `preview` genera las figuras a baja resolución para uso interactivo.
+        """
+        self.figure_options = {'fmt': figure_format, 'dpi': figure_dpi, 'preview': preview}
         try:
-            self.db_service = DatabaseService()
-            self.analytics_service = AnalyticsService(self.db_service)
+            self.snapshot_store = None
+            if snapshot_dir:
+                self.db_service = None
+                self.snapshot_store = SnapshotStore(snapshot_dir)
+                self.analytics_service = self.snapshot_store
+            else:
+                self.db_service = DatabaseService()
+                self.analytics_service = AnalyticsService(self.db_service)
             self._setup_analysis_parameters() 
             logger.info("Servicios inicializados correctamente")
         except Exception as e:
@@ -84,26 +111,30 @@ class CitizenInterestAnalyzer:
             raise
     
     def get_basic_statistics(self) -> Dict:
-        """Obtiene estadísticas básicas de las interacciones."""
+        """
+        Obtiene estadísticas básicas de las interacciones con agregados SQL.
+
+        `queries` es un iterable perezoso: cada recorrido lee las consultas por
+        lotes desde la base de datos (o el snapshot) sin cargarlas en memoria.
+        """
+        if self.snapshot_store:
+            stats = self.snapshot_store.get_basic_statistics()
+            stats["queries"] = QueryStream(self.snapshot_store.iter_queries)
+            return stats
         try:
-            with self.db_service.SessionLocal() as db:
-                stats = self.db_service.get_analytics()
-                total_convs = stats["total_conversations"]
-                total_ints = stats["total_interactions"]
-                
-                # Obtener queries de las interacciones
-                interactions = db.query(Interaction).all()
-                queries = [interaction.query for interaction in interactions]
-                
-                return {
-                    "total_conversations": total_convs,
-                    "total_interactions": total_ints,
-                    "modes_distribution": stats["modes_distribution"],
-                    "average_interactions": total_ints / total_convs if total_convs > 0 else 0,
-                    "interactions": interactions,  # Necesario para análisis posteriores
-                    "unique_users": len(set(interaction.thread_id for interaction in interactions)),
-                    "queries": queries  # Para análisis de texto
-                }
+            stats = self.db_service.get_analytics()
+            interaction_stats = self.db_service.get_interaction_statistics()
+            total_convs = stats["total_conversations"]
+            total_ints = interaction_stats["total_interactions"]
+
+            return {
+                "total_conversations": total_convs,
+                "total_interactions": total_ints,
+                "modes_distribution": stats["modes_distribution"],
+                "average_interactions": total_ints / total_convs if total_convs > 0 else 0,
+                "unique_users": interaction_stats["unique_threads"],
+                "queries": QueryStream(self.db_service.iter_queries)  # Para análisis de texto
+            }
         except Exception as e:
             logger.error(f"Error obteniendo estadísticas básicas: {str(e)}")
             raise
@@ -135,68 +166,42 @@ class CitizenInterestAnalyzer:
         
         return {'results': normalized}
 
-    def analyze_topic_relationships(self, topic_analysis: Dict) -> Dict:
-        """Analiza las relaciones entre temas y sus interconexiones."""
+    async def analyze_topic_trends(self, start_date: Optional[datetime] = None,
+                                   end_date: Optional[datetime] = None) -> Dict:
+        """Analiza la evolución temporal de los temas en series diaria y semanal."""
         try:
-            # Crear DataFrame con la estructura correcta
-            combined_analysis = topic_analysis['results']['combined_analysis']
-            if not combined_analysis:
-                return {
-                    'correlation_matrix': {},
-                    'centrality_measures': {'degree': {}, 'betweenness': {}, 'eigenvector': {}},
-                    'graph': nx.Graph()
-                }
-                
-            topics_df = pd.DataFrame({
-                'value': combined_analysis.values()
-            }, index=combined_analysis.keys())
-            
-            # Verifica que hay datos válidos
-            if topics_df['value'].isna().any() or len(topics_df) < 2:
-                return {
-                    'correlation_matrix': {},
-                    'centrality_measures': {'degree': {}, 'betweenness': {}, 'eigenvector': {}},
-                    'graph': nx.Graph()
-                }
-            
-            # Verifica que hay suficientes datos
-            if len(topics_df) <= 1:
-                return {
-                    'correlation_matrix': {},
-                    'centrality_measures': {
-                        'degree': {},
-                        'betweenness': {},
-                        'eigenvector': {}
-                    },
-                    'graph': nx.Graph()
-                }
-            
-            # Calcular matriz de correlación
-            correlation_matrix = pd.DataFrame(
-                index=topics_df.index,
-                columns=topics_df.index,
-                data=np.eye(len(topics_df))  # Inicializar con matriz identidad
+            return {
+                'daily': await self.analytics_service.get_topic_trends(
+                    start_date, end_date, freq='D', window=7
+                ),
+                'weekly': await self.analytics_service.get_topic_trends(
+                    start_date, end_date, freq='W', window=4
+                )
+            }
+        except Exception as e:
+            logger.error(f"Error en análisis de tendencias: {str(e)}")
+            raise
+
+    def analyze_topic_relationships(self,
+                                    start_date: Optional[datetime] = None,
+                                    end_date: Optional[datetime] = None,
+                                    measure: str = 'correlation') -> Dict:
+        """
+        Analiza las relaciones entre temas y sus interconexiones a partir de la
+        matriz de puntuaciones por interacción (correlación o PMI normalizada).
+        """
+        try:
+            categories = self.analytics_service.get_topic_categories()
+            relationships = compute_topic_relationships(
+                iter_score_chunks(
+                    self.analytics_service.iter_interaction_topic_shares(start_date, end_date),
+                    categories
+                ),
+                categories,
+                measure=measure,
+                threshold=self.correlation_threshold
             )
-            
-            # Calcular correlaciones
-            for i in topics_df.index:
-                for j in topics_df.index:
-                    if i < j:  # Solo necesitamos calcular la mitad superior
-                        corr = np.corrcoef(
-                            [topics_df.loc[i, 'value']],
-                            [topics_df.loc[j, 'value']]
-                        )[0, 1]
-                        correlation_matrix.loc[i, j] = corr
-                        correlation_matrix.loc[j, i] = corr
-            
-            # Crear grafo de relaciones
-            G = nx.Graph()
-            for i in correlation_matrix.index:
-                for j in correlation_matrix.columns:
-                    if i < j:
-                        correlation = abs(correlation_matrix.loc[i, j])
-                        if correlation > self.correlation_threshold:
-                            G.add_edge(i, j, weight=correlation)
+            G = relationships['graph']
             
             # Calcular métricas de centralidad
             if len(G.nodes()) > 0:
@@ -213,7 +218,10 @@ class CitizenInterestAnalyzer:
                 }
             
             return {
-                'correlation_matrix': correlation_matrix.to_dict(),
+                'measure': relationships['measure'],
+                'n_interactions': relationships['n_interactions'],
+                'correlation_matrix': relationships['matrix'].to_dict(),
+                'adjacency': relationships['adjacency'],
                 'centrality_measures': centrality,
                 'graph': G
             }
@@ -268,71 +276,41 @@ class CitizenInterestAnalyzer:
         margin = z_value * std_err
         return (max(0, score - margin), min(1, score + margin))
 
-    def generate_analysis_visualizations(self, topic_analysis: Dict, topic_relationships: Dict, output_dir: str):
-        """Genera visualizaciones con escalas normalizadas."""
+    def generate_analysis_visualizations(self, topic_analysis: Dict, topic_relationships: Dict, output_dir: str,
+                                         topic_trends: Optional[Dict] = None) -> Dict[str, str]:
+        """
+        Genera visualizaciones con escalas normalizadas. Las figuras se dibujan en
+        paralelo y sólo si cambian sus datos (ver utils/figures.py). Devuelve
+        {nombre: ruta} de las figuras generadas.
+        """
         # Normalizar los datos
         normalized_analysis = self._normalize_scores(topic_analysis)
         
         try:
-            # Crear DataFrame con todos los métodos
-            methods_data = {
-                'Embeddings': normalized_analysis['results']['embedding_analysis'],
-                'LLM': normalized_analysis['results']['llm_analysis'],
-                'Lingüístico': normalized_analysis['results']['linguistic_analysis'],
-                'Combinado': normalized_analysis['results']['combined_analysis']
-            }
-            
-            methods_df = pd.DataFrame(methods_data)
-            
-            # 1. Matriz de correlación entre métodos
-            plt.figure(figsize=(10, 8))
-            sns.heatmap(methods_df.corr(), 
-                    annot=True, 
-                    cmap='RdYlBu_r',
-                    center=0,
-                    vmin=-1,
-                    vmax=1,
-                    square=True)
-            plt.title('Correlación entre Métodos de Análisis')
-            plt.tight_layout()
-            plt.savefig(f"{output_dir}/method_comparison.png", dpi=300)
-            plt.close()
-
-            # 2. Distribución de temas por método
-            fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-            methods = {
-                (0,0): ('embedding_analysis', 'Análisis por Embeddings'),
-                (0,1): ('llm_analysis', 'Análisis por LLM'),
-                (1,0): ('linguistic_analysis', 'Análisis Lingüístico'),
-                (1,1): ('combined_analysis', 'Análisis Combinado')
-            }
-            
-            for pos, (method, title) in methods.items():
-                data = pd.DataFrame.from_dict(
-                    normalized_analysis['results'][method], 
-                    orient='index',
-                    columns=['score']
-                ).reset_index()
-                data.columns = ['category', 'score']
-                
-                # Establecer límites consistentes para todos los gráficos
-                sns.barplot(
-                    data=data,
-                    x='score',
-                    y='category',
-                    ax=axes[pos[0]][pos[1]],
-                    palette='viridis'
-                )
-                axes[pos[0]][pos[1]].set_title(title)
-                axes[pos[0]][pos[1]].set_xlabel('Puntuación Normalizada')
-                # Establecer límites fijos para el eje x
-                axes[pos[0]][pos[1]].set_xlim(0, 1)
-            
-            plt.tight_layout()
-            plt.savefig(f"{output_dir}/topic_distribution_by_method.png", dpi=300)
-            plt.close()
+            G = topic_relationships['graph']
+            jobs = [
+                FigureJob('method_comparison', 'method_comparison', {'methods': {
+                    'Embeddings': normalized_analysis['results']['embedding_analysis'],
+                    'LLM': normalized_analysis['results']['llm_analysis'],
+                    'Lingüístico': normalized_analysis['results']['linguistic_analysis'],
+                    'Combinado': normalized_analysis['results']['combined_analysis']
+                }}),
+                FigureJob('topic_distribution_by_method', 'topic_distribution', normalized_analysis),
+                FigureJob('topic_network', 'topic_network', {
+                    'nodes': sorted(G.nodes()),
+                    'edges': sorted([u, v, w] for u, v, w in G.edges(data='weight')),
+                    'centrality': topic_relationships['centrality_measures']['eigenvector']
+                })
+            ]
+            daily_trends = (topic_trends or {}).get('daily', {})
+            if daily_trends.get('status') == 'success':
+                jobs.append(FigureJob('topic_trends', 'topic_trends', daily_trends))
+
+            renderer = FigureRenderer(output_dir, **self.figure_options)
+            paths = renderer.render(jobs)
             
             logger.info("Visualizaciones generadas correctamente con escalas normalizadas")
+            return paths
             
         except Exception as e:
             logger.error(f"Error generando visualizaciones: {str(e)}")
@@ -474,7 +452,7 @@ class CitizenInterestAnalyzer:
             - **Áreas de mejora:**
             1. Fortalecer la integración entre análisis lingüístico y métodos basados en IA
             2. Desarrollar métricas más robustas para evaluar la calidad de las respuestas
-            3. Implementar seguimiento temporal de tendencias temáticas
+            3. Ampliar el seguimiento temporal de tendencias temáticas con series más largas
             """
             return implications
             
@@ -487,7 +465,8 @@ class CitizenInterestAnalyzer:
                             topic_analysis: Dict,
                             topic_relationships: Dict,
                             citizen_metrics: Dict,
-                            output_dir: str):
+                            output_dir: str,
+                            topic_trends: Optional[Dict] = None):
         """Genera un reporte académico en formato markdown."""
         try:
             # Analizar clusters temáticos
@@ -539,6 +518,9 @@ class CitizenInterestAnalyzer:
             Se han identificado {clusters['total_clusters']} grupos temáticos principales, con una clara estructura de interrelaciones.
             Los temas puente más importantes son: {', '.join(clusters['bridge_topics'].keys())}.
 
+            ### 2.4 Evolución Temporal de los Temas
+            {self._format_topic_trends(topic_trends)}
+
             ## 3. Discusión
 
             ### 3.1 Hallazgos Principales
@@ -591,6 +573,29 @@ class CitizenInterestAnalyzer:
             for topic, data in topics.items()
         ])
 
+    def _format_topic_trends(self, topic_trends: Optional[Dict]) -> str:
+        """Resume la cuota reciente, el crecimiento semanal y los puntos de cambio de cada tema."""
+        daily = (topic_trends or {}).get('daily', {})
+        if daily.get('status') != 'success':
+            return "No hay datos suficientes para analizar la evolución temporal."
+
+        weekly = topic_trends.get('weekly', {}).get('categories', {})
+        lines = []
+        for category, series in daily['categories'].items():
+            latest_share = next((v for v in reversed(series['rolling_share']) if v is not None), None)
+            weekly_growth = next(
+                (v for v in reversed(weekly.get(category, {}).get('growth_rate', [])) if v is not None),
+                None
+            )
+            line = f"- **{category}**: cuota reciente {latest_share:.3f}" if latest_share is not None \
+                else f"- **{category}**: sin datos recientes"
+            if weekly_growth is not None:
+                line += f", crecimiento semanal {weekly_growth:+.1%}"
+            if series['change_points']:
+                line += f", cambios bruscos en {', '.join(cp['period'] for cp in series['change_points'])}"
+            lines.append(line)
+        return "\n".join(lines)
+
     def _evaluate_method_agreement(self, mean_correlation: float) -> str:
         """Evalúa el nivel de acuerdo entre métodos."""
         if mean_correlation > 0.8:
@@ -612,84 +617,152 @@ class CitizenInterestAnalyzer:
 
     async def generate_complete_report(self, start_date: Optional[datetime] = None,
                                     end_date: Optional[datetime] = None,
-                                    output_dir: str = "analysis_results"):
+                                    output_dir: str = "analysis_results",
+                                    force: bool = False) -> Dict[str, str]:
+        """
+        Genera el informe completo de forma incremental: cada etapa se repite sólo
+        si cambian la versión de los datos, sus parámetros o el resultado de las
+        etapas de las que depende (ver utils/report_build.py). Devuelve el
+        estado de cada etapa.
+        """
         try:
             # Asegúrate de que el directorio existe
             os.makedirs(output_dir, exist_ok=True)
-            
+
+            # Las puntuaciones pendientes forman parte de la versión de los datos
+            if not self.snapshot_store:
+                await self.analytics_service.score_pending_interactions(start_date, end_date)
+
+            source = {
+                'data_version': self.analytics_service.get_data_version(start_date, end_date),
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None
+            }
+            descriptions = {
+                'method_comparison': 'Comparación de Métodos de Análisis',
+                'topic_distribution_by_method': 'Distribución de Temas por Método',
+                'topic_network': 'Red de Relaciones entre Temas',
+                'topic_trends': 'Evolución Temporal de los Temas'
+            }
+
+            def images(figure_paths: Dict[str, str]) -> List[Dict]:
+                return [
+                    {'path': path, 'description': descriptions[name]}
+                    for name, path in figure_paths.items()
+                ]
+
+            def basic_statistics() -> Dict:
+                stats = self.get_basic_statistics()
+                stats.pop('queries')
+                return stats
+
+            report_generator = ReportGenerator(output_dir)
+            build = ReportBuild(os.path.join(output_dir, '.build'), force=force)
+
             # Realizar análisis
-            basic_stats = self.get_basic_statistics()
-            topic_analysis = await self.analytics_service.get_topic_distribution(start_date, end_date)
-            topic_relationships = self.analyze_topic_relationships(topic_analysis)
-            citizen_metrics = self.calculate_citizen_interest_metrics(topic_analysis)
-            
+            build.stage('basic_stats', basic_statistics,
+                        inputs={'data_version': self.analytics_service.get_data_version()})
+            build.stage('topic_analysis',
+                        lambda: self.analytics_service.get_topic_distribution(start_date, end_date),
+                        inputs=source)
+            build.stage('topic_relationships',
+                        lambda: self.analyze_topic_relationships(start_date, end_date),
+                        inputs={**source, 'threshold': self.correlation_threshold})
+            build.stage('citizen_metrics', self.calculate_citizen_interest_metrics,
+                        deps=['topic_analysis'])
+            build.stage('topic_trends',
+                        lambda: self.analyze_topic_trends(start_date, end_date),
+                        inputs=source)
+
             # Generar visualizaciones
-            self.generate_analysis_visualizations(
-                topic_analysis,
-                topic_relationships,
-                output_dir
-            )
-            
-            # Prepara la información de imágenes
-            images = [
-                {
-                    'path': os.path.join(output_dir, 'method_comparison.png'),
-                    'description': 'Comparación de Métodos de Análisis'
-                },
-                {
-                    'path': os.path.join(output_dir, 'topic_distribution_by_method.png'),
-                    'description': 'Distribución de Temas por Método'
-                },
-                {
-                    'path': os.path.join(output_dir, 'topic_network.png'),
-                    'description': 'Red de Relaciones entre Temas'
-                }
-            ]
-            
-            # Generar contenido markdown y asegurarte de que no es None
-            markdown_content = self.generate_research_report(
-                basic_stats,
-                topic_analysis,
-                topic_relationships,
-                citizen_metrics,
-                output_dir
-            )
-            
-            if markdown_content is None:
-                raise ValueError("El contenido markdown no puede ser None")
-            
+            build.stage('figures',
+                        lambda topic_analysis, topic_relationships, topic_trends:
+                            self.generate_analysis_visualizations(
+                                topic_analysis, topic_relationships, output_dir, topic_trends
+                            ),
+                        deps=['topic_analysis', 'topic_relationships', 'topic_trends'],
+                        inputs={'output_dir': output_dir, **self.figure_options},
+                        outputs=lambda figure_paths: list(figure_paths.values()))
+
+            # Generar contenido markdown
+            build.stage('markdown',
+                        lambda basic_stats, topic_analysis, topic_relationships, citizen_metrics, topic_trends:
+                            self.generate_research_report(
+                                basic_stats, topic_analysis, topic_relationships,
+                                citizen_metrics, output_dir, topic_trends
+                            ),
+                        deps=['basic_stats', 'topic_analysis', 'topic_relationships',
+                              'citizen_metrics', 'topic_trends'],
+                        inputs={'output_dir': output_dir},
+                        outputs=lambda _: [os.path.join(output_dir, 'research_report.md')])
+
             # Generar reportes en diferentes formatos
-            report_generator = ReportGenerator(output_dir)
-            report_generator.generate_html_report(markdown_content, images)
-            report_generator.generate_latex_report(markdown_content, images)
-            
+            build.stage('html',
+                        lambda markdown_content, figure_paths:
+                            report_generator.generate_html_report(markdown_content, images(figure_paths)),
+                        deps=['markdown', 'figures'],
+                        outputs=lambda path: [path])
+            build.stage('latex',
+                        lambda markdown_content, figure_paths:
+                            report_generator.generate_latex_report(markdown_content, images(figure_paths)),
+                        deps=['markdown', 'figures'],
+                        outputs=lambda path: [path])
+
             # Crear paquete de reporte
-            report_generator.create_report_package()
-            
+            build.stage('package',
+                        lambda *_: report_generator.create_report_package(),
+                        deps=['html', 'latex', 'figures'],
+                        outputs=lambda path: [path])
+
+            status = await build.run()
             logger.info("Reportes generados exitosamente")
+            return status
             
         except Exception as e:
             logger.error(f"Error generando reportes: {str(e)}")
             raise
 
 async def main():
+    parser = argparse.ArgumentParser(description="Análisis de intereses ciudadanos")
+    parser.add_argument("--snapshot", help="Directorio de un snapshot Parquet en lugar de la base de datos")
+    parser.add_argument("--figure-format", choices=FIGURE_FORMATS,
+                        default=os.getenv("REPORT_FIGURE_FORMAT", "png"))
+    parser.add_argument("--figure-dpi", type=int,
+                        default=int(os.getenv("REPORT_FIGURE_DPI", str(DEFAULT_DPI))))
+    parser.add_argument("--preview", action="store_true",
+                        help="Figuras a baja resolución para revisión rápida")
+    parser.add_argument("--start-date", type=datetime.fromisoformat)
+    parser.add_argument("--end-date", type=datetime.fromisoformat)
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerar todas las etapas aunque sus entradas no hayan cambiado")
+    args = parser.parse_args()
+
     try:
         # Cargar variables de entorno
-        load_environment()
+        load_environment(require_database=not args.snapshot)
         
         # Crear analizador
-        analyzer = CitizenInterestAnalyzer()
+        analyzer = CitizenInterestAnalyzer(
+            snapshot_dir=args.snapshot,
+            figure_format=args.figure_format,
+            figure_dpi=args.figure_dpi,
+            preview=args.preview
+        )
         
-        # Definir período de análisis
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+        # Definir período de análisis: por defecto los últimos 30 días completos
+        # hasta hoy incluido, de modo que las ejecuciones del mismo día coinciden
+        end_date = args.end_date or (
+            datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        )
+        start_date = args.start_date or end_date - timedelta(days=30)
         
         # Generar reporte completo
         logger.info(f"Iniciando análisis desde {start_date} hasta {end_date}")
         await analyzer.generate_complete_report(
             start_date=start_date,
             end_date=end_date,
-            output_dir="analysis_results"
+            output_dir="analysis_results",
+            force=args.force
         )
         logger.info("Análisis completado. Los resultados están disponibles en el directorio 'analysis_results'")
         
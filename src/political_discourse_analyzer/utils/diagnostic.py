@@ -1,9 +1,9 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
-import openai
 from political_discourse_analyzer.models.settings import ApplicationSettings
 from political_discourse_analyzer.services.assistant_service import AssistantService
+from political_discourse_analyzer.utils.openai_client import get_openai_clients
 from src.political_discourse_analyzer.services.database_service import DatabaseService
 
 class SystemDiagnostic:
@@ -11,7 +11,7 @@ class SystemDiagnostic:
         load_dotenv()
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.settings = ApplicationSettings.from_env(openai_api_key=self.openai_key)
-        self.client = openai.Client(api_key=self.openai_key)
+        self.client = get_openai_clients(self.settings.ai_settings).client
         
     def run_diagnostics(self):
         """
@@ -0,0 +1,182 @@
+# src/political_discourse_analyzer/utils/export_interactions.py
+import io
+import os
+import csv
+import sys
+import gzip
+import json
+import argparse
+import logging
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+
+from political_discourse_analyzer.services.database_service import DatabaseService, Interaction
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ['id', 'thread_id', 'query', 'response', 'mode', 'citations', 'timestamp']
+EXPORT_FORMATS = ('csv', 'ndjson')
+MEDIA_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+def iter_interactions(db_service: DatabaseService,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      mode: Optional[str] = None,
+                      after_id: Optional[int] = None,
+                      batch_size: int = 1000) -> Iterator[Tuple]:
+    """
+    Recorre las interacciones en orden de id con un cursor de servidor, sin
+    cargar la tabla en memoria. `after_id` permite continuar una exportación.
+    """
+    with db_service.SessionLocal() as db:
+        query = db.query(*[getattr(Interaction, column) for column in EXPORT_COLUMNS])
+        query = db_service.filter_interactions(query, start_date, end_date, mode)
+        if after_id:
+            query = query.filter(Interaction.id > after_id)
+        yield from query.order_by(Interaction.id).yield_per(batch_size)
+
+def _format_row(row, fmt: str, writer=None) -> None:
+    values = dict(zip(EXPORT_COLUMNS, row))
+    values['timestamp'] = values['timestamp'].isoformat() if values['timestamp'] else None
+    if fmt == 'csv':
+        writer.writerow([values[column] for column in EXPORT_COLUMNS])
+    else:
+        writer.write(json.dumps(values, ensure_ascii=False) + "\n")
+
+def iter_export_chunks(rows: Iterable[Tuple],
+                       fmt: str = 'csv',
+                       compress: bool = False,
+                       header: bool = True,
+                       chunk_size: int = 1024 * 1024) -> Iterator[Tuple[bytes, Optional[int]]]:
+    """
+    Codifica las filas en bloques de aproximadamente `chunk_size` bytes.
+
+    Cada bloque termina en un límite de registro y se devuelve junto al último id
+    que contiene. Con `compress` cada bloque es un miembro gzip completo, de modo
+    que la salida puede truncarse en cualquier bloque y continuarse después.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else buffer
+    if fmt == 'csv' and header:
+        writer.writerow(EXPORT_COLUMNS)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if compress else data
+
+    last_id = None
+    for row in rows:
+        _format_row(row, fmt, writer)
+        last_id = row[0]
+        if buffer.tell() >= chunk_size:
+            yield flush(), last_id
+    if buffer.tell():
+        yield flush(), last_id
+
+def stream_export(db_service: DatabaseService,
+                  fmt: str = 'csv',
+                  compress: bool = False,
+                  start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None,
+                  mode: Optional[str] = None,
+                  after_id: Optional[int] = None,
+                  header: bool = True) -> Iterator[bytes]:
+    """Generador de bytes para respuestas HTTP en streaming."""
+    rows = iter_interactions(db_service, start_date, end_date, mode, after_id)
+    for chunk, _ in iter_export_chunks(rows, fmt, compress, header):
+        yield chunk
+
+def _checkpoint_path(output: str) -> str:
+    return f"{output}.checkpoint"
+
+def _read_checkpoint(output: str) -> Optional[dict]:
+    try:
+        with open(_checkpoint_path(output), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_checkpoint(output: str, checkpoint: dict):
+    tmp_path = _checkpoint_path(output) + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, _checkpoint_path(output))
+
+def export_to_file(db_service: DatabaseService,
+                   output: str,
+                   fmt: str = 'csv',
+                   compress: bool = False,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None,
+                   mode: Optional[str] = None,
+                   after_id: Optional[int] = None,
+                   resume: bool = False,
+                   batch_size: int = 1000) -> int:
+    """
+    Exporta las interacciones a un fichero. Tras cada bloque se guarda un punto de
+    control con el último id y los bytes escritos; con `resume` se descarta
+    cualquier escritura incompleta y se continúa desde ese id.
+    """
+    checkpoint = _read_checkpoint(output) if resume else None
+    if checkpoint:
+        after_id = checkpoint['last_id']
+        with open(output, 'r+b') as f:
+            f.truncate(checkpoint['bytes_written'])
+        logger.info(f"Resuming export after id {after_id}")
+    else:
+        checkpoint = {'last_id': after_id or 0, 'bytes_written': 0}
+
+    rows = iter_interactions(db_service, start_date, end_date, mode, checkpoint['last_id'], batch_size)
+    with open(output, 'ab' if checkpoint['bytes_written'] else 'wb') as f:
+        chunks = iter_export_chunks(
+            rows, fmt, compress, header=not checkpoint['bytes_written']
+        )
+        for chunk, last_id in chunks:
+            f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            checkpoint = {'last_id': last_id, 'bytes_written': f.tell()}
+            _write_checkpoint(output, checkpoint)
+
+    logger.info(f"Export finished at id {checkpoint['last_id']} ({checkpoint['bytes_written']} bytes)")
+    return checkpoint['last_id']
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta las interacciones en streaming")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true", help="Comprimir la salida")
+    parser.add_argument("--output", help="Fichero de salida (por defecto, salida estándar)")
+    parser.add_argument("--start-date", type=datetime.fromisoformat)
+    parser.add_argument("--end-date", type=datetime.fromisoformat)
+    parser.add_argument("--mode")
+    parser.add_argument("--after-id", type=int, help="Exportar sólo interacciones con id mayor")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continuar desde el punto de control del fichero de salida")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+    load_dotenv()
+    db_service = DatabaseService()
+
+    if args.output:
+        export_to_file(
+            db_service, args.output, args.format, args.gzip,
+            args.start_date, args.end_date, args.mode,
+            after_id=args.after_id, resume=args.resume, batch_size=args.batch_size
+        )
+    else:
+        for chunk in stream_export(db_service, args.format, args.gzip,
+                                   args.start_date, args.end_date, args.mode, args.after_id):
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# src/political_discourse_analyzer/utils/figures.py
+import os
+import json
+import shutil
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+import matplotlib
+import matplotlib.style
+import seaborn as sns
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+FIGURE_FORMATS = ('png', 'svg', 'webp')
+DEFAULT_DPI = 300
+PREVIEW_DPI = 72
+# Figuras que se conservan en la caché (las usadas más recientemente)
+DEFAULT_MAX_CACHE_FILES = 64
+
+# Cambiar si se modifica el aspecto de cualquier figura para invalidar la caché
+FIGURE_CACHE_VERSION = "1"
+
+# Estilo para visualizaciones académicas
+FIGURE_STYLE = 'seaborn-v0_8-paper'
+FIGURE_RC = {'figure.figsize': (12, 8), 'font.size': 12}
+
+class FigureJob(NamedTuple):
+    """Una figura a generar: `kind` elige la función de FIGURE_RENDERERS y `data` debe ser serializable en JSON."""
+    name: str
+    kind: str
+    data: Dict
+
+def render_method_comparison(data: Dict) -> Figure:
+    """Matriz de correlación entre métodos."""
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
+    sns.heatmap(pd.DataFrame(data['methods']).corr(),
+                annot=True,
+                cmap='RdYlBu_r',
+                center=0,
+                vmin=-1,
+                vmax=1,
+                square=True,
+                ax=ax)
+    ax.set_title('Correlación entre Métodos de Análisis')
+    fig.tight_layout()
+    return fig
+
+def render_topic_distribution(data: Dict) -> Figure:
+    """Distribución de temas por método en una rejilla 2x2."""
+    fig = Figure(figsize=(15, 12))
+    axes = fig.subplots(2, 2)
+    methods = {
+        (0, 0): ('embedding_analysis', 'Análisis por Embeddings'),
+        (0, 1): ('llm_analysis', 'Análisis por LLM'),
+        (1, 0): ('linguistic_analysis', 'Análisis Lingüístico'),
+        (1, 1): ('combined_analysis', 'Análisis Combinado')
+    }
+    for (row, column), (method, title) in methods.items():
+        scores = pd.DataFrame(list(data['results'][method].items()), columns=['category', 'score'])
+        ax = axes[row][column]
+        sns.barplot(data=scores, x='score', y='category', hue='category', legend=False,
+                    ax=ax, palette='viridis')
+        ax.set_title(title)
+        ax.set_xlabel('Puntuación Normalizada')
+        # Límites fijos para que los gráficos sean comparables
+        ax.set_xlim(0, 1)
+    fig.tight_layout()
+    return fig
+
+def render_topic_network(data: Dict) -> Figure:
+    """Red de relaciones entre temas; el tamaño del nodo refleja su centralidad."""
+    fig = Figure(figsize=(12, 10))
+    ax = fig.subplots()
+    ax.set_axis_off()
+    ax.set_title('Red de Relaciones entre Temas')
+
+    G = nx.Graph()
+    G.add_nodes_from(data['nodes'])
+    G.add_weighted_edges_from(data['edges'])
+    if not G.number_of_nodes():
+        ax.text(0.5, 0.5, 'Sin relaciones por encima del umbral', ha='center', va='center')
+        return fig
+
+    # Semilla fija: mismos datos, misma disposición (y misma entrada de caché)
+    positions = nx.spring_layout(G, weight='weight', seed=42)
+    centrality = data.get('centrality', {})
+    nx.draw_networkx_nodes(
+        G, positions, ax=ax,
+        node_size=[300 + 3000 * centrality.get(node, 0) for node in G.nodes()],
+        node_color=[centrality.get(node, 0) for node in G.nodes()],
+        cmap='viridis'
+    )
+    nx.draw_networkx_edges(
+        G, positions, ax=ax,
+        width=[1 + 4 * weight for _, _, weight in G.edges(data='weight')],
+        alpha=0.6
+    )
+    nx.draw_networkx_labels(G, positions, ax=ax, font_size=10)
+    fig.tight_layout()
+    return fig
+
+def render_topic_trends(data: Dict) -> Figure:
+    """Cuota de cada tema (media móvil) con los puntos de cambio marcados."""
+    fig = Figure(figsize=(14, 7))
+    ax = fig.subplots()
+    periods = pd.to_datetime(data['periods'])
+    for category, series in data['categories'].items():
+        rolling_share = [np.nan if value is None else value for value in series['rolling_share']]
+        ax.plot(periods, rolling_share, label=category)
+        change_points = [data['periods'].index(cp['period']) for cp in series['change_points']]
+        if change_points:
+            ax.scatter(periods[change_points], [rolling_share[i] for i in change_points], marker='o', s=40)
+    ax.set_title(f"Cuota de Temas (media móvil de {data['window']} días)")
+    ax.set_ylabel('Cuota del Análisis Combinado')
+    ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+    fig.tight_layout()
+    return fig
+
+FIGURE_RENDERERS: Dict[str, Callable[[Dict], Figure]] = {
+    'method_comparison': render_method_comparison,
+    'topic_distribution': render_topic_distribution,
+    'topic_network': render_topic_network,
+    'topic_trends': render_topic_trends
+}
+
+def _init_worker():
+    matplotlib.use('Agg')
+
+def _render_to_file(kind: str, data: Dict, path: str, fmt: str, dpi: int) -> str:
+    """Genera una figura y la guarda de forma atómica. Se ejecuta en los procesos del pool."""
+    with matplotlib.style.context(FIGURE_STYLE), matplotlib.rc_context(FIGURE_RC):
+        fig = FIGURE_RENDERERS[kind](data)
+        tmp_path = f"{path}.tmp"
+        fig.savefig(tmp_path, format=fmt, dpi=dpi)
+    os.replace(tmp_path, path)
+    return path
+
+class FigureRenderer:
+    """
+    Genera las figuras de un informe en paralelo y con caché.
+
+    Cada figura se guarda en la caché con el hash de su tipo, sus datos, el
+    formato y la resolución; si los datos no cambian se copia la versión
+    guardada en lugar de volver a dibujarla. Las figuras pendientes se dibujan
+    en un pool de procesos con el backend Agg, de modo que el tiempo total lo
+    marca la figura más lenta. `preview` reduce la resolución para uso
+    interactivo. La caché conserva sólo las `max_cache_files` figuras usadas
+    más recientemente.
+    """
+
+    def __init__(self,
+                 output_dir: str,
+                 fmt: str = 'png',
+                 dpi: int = DEFAULT_DPI,
+                 preview: bool = False,
+                 cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 max_cache_files: int = DEFAULT_MAX_CACHE_FILES):
+        if fmt not in FIGURE_FORMATS:
+            raise ValueError(f"Formato de figura no soportado: {fmt}")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.dpi = PREVIEW_DPI if preview else dpi
+        self.cache_dir = cache_dir or os.path.join(output_dir, '.figure_cache')
+        self.max_workers = max_workers
+        self.max_cache_files = max_cache_files
+
+    def figure_path(self, name: str) -> str:
+        return os.path.join(self.output_dir, f"{name}.{self.fmt}")
+
+    def _cache_key(self, job: FigureJob) -> str:
+        payload = json.dumps(
+            {'version': FIGURE_CACHE_VERSION, 'kind': job.kind, 'data': job.data,
+             'fmt': self.fmt, 'dpi': self.dpi},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def render(self, jobs: List[FigureJob]) -> Dict[str, str]:
+        """Genera las figuras y devuelve {nombre: ruta}."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        cached = {
+            job.name: os.path.join(self.cache_dir, f"{self._cache_key(job)}.{self.fmt}")
+            for job in jobs
+        }
+        pending = [job for job in jobs if not os.path.exists(cached[job.name])]
+
+        if pending:
+            logger.info(f"Rendering {len(pending)} of {len(jobs)} figures ({self.fmt}, {self.dpi} dpi)")
+            workers = min(len(pending), self.max_workers or os.cpu_count() or 1)
+            if workers > 1:
+                # Contexto por defecto de la plataforma: fork en Linux evita reimportar el script
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context(),
+                                         initializer=_init_worker) as pool:
+                    futures = [
+                        pool.submit(_render_to_file, job.kind, job.data, cached[job.name], self.fmt, self.dpi)
+                        for job in pending
+                    ]
+                    for future in futures:
+                        future.result()
+            else:
+                for job in pending:
+                    _render_to_file(job.kind, job.data, cached[job.name], self.fmt, self.dpi)
+
+        paths = {}
+        for job in jobs:
+            paths[job.name] = self.figure_path(job.name)
+            shutil.copyfile(cached[job.name], paths[job.name])
+            # La fecha de modificación marca el último uso para la rotación
+            os.utime(cached[job.name])
+        self._rotate(keep=set(cached.values()))
+        return paths
+
+    def _rotate(self, keep: set):
+        """Conserva sólo las `max_cache_files` figuras de la caché usadas más recientemente."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for entry in entries[self.max_cache_files:]:
+            if entry.path not in keep:
+                os.unlink(entry.path)
@@ -0,0 +1,415 @@
+# src/political_discourse_analyzer/utils/load_test.py
+"""
+Generador de carga para la API: reproduce las conversaciones de
+`interactions.csv` (primera consulta y seguimientos en el mismo thread) contra
+`/search`, mezcladas con consultas a `/analytics/*` y `/diagnostic/db`, a una
+tasa objetivo (bucle abierto) o con un número fijo de usuarios concurrentes
+(bucle cerrado). Informa de histogramas de latencia, tasas de error y
+rendimiento a lo largo del tiempo.
+
+Para no gastar en OpenAI, arranca el backend con OPENAI_BASE_URL apuntando al
+servidor local de utils/openai_stub.py.
+
+Uso:
+    python -m political_discourse_analyzer.utils.load_test --base-url http://localhost:8000 \\
+        --rps 20 --duration 120 --output load_results.json
+"""
+import csv
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ('search', 'analytics', 'diagnostic')
+DEFAULT_MIX = {'search': 0.8, 'analytics': 0.15, 'diagnostic': 0.05}
+ANALYTICS_ENDPOINTS = ('topics', 'trends', 'engagement', 'report')
+# Modos con asistente en el backend; el resto se reproduce como REPLAY_FALLBACK_MODE
+REPLAY_MODES = ('neutral',)
+REPLAY_FALLBACK_MODE = 'neutral'
+
+# Límites superiores (ms) de los cubos del histograma de latencia
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, math.inf)
+
+class Conversation(NamedTuple):
+    """Consultas de un thread en orden y segundos entre cada una y la siguiente."""
+    mode: str
+    queries: List[str]
+    gaps: List[float]
+
+class Workload(NamedTuple):
+    conversations: List[Conversation]
+    start: Optional[datetime]
+    end: Optional[datetime]
+    # Conversaciones reproducidas en REPLAY_FALLBACK_MODE, por modo original
+    remapped_modes: Dict[str, int] = {}
+
+def load_workload(csv_path: str) -> Workload:
+    """
+    Agrupa las interacciones exportadas por thread, en orden temporal. Las
+    conversaciones en modos sin asistente en el backend (p. ej. `personal`)
+    se reproducen en modo neutral, en lugar de provocar errores 500 que no
+    reflejan la carga real; el informe indica cuántas.
+    """
+    threads: Dict[str, List] = {}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if not row.get('query'):
+                continue
+            timestamp = datetime.fromisoformat(row['timestamp']) if row.get('timestamp') else None
+            threads.setdefault(row['thread_id'], []).append((timestamp, row['query'], row.get('mode') or 'neutral'))
+
+    conversations, timestamps, remapped_modes = [], [], {}
+    for rows in threads.values():
+        rows.sort(key=lambda row: row[0] or datetime.min)
+        times = [row[0] for row in rows]
+        gaps = [
+            (later - earlier).total_seconds() if earlier and later else 0.0
+            for earlier, later in zip(times, times[1:])
+        ]
+        mode = rows[0][2]
+        if mode not in REPLAY_MODES:
+            remapped_modes[mode] = remapped_modes.get(mode, 0) + 1
+            mode = REPLAY_FALLBACK_MODE
+        conversations.append(Conversation(mode, [row[1] for row in rows], gaps))
+        timestamps.extend(t for t in times if t)
+
+    if not conversations:
+        raise ValueError(f"No hay consultas en {csv_path}")
+    if remapped_modes:
+        logger.warning(f"Conversaciones reproducidas en modo {REPLAY_FALLBACK_MODE}: {remapped_modes}")
+    return Workload(conversations, min(timestamps, default=None), max(timestamps, default=None), remapped_modes)
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """`search=0.8,analytics=0.15,diagnostic=0.05` -> pesos normalizados."""
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Escenario desconocido: {name}")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("La mezcla de escenarios debe tener algún peso positivo")
+    return {name: weight / total for name, weight in mix.items()}
+
+def latency_histogram(latencies_ms: List[float]) -> List[Dict]:
+    counts = [0] * len(LATENCY_BUCKETS_MS)
+    for latency in latencies_ms:
+        counts[bisect_left(LATENCY_BUCKETS_MS, latency)] += 1
+    return [
+        {'le_ms': bound if math.isfinite(bound) else None, 'count': count}
+        for bound, count in zip(LATENCY_BUCKETS_MS, counts)
+    ]
+
+def _percentiles(latencies_ms: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies_ms:
+        return {'p50_ms': None, 'p90_ms': None, 'p99_ms': None, 'max_ms': None}
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {'p50_ms': round(float(p50), 2), 'p90_ms': round(float(p90), 2),
+            'p99_ms': round(float(p99), 2), 'max_ms': round(max(latencies_ms), 2)}
+
+class LoadStats:
+    """Resultados por endpoint y por intervalo de tiempo."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.started = time.monotonic()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+        self.timeline: Dict[int, Dict] = {}
+        self.dropped = 0
+
+    def record(self, endpoint: str, latency: float, status: str, error: bool):
+        latency_ms = latency * 1000
+        self.latencies.setdefault(endpoint, []).append(latency_ms)
+        statuses = self.statuses.setdefault(endpoint, {})
+        statuses[status] = statuses.get(status, 0) + 1
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + int(error)
+
+        window = self.timeline.setdefault(
+            int((time.monotonic() - self.started) / self.interval),
+            {'requests': 0, 'errors': 0, 'latencies': []}
+        )
+        window['requests'] += 1
+        window['errors'] += int(error)
+        window['latencies'].append(latency_ms)
+
+    def report(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.errors[endpoint],
+                'error_rate': round(self.errors[endpoint] / len(latencies), 4),
+                'statuses': self.statuses[endpoint],
+                **_percentiles(latencies),
+                'histogram': latency_histogram(latencies)
+            }
+
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        total_errors = sum(self.errors.values())
+        timeline = []
+        for index in range(max(self.timeline, default=-1) + 1):
+            window = self.timeline.get(index, {'requests': 0, 'errors': 0, 'latencies': []})
+            timeline.append({
+                'second': round(index * self.interval, 3),
+                'throughput': round(window['requests'] / self.interval, 2),
+                'errors': window['errors'],
+                'p95_ms': round(float(np.percentile(window['latencies'], 95)), 2) if window['latencies'] else None
+            })
+
+        return {
+            'duration_seconds': round(elapsed, 2),
+            'requests': len(all_latencies),
+            'errors': total_errors,
+            'error_rate': round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+            'throughput': round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            'dropped_arrivals': self.dropped,
+            **_percentiles(all_latencies),
+            'histogram': latency_histogram(all_latencies),
+            'endpoints': endpoints,
+            'timeline': timeline
+        }
+
+class LoadGenerator:
+    """
+    Lanza escenarios durante `duration` segundos. Con `rps` las llegadas siguen
+    un proceso de Poisson ajustado para que la tasa total de peticiones
+    (incluidos los seguimientos) se acerque al objetivo; si no, `concurrency`
+    usuarios repiten escenarios sin pausa entre ellos.
+
+    Los seguimientos de una conversación esperan el tiempo real entre consultas
+    multiplicado por `think_time_scale`, con un máximo de `max_think_time`.
+    """
+
+    def __init__(self,
+                 workload: Workload,
+                 base_url: str = "http://localhost:8000",
+                 mix: Optional[Dict[str, float]] = None,
+                 rps: Optional[float] = None,
+                 concurrency: int = 10,
+                 duration: float = 60.0,
+                 think_time_scale: float = 0.0,
+                 max_think_time: float = 30.0,
+                 max_in_flight: int = 1000,
+                 timeout: float = 120.0,
+                 interval: float = 1.0,
+                 seed: Optional[int] = None,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.workload = workload
+        self.base_url = base_url
+        self.mix = mix or DEFAULT_MIX
+        self.rps = rps
+        self.concurrency = concurrency
+        self.duration = duration
+        self.think_time_scale = think_time_scale
+        self.max_think_time = max_think_time
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.client = client
+        self.stats: Optional[LoadStats] = None
+
+    def _requests_per_scenario(self) -> float:
+        mean_turns = np.mean([len(c.queries) for c in self.workload.conversations])
+        return sum(weight * (mean_turns if name == 'search' else 1) for name, weight in self.mix.items())
+
+    def _choose_scenario(self) -> str:
+        names = list(self.mix)
+        return self.random.choices(names, weights=[self.mix[name] for name in names])[0]
+
+    async def _request(self, client: httpx.AsyncClient, endpoint: str, method: str, path: str,
+                       **kwargs) -> Optional[httpx.Response]:
+        start = time.monotonic()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(endpoint, time.monotonic() - start, type(e).__name__, error=True)
+            return None
+        # /diagnostic/db responde 200 con status "error" si falla la base de datos
+        failed = response.status_code >= 400 or (
+            endpoint == 'diagnostic.db' and response.json().get('status') == 'error'
+        )
+        self.stats.record(endpoint, time.monotonic() - start, str(response.status_code), error=failed)
+        return None if failed else response
+
+    async def _search(self, client: httpx.AsyncClient):
+        conversation = self.random.choice(self.workload.conversations)
+        thread_id = None
+        for turn, query in enumerate(conversation.queries):
+            if turn:
+                gap = conversation.gaps[turn - 1] * self.think_time_scale
+                if gap:
+                    await asyncio.sleep(min(gap, self.max_think_time))
+            response = await self._request(
+                client, 'search.follow_up' if thread_id else 'search.first', 'POST', '/search',
+                json={'query': query, 'mode': conversation.mode, 'thread_id': thread_id}
+            )
+            if response is None:
+                # Sin thread no se pueden enviar los seguimientos
+                return
+            thread_id = response.json()['thread_id']
+
+    def _date_range(self) -> Dict[str, str]:
+        start, end = self.workload.start, self.workload.end
+        if not start or not end:
+            return {}
+        days = max((end - start).days, 1)
+        window_start = start + timedelta(days=self.random.randint(0, days - 1))
+        window_end = window_start + timedelta(days=self.random.randint(1, days))
+        return {'start_date': window_start.date().isoformat(), 'end_date': window_end.date().isoformat()}
+
+    async def _analytics(self, client: httpx.AsyncClient):
+        name = self.random.choice(ANALYTICS_ENDPOINTS)
+        params = self._date_range() if self.random.random() < 0.5 else {}
+        await self._request(client, f'analytics.{name}', 'GET', f'/analytics/{name}', params=params)
+
+    async def _diagnostic(self, client: httpx.AsyncClient):
+        await self._request(client, 'diagnostic.db', 'GET', '/diagnostic/db')
+
+    async def _scenario(self, client: httpx.AsyncClient, name: str):
+        await {'search': self._search, 'analytics': self._analytics, 'diagnostic': self._diagnostic}[name](client)
+
+    async def _open_loop(self, client: httpx.AsyncClient, deadline: float):
+        arrival_rate = self.rps / self._requests_per_scenario()
+        in_flight = set()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.random.expovariate(arrival_rate))
+            if len(in_flight) >= self.max_in_flight:
+                # El servidor no da abasto: la llegada se descarta en lugar de acumularse
+                self.stats.dropped += 1
+                continue
+            task = asyncio.create_task(self._scenario(client, self._choose_scenario()))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=self.timeout)
+
+    async def _closed_loop(self, client: httpx.AsyncClient, deadline: float):
+        async def user():
+            while time.monotonic() < deadline:
+                await self._scenario(client, self._choose_scenario())
+        await asyncio.gather(*(user() for _ in range(self.concurrency)))
+
+    async def run(self) -> Dict:
+        self.stats = LoadStats(self.interval)
+        deadline = time.monotonic() + self.duration
+        client = self.client or httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_in_flight if self.rps else self.concurrency)
+        )
+        try:
+            if self.rps:
+                await self._open_loop(client, deadline)
+            else:
+                await self._closed_loop(client, deadline)
+        finally:
+            if client is not self.client:
+                await client.aclose()
+
+        report = self.stats.report()
+        report['config'] = {
+            'base_url': self.base_url,
+            'mix': self.mix,
+            'rps': self.rps,
+            'concurrency': None if self.rps else self.concurrency,
+            'duration': self.duration,
+            'think_time_scale': self.think_time_scale,
+            'conversations': len(self.workload.conversations),
+            'remapped_modes': {mode: {'replayed_as': REPLAY_FALLBACK_MODE, 'conversations': count}
+                               for mode, count in self.workload.remapped_modes.items()}
+        }
+        return report
+
+def format_report(report: Dict) -> str:
+    """Resumen legible: tabla por endpoint e histograma global."""
+    lines = [
+        f"{report['requests']} peticiones en {report['duration_seconds']}s: "
+        f"{report['throughput']} req/s, {report['error_rate']:.2%} errores, "
+        f"{report['dropped_arrivals']} llegadas descartadas",
+        *[
+            f"{remap['conversations']} conversaciones en modo {mode} reproducidas como {remap['replayed_as']}"
+            for mode, remap in report.get('config', {}).get('remapped_modes', {}).items()
+        ],
+        "",
+        f"{'endpoint':<20} {'reqs':>7} {'err%':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+    ]
+    for endpoint, stats in report['endpoints'].items():
+        values = [stats[key] for key in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')]
+        lines.append(
+            f"{endpoint:<20} {stats['requests']:>7} {stats['error_rate']:>7.2%} "
+            + " ".join(f"{value:>9.1f}" for value in values)
+        )
+
+    lines += ["", "Latencia (ms):"]
+    peak = max((bucket['count'] for bucket in report['histogram']), default=0) or 1
+    for bucket in report['histogram']:
+        label = f"<= {bucket['le_ms']}" if bucket['le_ms'] is not None else "> 30000"
+        lines.append(f"{label:>10} {bucket['count']:>7} {'#' * round(40 * bucket['count'] / peak)}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con conversaciones reales")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--interactions", default="analysis_results/interactions.csv",
+                        help="CSV exportado con utils/export_interactions.py")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, help="Peticiones por segundo objetivo (bucle abierto)")
+    load.add_argument("--concurrency", type=int, default=10, help="Usuarios concurrentes (bucle cerrado)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos de generación de carga")
+    parser.add_argument("--mix", default="search=0.8,analytics=0.15,diagnostic=0.05")
+    parser.add_argument("--think-time-scale", type=float, default=0.0,
+                        help="Factor sobre el tiempo real entre consultas de una conversación")
+    parser.add_argument("--max-think-time", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000,
+                        help="Escenarios simultáneos máximos en bucle abierto")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="Segundos por punto de la serie temporal")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Guardar el informe completo en JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # httpx registra cada petición en INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    workload = load_workload(args.interactions)
+    logger.info(f"Cargadas {len(workload.conversations)} conversaciones de {args.interactions}")
+
+    generator = LoadGenerator(
+        workload,
+        base_url=args.base_url,
+        mix=parse_mix(args.mix),
+        rps=args.rps,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        think_time_scale=args.think_time_scale,
+        max_think_time=args.max_think_time,
+        max_in_flight=args.max_in_flight,
+        timeout=args.timeout,
+        interval=args.interval,
+        seed=args.seed
+    )
+    report = asyncio.run(generator.run())
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Informe guardado en {args.output}")
+
+if __name__ == "__main__":
+    main()
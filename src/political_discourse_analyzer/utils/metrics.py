@@ -0,0 +1,348 @@
+# src/political_discourse_analyzer/utils/metrics.py
+"""
+Métricas en proceso con exposición en formato de texto de Prometheus.
+
+Cada hilo escribe en su propio fragmento de contadores, de modo que registrar
+una observación no toma ningún lock: sólo una búsqueda en un diccionario y
+unas sumas. Los fragmentos se agregan al generar `/metrics`; la lectura puede
+no incluir las observaciones que se estén escribiendo en ese instante, lo que
+es aceptable para métricas.
+"""
+import time
+import math
+import inspect
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from political_discourse_analyzer.utils.openai_ledger import LEDGER, track_attempts
+from political_discourse_analyzer.utils.openai_resilience import OPENAI_GUARD, OpenAIUnavailable
+from political_discourse_analyzer.utils.server_timing import record_timing
+from political_discourse_analyzer.utils.tracing import TRACER
+
+# Cubos por defecto (segundos): desde consultas a la base de datos hasta runs de OpenAI
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+class _Metric:
+    """Base de las métricas con fragmentos por hilo."""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, List[float]]] = []
+
+    def _width(self) -> int:
+        raise NotImplementedError
+
+    def _values(self, labels: Dict[str, str]) -> List[float]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # list.append es atómico con el GIL
+            self._shards.append(shard)
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0.0] * self._width()
+        return values
+
+    def collect(self) -> Dict[LabelValues, List[float]]:
+        """Suma los fragmentos de todos los hilos."""
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in list(self._shards):
+            for key, values in list(shard.items()):
+                current = totals.setdefault(key, [0.0] * len(values))
+                for i, value in enumerate(values):
+                    current[i] += value
+        return totals
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _width(self) -> int:
+        return 1
+
+    def inc(self, amount: float = 1.0, **labels):
+        self._values(labels)[0] += amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self.collect().get(key, [0.0])[0]
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(values[0])}"
+            for key, values in sorted(self.collect().items())
+        ]
+
+class Histogram(_Metric):
+    """Histograma con cubos fijos; guarda el conteo por cubo, la suma y el total."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _width(self) -> int:
+        # Un cubo por límite, otro para +Inf, la suma y el total
+        return len(self.buckets) + 3
+
+    def observe(self, value: float, **labels):
+        values = self._values(labels)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for key, values in sorted(self.collect().items()):
+            cumulative = 0.0
+            for bound, count in zip(bounds, values):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ('le',), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(values[-1])}")
+        return lines
+
+class GaugeCallback:
+    """Gauge calculado al exponer las métricas (p. ej. el estado de un pool)."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.callback()
+        ]
+
+class Timer:
+    """
+    Mide la duración de un bloque (`with`) o de una función, síncrona o
+    asíncrona (decorador), y la registra en un histograma. Con `timing`, la
+    duración se suma además al desglose `Server-Timing` de la petición en curso.
+    """
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str], timing: Optional[str] = None):
+        self.histogram = histogram
+        self.labels = labels
+        self.timing = timing
+
+    def _record(self, seconds: float):
+        self.histogram.observe(seconds, **self.labels)
+        if self.timing:
+            record_timing(self.timing, seconds)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._record(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        record = self._record
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(time.perf_counter() - start)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
+        return wrapper
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        # Sólo al definir métricas, nunca en el camino caliente
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de texto 0.0.4 de Prometheus."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def gauge_callback(name: str, documentation: str, labelnames: Sequence[str],
+                   callback: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> GaugeCallback:
+    """Registra (o sustituye) un gauge calculado al exponer las métricas."""
+    REGISTRY.unregister(name)
+    return REGISTRY.register(GaugeCallback(name, documentation, labelnames, callback))
+
+# --- Métricas de la aplicación ---
+
+HTTP_REQUEST_SECONDS = histogram(
+    "pda_http_request_duration_seconds", "Duración de las peticiones HTTP por ruta",
+    ("method", "route", "status")
+)
+SEARCH_STAGE_SECONDS = histogram(
+    "pda_search_stage_duration_seconds", "Duración de cada etapa de /search", ("stage",)
+)
+ANALYTICS_SECONDS = histogram(
+    "pda_analytics_duration_seconds", "Duración de los métodos de AnalyticsService", ("method",)
+)
+OPENAI_REQUESTS = counter(
+    "pda_openai_requests_total", "Llamadas a la API de OpenAI", ("operation", "model", "outcome")
+)
+OPENAI_TOKENS = counter(
+    "pda_openai_tokens_total", "Tokens consumidos en OpenAI", ("model", "kind")
+)
+DB_POOL_WAIT_SECONDS = histogram(
+    "pda_db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+CACHE_LOOKUPS = counter(
+    "pda_cache_lookups_total", "Consultas a cachés por resultado (hit, stale, miss)", ("cache", "result")
+)
+OPENAI_REJECTED = counter(
+    "pda_openai_rejected_total", "Llamadas a OpenAI rechazadas sin enviarse", ("reason",)
+)
+gauge_callback(
+    "pda_openai_concurrency", "Límite adaptativo de llamadas a OpenAI y llamadas en curso", ("kind",),
+    lambda: [(("limit",), int(OPENAI_GUARD.limiter.limit)), (("inflight",), OPENAI_GUARD.limiter.inflight)]
+)
+gauge_callback(
+    "pda_openai_circuit_open", "1 si el circuit breaker de OpenAI no está cerrado", (),
+    lambda: [((), 0 if OPENAI_GUARD.breaker.state == "closed" else 1)]
+)
+
+def timed(histogram: Histogram, **labels) -> Timer:
+    """
+    Mide un bloque o una función en `histogram` con las etiquetas dadas. En
+    `Server-Timing` aparece con el valor de las etiquetas como nombre.
+    """
+    return Timer(histogram, labels, timing=".".join(str(value) for value in labels.values()))
+
+def stage(name: str, histogram: Histogram = SEARCH_STAGE_SECONDS) -> Timer:
+    """Mide una etapa: `with stage("run_stream"): ...` o `@stage("format_response")`."""
+    return Timer(histogram, {"stage": name}, timing=name)
+
+def record_openai_call(operation: str, model: Optional[str], usage=None, outcome: str = "ok"):
+    """Cuenta una llamada a OpenAI y, si la respuesta lo incluye, su consumo de tokens."""
+    model = model or "unknown"
+    OPENAI_REQUESTS.inc(operation=operation, model=model, outcome=outcome)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        OPENAI_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        OPENAI_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+@contextmanager
+def openai_call(operation: str, model: Optional[str] = None):
+    """
+    Registra una llamada a OpenAI al salir del bloque, como métrica, como span
+    de la traza activa y en el registro de uso. El bloque puede fijar
+    `call.model` y `call.usage` a partir de la respuesta; si lanza una
+    excepción, se cuenta como error. Antes de entrar, la llamada pasa por
+    `OPENAI_GUARD`, que puede rechazarla con `OpenAIUnavailable`.
+    """
+    call = SimpleNamespace(model=model, usage=None, attempts=0)
+    try:
+        OPENAI_GUARD.acquire()
+    except OpenAIUnavailable as e:
+        OPENAI_REJECTED.inc(reason=e.reason)
+        raise
+    start = time.perf_counter()
+    outcome = "error"
+    error = None
+    cancelled = False
+    with TRACER.span(f"openai {operation}", kind="client", root=False) as span, track_attempts(call):
+        try:
+            yield call
+            outcome = "ok"
+        except Exception as e:
+            error = e
+            record_openai_call(operation, call.model, outcome="error")
+            raise
+        except BaseException:
+            # Cancelación (CancelledError, KeyboardInterrupt): no dice nada del proveedor
+            cancelled = True
+            raise
+        finally:
+            if cancelled:
+                OPENAI_GUARD.cancel()
+            else:
+                OPENAI_GUARD.release(error)
+            elapsed = time.perf_counter() - start
+            record_timing("openai", elapsed)
+            LEDGER.record(operation, call.model, call.usage, elapsed * 1000, call.attempts, outcome)
+            span.set_attribute("openai.attempts", call.attempts or None)
+            span.set_attribute("openai.operation", operation)
+            span.set_attribute("openai.model", call.model)
+            if call.usage is not None:
+                span.set_attribute("openai.prompt_tokens", getattr(call.usage, "prompt_tokens", None))
+                span.set_attribute("openai.completion_tokens", getattr(call.usage, "completion_tokens", None))
+        record_openai_call(operation, call.model, call.usage)
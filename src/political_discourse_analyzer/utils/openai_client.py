@@ -0,0 +1,154 @@
+# src/political_discourse_analyzer/utils/openai_client.py
+"""
+Cliente de OpenAI compartido por todos los servicios del proceso.
+
+Un único `httpx.Client` (pool de conexiones con keep-alive y HTTP/2 si `h2`
+está instalado) respalda a `AssistantService`, `AnalyticsService` y
+`SystemDiagnostic`, de modo que las ráfagas reutilizan conexiones en lugar de
+repetir el handshake TLS. Los tiempos máximos dependen del tipo de operación:
+los runs en streaming pueden tardar minutos y un embedding, segundos.
+"""
+import os
+import logging
+import threading
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+import httpx
+import openai
+
+from political_discourse_analyzer.models.settings import AISettings, ApplicationSettings
+from political_discourse_analyzer.utils.metrics import counter, gauge_callback
+from political_discourse_analyzer.utils.openai_ledger import count_attempt
+
+logger = logging.getLogger(__name__)
+
+OPERATION_KINDS = ("stream", "embeddings", "chat", "default")
+
+OPENAI_CONNECTIONS_OPENED = counter(
+    "pda_openai_connections_opened_total", "Conexiones TCP abiertas hacia la API de OpenAI"
+)
+OPENAI_TLS_HANDSHAKES = counter(
+    "pda_openai_tls_handshakes_total", "Handshakes TLS con la API de OpenAI"
+)
+
+def _trace_connection(event_name: str, info: Dict):
+    """Callback de trazas de httpcore: cuenta conexiones nuevas y handshakes."""
+    if event_name == "connection.connect_tcp.complete":
+        OPENAI_CONNECTIONS_OPENED.inc()
+    elif event_name == "connection.start_tls.complete":
+        OPENAI_TLS_HANDSHAKES.inc()
+
+def _add_connection_trace(request: httpx.Request):
+    request.extensions["trace"] = _trace_connection
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+class OpenAIClients:
+    """Cliente de OpenAI sobre un pool HTTP compartido y tiempos máximos por operación."""
+
+    def __init__(self, settings: AISettings, api_key: str):
+        self.settings = settings
+        self.http2 = settings.http2 and http2_available()
+        self.http_client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry
+            ),
+            timeout=self._timeout(settings.default_timeout),
+            event_hooks={"request": [count_attempt, _add_connection_trace]}
+        )
+        self.client = openai.Client(
+            api_key=api_key,
+            base_url=settings.base_url,
+            max_retries=settings.max_retries,
+            http_client=self.http_client
+        )
+        self.timeouts = {
+            "stream": self._timeout(settings.stream_timeout),
+            "embeddings": self._timeout(settings.embeddings_timeout),
+            "chat": self._timeout(settings.chat_timeout),
+            "default": self._timeout(settings.default_timeout)
+        }
+
+    def _timeout(self, read: float) -> httpx.Timeout:
+        return httpx.Timeout(read, connect=self.settings.connect_timeout)
+
+    def timeout(self, kind: str) -> httpx.Timeout:
+        """Tiempo máximo para un tipo de operación (stream, embeddings, chat o default)."""
+        return self.timeouts[kind]
+
+    def pool_stats(self) -> Dict:
+        """Estado del pool de conexiones y contadores de conexiones y handshakes."""
+        # httpx no expone el pool de httpcore; si cambia su estructura se informa sin detalle
+        pool = getattr(getattr(self.http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "http2_enabled": self.http2,
+            "max_connections": self.settings.max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "http2_connections": sum(1 for connection in connections if "HTTP/2" in connection.info()),
+            "connections_opened": int(OPENAI_CONNECTIONS_OPENED.value()),
+            "tls_handshakes": int(OPENAI_TLS_HANDSHAKES.value())
+        }
+
+    def close(self):
+        self.http_client.close()
+
+_clients: Dict[Tuple[Optional[str], Optional[str]], OpenAIClients] = {}
+_clients_lock = threading.Lock()
+
+def get_openai_clients(settings: Optional[AISettings] = None) -> OpenAIClients:
+    """
+    Devuelve el cliente compartido para la clave y URL base de `settings` (por
+    defecto, las de las variables de entorno), creándolo la primera vez. Sin
+    clave en `settings` se usa OPENAI_API_KEY.
+    """
+    if settings is None:
+        settings = ApplicationSettings.from_env(openai_api_key=os.getenv("OPENAI_API_KEY")).ai_settings
+    api_key = settings.openai_api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    key = (api_key, settings.base_url)
+    with _clients_lock:
+        clients = _clients.get(key)
+        if clients is None:
+            clients = _clients[key] = OpenAIClients(settings, api_key)
+            logger.info(
+                f"OpenAI HTTP pool created (max_connections={settings.max_connections}, "
+                f"http2={clients.http2})"
+            )
+            gauge_callback(
+                "pda_openai_pool_connections", "Conexiones del pool HTTP de OpenAI por estado", ("state",),
+                _pool_gauge
+            )
+    return clients
+
+def _pool_gauge():
+    totals = {"active": 0, "idle": 0}
+    for clients in list(_clients.values()):
+        stats = clients.pool_stats()
+        totals["active"] += stats["active"]
+        totals["idle"] += stats["idle"]
+    return [((state,), value) for state, value in totals.items()]
+
+def openai_pool_stats() -> Dict:
+    """Estadísticas de los pools compartidos, por URL base."""
+    return {
+        base_url or "https://api.openai.com/v1": clients.pool_stats()
+        for (_, base_url), clients in list(_clients.items())
+    }
+
+def close_openai_clients():
+    """Cierra las conexiones de todos los clientes compartidos (al apagar la aplicación)."""
+    with _clients_lock:
+        for clients in _clients.values():
+            clients.close()
+        _clients.clear()
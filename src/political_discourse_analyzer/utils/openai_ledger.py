@@ -0,0 +1,142 @@
+# src/political_discourse_analyzer/utils/openai_ledger.py
+"""
+Registro de uso de OpenAI: una fila por llamada con la funcionalidad que la
+origina, operación, modelo, tokens, latencia, intentos y coste estimado.
+
+Las llamadas se registran al salir de `metrics.openai_call`; los reintentos
+internos del SDK se cuentan con `count_attempt`, un hook del cliente HTTP
+compartido (ver `openai_client`). Las filas se acumulan en memoria y un hilo las
+escribe por lotes, de modo que registrar una llamada no toca la base de datos.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Precios en USD por millón de tokens (entrada, salida). Los modelos con fecha
+# (p. ej. gpt-4o-2024-08-06) usan el precio del prefijo más largo que coincida.
+MODEL_PRICES = {
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4-turbo-preview": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0)
+}
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Coste estimado en USD, o None si el modelo no tiene precio conocido."""
+    if not model:
+        return None
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(f"{name}-")]
+    if not matches:
+        return None
+    prompt_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+_current_feature: ContextVar[Optional[str]] = ContextVar("pda_openai_feature", default=None)
+_current_call: ContextVar[Optional[object]] = ContextVar("pda_openai_call", default=None)
+
+@contextmanager
+def openai_feature(name: str):
+    """Atribuye a `name` las llamadas a OpenAI hechas dentro del bloque."""
+    token = _current_feature.set(name)
+    try:
+        yield
+    finally:
+        _current_feature.reset(token)
+
+@contextmanager
+def track_attempts(call):
+    """Cuenta en `call.attempts` las peticiones HTTP (reintentos incluidos) del bloque."""
+    token = _current_call.set(call)
+    try:
+        yield call
+    finally:
+        _current_call.reset(token)
+
+def count_attempt(request: httpx.Request):
+    """Hook de petición de httpx: suma un intento a la llamada en curso."""
+    call = _current_call.get()
+    if call is not None:
+        call.attempts += 1
+
+class OpenAILedger:
+    """Acumula filas de uso y las entrega por lotes a `writer` desde un hilo propio."""
+
+    def __init__(self):
+        self._writer: Optional[Callable[[List[Dict]], None]] = None
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.max_buffer = 10000
+        self.dropped = 0
+
+    def configure(self, writer: Callable[[List[Dict]], None], flush_interval: float = 5.0,
+                  max_buffer: int = 10000):
+        self.shutdown()
+        self._writer = writer
+        self.max_buffer = max_buffer
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(flush_interval,), name="openai-ledger", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, operation: str, model: Optional[str], usage, latency_ms: float,
+               attempts: int, outcome: str):
+        if self._writer is None:
+            return
+        prompt_tokens = (getattr(usage, "prompt_tokens", None) or 0) if usage is not None else 0
+        completion_tokens = (getattr(usage, "completion_tokens", None) or 0) if usage is not None else 0
+        row = {
+            "timestamp": datetime.utcnow(),
+            "feature": _current_feature.get() or "unknown",
+            "operation": operation,
+            "model": model or "unknown",
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": round(latency_ms, 1),
+            "attempts": max(attempts, 1),
+            "outcome": outcome,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens)
+        }
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows and self._writer is not None:
+            try:
+                self._writer(rows)
+            except Exception as e:
+                logger.error(f"Error writing {len(rows)} OpenAI usage rows: {str(e)}")
+
+    def _run(self, flush_interval: float):
+        while not self._stop.wait(flush_interval):
+            self.flush()
+
+    def shutdown(self):
+        """Detiene el hilo y escribe lo pendiente."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} OpenAI usage rows: buffer full")
+            self.dropped = 0
+        self._writer = None
+
+LEDGER = OpenAILedger()
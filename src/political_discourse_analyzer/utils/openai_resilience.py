@@ -0,0 +1,256 @@
+# src/political_discourse_analyzer/utils/openai_resilience.py
+"""
+Protección frente a incidencias del proveedor en las llamadas a OpenAI.
+
+Cada llamada (ver `metrics.openai_call`) pasa por `OPENAI_GUARD`, que combina:
+
+- un límite de concurrencia adaptativo (AIMD): sube en 1/límite con cada
+  llamada atendida y se reduce a la mitad con un 429, un 5xx, un timeout o un
+  error de conexión (como mucho una vez por `decrease_cooldown`). Las llamadas
+  por encima del límite esperan hasta `queue_timeout` segundos y después se
+  rechazan.
+- un circuit breaker: tras `failure_threshold` errores de sobrecarga
+  seguidos se abre y rechaza las llamadas al instante durante el Retry-After
+  del proveedor o un backoff exponencial con jitter, lo que sea mayor. Pasado
+  ese tiempo deja pasar una llamada de prueba: si va bien se cierra y si no,
+  vuelve a abrirse durante el doble.
+
+Los rechazos lanzan `OpenAIUnavailable` con el `retry_after` sugerido, que la
+API devuelve como 503 con la cabecera Retry-After.
+"""
+import re
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+class OpenAIUnavailable(Exception):
+    """Llamada a OpenAI rechazada sin enviarla: circuito abierto o demasiadas en curso."""
+
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+# Errores que indican que el proveedor está saturado o caído (los 4xx no cuentan)
+OVERLOAD_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+def is_overload_error(error: BaseException) -> bool:
+    return isinstance(error, OVERLOAD_ERRORS)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def _parse_reset(value: str) -> Optional[float]:
+    """Duraciones de x-ratelimit-reset-* como `20ms`, `1s` o `6m0s`."""
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+def retry_after_from(error: BaseException) -> Optional[float]:
+    """
+    Segundos de espera indicados por el proveedor en la respuesta de `error`:
+    retry-after-ms, retry-after (segundos o fecha HTTP) o, si se agotó la
+    cuota de peticiones o de tokens, su x-ratelimit-reset-*.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            value = headers["retry-after"]
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    resets = [
+        _parse_reset(headers.get(f"x-ratelimit-reset-{kind}", ""))
+        for kind in ("requests", "tokens")
+        if headers.get(f"x-ratelimit-remaining-{kind}") == "0"
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Espera antes del intento `attempt + 1`: exponencial con jitter (entre la
+    mitad y el total de `base * 2**attempt`, hasta `cap`). Si el proveedor
+    indicó un Retry-After se espera al menos eso, más un jitter de hasta `base`
+    para que los clientes no vuelvan todos a la vez.
+    """
+    delay = min(cap, base * 2 ** attempt)
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+class AdaptiveLimiter:
+    """Límite de llamadas simultáneas con incremento aditivo y reducción multiplicativa."""
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 16,
+                 decrease_factor: float = 0.5, decrease_cooldown: float = 1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.inflight = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Ocupa un hueco esperando como mucho `timeout` segundos; False si no lo consigue."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.inflight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.inflight += 1
+            return True
+
+    def release(self, overloaded: bool = False):
+        with self._condition:
+            self.inflight -= 1
+            now = time.monotonic()
+            if overloaded:
+                # Las llamadas que ya estaban en curso fallan juntas: una sola reducción por episodio
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    logger.warning(f"OpenAI overloaded: concurrency limit reduced to {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Libera un hueco sin ajustar el límite: la llamada no llegó a completarse."""
+        with self._condition:
+            self.inflight -= 1
+            self._condition.notify_all()
+
+class CircuitBreaker:
+    """Circuit breaker de tres estados (closed, open, half_open) para errores de sobrecarga."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 10.0,
+                 max_reset_seconds: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(self.open_until - time.monotonic(), 0.0)
+
+    def before_call(self):
+        """Lanza `OpenAIUnavailable` si el circuito no admite la llamada."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() >= self.open_until:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return
+            raise OpenAIUnavailable(
+                "OpenAI no está disponible temporalmente",
+                retry_after=max(self.retry_after(), 1.0), reason="circuit_open"
+            )
+
+    def abandon(self):
+        """La llamada admitida no llegó a enviarse (p. ej. rechazada por el limitador)."""
+        with self._lock:
+            self._probe_inflight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("OpenAI circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened = 0
+            self._probe_inflight = False
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN:
+                # Llamadas que ya estaban en curso al abrirse el circuito
+                return
+            self._probe_inflight = False
+            if self.state == self.CLOSED and self.failures < self.failure_threshold:
+                return
+            delay = backoff_delay(self.opened, self.reset_seconds, self.max_reset_seconds, retry_after)
+            self.opened += 1
+            self.state = self.OPEN
+            self.open_until = time.monotonic() + delay
+            logger.warning(f"OpenAI circuit open for {delay:.1f}s after {self.failures} overload errors")
+
+class OpenAIGuard:
+    """Limitador y circuit breaker compartidos por todas las llamadas a OpenAI del proceso."""
+
+    def __init__(self):
+        self.limiter = AdaptiveLimiter()
+        self.breaker = CircuitBreaker()
+        self.queue_timeout = 2.0
+
+    def configure(self, settings):
+        self.limiter = AdaptiveLimiter(
+            initial=settings.concurrency_initial,
+            minimum=settings.concurrency_min,
+            maximum=settings.concurrency_max
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.breaker_failures,
+            reset_seconds=settings.breaker_reset_seconds,
+            max_reset_seconds=settings.breaker_max_reset_seconds
+        )
+        self.queue_timeout = settings.queue_timeout
+
+    def acquire(self):
+        """Admite una llamada o lanza `OpenAIUnavailable`. Cada admisión requiere un `release`."""
+        self.breaker.before_call()
+        if not self.limiter.acquire(self.queue_timeout):
+            self.breaker.abandon()
+            raise OpenAIUnavailable(
+                "Demasiadas llamadas a OpenAI en curso",
+                retry_after=max(self.queue_timeout, 1.0), reason="concurrency"
+            )
+
+    def release(self, error: Optional[BaseException] = None):
+        """Cierra una llamada admitida con su resultado (`error` None si fue bien)."""
+        overloaded = error is not None and is_overload_error(error)
+        if overloaded:
+            self.breaker.record_failure(retry_after_from(error))
+        else:
+            # Cualquier respuesta que no sea de sobrecarga indica que el proveedor atiende
+            self.breaker.record_success()
+        self.limiter.release(overloaded)
+
+    def cancel(self):
+        """Cierra una llamada admitida que se canceló sin respuesta: no cuenta como éxito ni fallo."""
+        self.breaker.abandon()
+        self.limiter.cancel()
+
+OPENAI_GUARD = OpenAIGuard()
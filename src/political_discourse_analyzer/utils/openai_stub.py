@@ -0,0 +1,621 @@
+# src/political_discourse_analyzer/utils/openai_stub.py
+"""
+Servidor local que imita los endpoints de OpenAI que usa la aplicación
+(vector_stores, files, assistants, threads/runs en streaming, messages,
+embeddings y chat.completions) para pruebas de extremo a extremo y de carga sin
+red ni claves reales.
+
+Se selecciona por URL base: basta con `OPENAI_BASE_URL=http://127.0.0.1:8100/v1`.
+La latencia y los errores se inyectan con las opciones de línea de comandos o,
+por cliente, con un prefijo en la URL base:
+
+    http://127.0.0.1:8100/faults/latency=0.3,error_rate=0.05,error_status=429/v1
+
+Uso:
+    python -m political_discourse_analyzer.utils.openai_stub --port 8100 --latency 0.2
+"""
+import re
+import ast
+import json
+import time
+import uuid
+import base64
+import random
+import socket
+import asyncio
+import hashlib
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+FAULTS_PATTERN = re.compile(r"^/faults/([^/]*)(/.*)$")
+DEFAULT_PARTIES = ['PSOE', 'PP', 'Vox', 'Sumar']
+
+class FaultProfile(BaseModel):
+    """Latencia y errores inyectados en cada petición."""
+    latency: float = Field(default=0.0, description="Segundos de espera antes de responder")
+    jitter: float = Field(default=0.0, description="Espera adicional aleatoria, uniforme en [0, jitter]")
+    stream_delay: float = Field(default=0.0, description="Segundos entre fragmentos de una respuesta en streaming")
+    error_rate: float = Field(default=0.0, description="Fracción de peticiones que fallan")
+    error_status: int = Field(default=500, description="Código HTTP de los errores inyectados")
+    retry_after: Optional[float] = Field(default=None, description="Cabecera Retry-After de los errores")
+
+    def with_spec(self, spec: str) -> 'FaultProfile':
+        """Aplica un prefijo de URL del tipo `latency=0.3,error_rate=0.05`."""
+        values = dict(item.split('=', 1) for item in spec.split(',') if '=' in item)
+        unknown = set(values) - set(type(self).model_fields)
+        if unknown:
+            raise ValueError(f"Parámetros de fallo desconocidos: {sorted(unknown)}")
+        return type(self).model_validate({**self.model_dump(), **values})
+
+# --- Respuestas deterministas ---
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+
+@lru_cache(maxsize=100000)
+def _token_vector(token: str, dimensions: int) -> np.ndarray:
+    return np.random.default_rng(_seed(token)).standard_normal(dimensions)
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """
+    Embedding determinista: suma normalizada de vectores aleatorios por palabra,
+    de modo que textos que comparten palabras tienen mayor similitud coseno.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower()) or [text]
+    vector = np.sum([_token_vector(token, dimensions) for token in tokens], axis=0)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def fake_topic_percentages(prompt: str) -> Dict[str, float]:
+    """
+    Respuesta determinista al prompt de clasificación de AnalyticsService: más
+    peso a las categorías que aparecen en la consulta y un ruido estable por hash.
+    """
+    categories_match = re.search(r"Las categorías son: (\[.*?\])", prompt)
+    query_match = re.search(r"Consulta: (.*)", prompt)
+    categories = ast.literal_eval(categories_match.group(1)) if categories_match else ['general']
+    query = query_match.group(1).lower() if query_match else prompt.lower()
+
+    rng = np.random.default_rng(_seed(query))
+    weights = rng.random(len(categories)) + np.array([
+        5.0 if category.replace('_', ' ').split()[0] in query else 0.0 for category in categories
+    ])
+    percentages = 100 * weights / weights.sum()
+    return {category: round(float(value), 2) for category, value in zip(categories, percentages)}
+
+def fake_assistant_answer(query: str, documents: List[str]) -> str:
+    """Respuesta con el formato que piden las instrucciones del asistente neutral."""
+    rng = np.random.default_rng(_seed(query))
+    topic_match = re.search(r"(?:sobre|en materia de|respecto a|para|en) (.+?)[?¿.]*$", query.strip())
+    topic = topic_match.group(1) if topic_match else "este tema"
+    sources = documents or [f"{party}_Generales2023.pdf" for party in DEFAULT_PARTIES]
+
+    lines = [f"Las principales propuestas sobre {topic} son:", ""]
+    cited = []
+    for index in range(1, int(rng.integers(2, 5)) + 1):
+        document = sources[int(rng.integers(len(sources)))]
+        party = document.rsplit('.', 1)[0].split('_')[0]
+        cited.append(document)
+        lines.append(f"{index}. **{party}: Propuesta {index} sobre {topic}**")
+        lines.append(f"   - Medidas concretas para mejorar {topic} ({document}, página {int(rng.integers(1, 120))})")
+        lines.append("")
+    lines.append("Referencias:")
+    lines.extend(f"   - Documento: {document}" for document in dict.fromkeys(cited))
+    return "\n".join(lines)
+
+def cite_documents(answer: str, file_ids: Dict[str, str]) -> Tuple[str, List[Dict]]:
+    """
+    Añade a cada documento de las referencias un marcador 【4:n†source】 con su
+    anotación `file_citation`, como hace file_search en la API real.
+    """
+    lines, annotations, length = [], [], 0
+    for line in answer.split("\n"):
+        if line.strip().startswith("- Documento: "):
+            document = line.strip().removeprefix("- Documento: ")
+            marker = f"【4:{len(annotations)}†source】"
+            start = length + len(line)
+            annotations.append({
+                "type": "file_citation",
+                "text": marker,
+                "start_index": start,
+                "end_index": start + len(marker),
+                "file_citation": {
+                    "file_id": file_ids.get(document)
+                    or f"file-{hashlib.sha256(document.encode('utf-8')).hexdigest()[:24]}"
+                }
+            })
+            line += marker
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines), annotations
+
+def _chunks(text: str, size: int = 24) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+# --- Estado en memoria ---
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+def _error(status: int, message: str, error_type: str = "invalid_request_error",
+           headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        headers=headers
+    )
+
+def _list(data: List[Dict]) -> Dict:
+    return {
+        "object": "list",
+        "data": data,
+        "first_id": data[0]["id"] if data else None,
+        "last_id": data[-1]["id"] if data else None,
+        "has_more": False
+    }
+
+def _text_content(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if part.get("type") == "text")
+
+class StubState:
+    """Objetos creados por los clientes. Se pierden al reiniciar el servidor."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict] = {}
+        self.vector_stores: Dict[str, Dict] = {}
+        self.vector_store_files: Dict[str, List[str]] = {}
+        self.assistants: Dict[str, Dict] = {}
+        self.threads: Dict[str, Dict] = {}
+        self.messages: Dict[str, List[Dict]] = {}
+        self.runs: Dict[str, Dict] = {}
+        self.requests: Dict[str, int] = {}
+
+    def add_message(self, thread_id: str, role: str, content, annotations: Optional[List[Dict]] = None,
+                    **fields) -> Dict:
+        message = {
+            "id": _new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": _text_content(content),
+                                                  "annotations": annotations or []}}],
+            "assistant_id": None,
+            "run_id": None,
+            "attachments": [],
+            "metadata": {},
+            "status": "completed",
+            **fields
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+    def create_thread(self, messages: Optional[List[Dict]] = None, metadata: Optional[Dict] = None) -> Dict:
+        thread = {
+            "id": _new_id("thread"),
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": metadata or {},
+            "tool_resources": {}
+        }
+        self.threads[thread["id"]] = thread
+        self.messages[thread["id"]] = []
+        for message in messages or []:
+            self.add_message(thread["id"], message.get("role", "user"), message["content"])
+        return thread
+
+    def documents(self, assistant_id: str) -> Dict[str, str]:
+        """Nombre -> id de los ficheros de los vector stores del asistente."""
+        assistant = self.assistants.get(assistant_id, {})
+        store_ids = (assistant.get("tool_resources") or {}).get("file_search", {}).get("vector_store_ids", [])
+        return {
+            self.files[file_id]["filename"]: file_id
+            for store_id in store_ids
+            for file_id in self.vector_store_files.get(store_id, [])
+            if file_id in self.files
+        }
+
+def create_stub_app(faults: Optional[FaultProfile] = None, seed: Optional[int] = None) -> FastAPI:
+    """Crea la aplicación del servidor con su propio estado y perfil de fallos por defecto."""
+    app = FastAPI(title="OpenAI stand-in")
+    state = StubState()
+    default_faults = faults or FaultProfile()
+    rng = random.Random(seed)
+    app.state.stub = state
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        profile = default_faults
+        match = FAULTS_PATTERN.match(request.scope["path"])
+        if match:
+            try:
+                profile = default_faults.with_spec(match.group(1))
+            except ValueError as e:
+                return _error(400, str(e))
+            request.scope["path"] = match.group(2)
+        request.state.faults = profile
+
+        endpoint = request.scope["path"].removeprefix("/v1")
+        state.requests[endpoint] = state.requests.get(endpoint, 0) + 1
+
+        delay = profile.latency + (rng.uniform(0, profile.jitter) if profile.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if profile.error_rate and rng.random() < profile.error_rate:
+            headers = {"retry-after": str(profile.retry_after)} if profile.retry_after is not None else None
+            error_type = "rate_limit_exceeded" if profile.error_status == 429 else "server_error"
+            return _error(profile.error_status, "Error inyectado por el servidor de pruebas", error_type, headers)
+        return await call_next(request)
+
+    # --- Files ---
+
+    @app.post("/v1/files")
+    async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        content = await file.read()
+        stored = {
+            "id": _new_id("file"),
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": file.filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+        state.files[stored["id"]] = stored
+        return stored
+
+    @app.get("/v1/files/{file_id}")
+    async def retrieve_file(file_id: str):
+        if file_id not in state.files:
+            return _error(404, f"No such File object: {file_id}")
+        return state.files[file_id]
+
+    # --- Vector stores ---
+
+    def vector_store_file(store_id: str, file_id: str) -> Dict:
+        return {
+            "id": file_id,
+            "object": "vector_store.file",
+            "created_at": int(time.time()),
+            "vector_store_id": store_id,
+            "status": "completed",
+            "usage_bytes": state.files.get(file_id, {}).get("bytes", 0),
+            "last_error": None
+        }
+
+    @app.get("/v1/vector_stores")
+    async def list_vector_stores():
+        return _list(list(state.vector_stores.values()))
+
+    @app.post("/v1/vector_stores")
+    async def create_vector_store(request: Request):
+        body = await request.json()
+        store = {
+            "id": _new_id("vs"),
+            "object": "vector_store",
+            "created_at": int(time.time()),
+            "name": body.get("name"),
+            "status": "completed",
+            "usage_bytes": 0,
+            "file_counts": {"in_progress": 0, "completed": 0, "failed": 0, "cancelled": 0, "total": 0},
+            "expires_after": body.get("expires_after"),
+            "last_active_at": int(time.time()),
+            "metadata": body.get("metadata") or {}
+        }
+        state.vector_stores[store["id"]] = store
+        state.vector_store_files[store["id"]] = list(body.get("file_ids") or [])
+        return store
+
+    @app.delete("/v1/vector_stores/{store_id}")
+    async def delete_vector_store(store_id: str):
+        if state.vector_stores.pop(store_id, None) is None:
+            return _error(404, f"No such vector store: {store_id}")
+        state.vector_store_files.pop(store_id, None)
+        return {"id": store_id, "object": "vector_store.deleted", "deleted": True}
+
+    @app.get("/v1/vector_stores/{store_id}/files")
+    async def list_vector_store_files(store_id: str):
+        if store_id not in state.vector_stores:
+            return _error(404, f"No such vector store: {store_id}")
+        return _list([vector_store_file(store_id, file_id) for file_id in state.vector_store_files[store_id]])
+
+    @app.post("/v1/vector_stores/{store_id}/file_batches")
+    async def create_file_batch(store_id: str, request: Request):
+        if store_id not in state.vector_stores:
+            return _error(404, f"No such vector store: {store_id}")
+        file_ids = (await request.json()).get("file_ids", [])
+        state.vector_store_files[store_id].extend(file_ids)
+        counts = state.vector_stores[store_id]["file_counts"]
+        counts["completed"] += len(file_ids)
+        counts["total"] += len(file_ids)
+        return {
+            "id": _new_id("vsfb"),
+            "object": "vector_store.files_batch",
+            "created_at": int(time.time()),
+            "vector_store_id": store_id,
+            "status": "completed",
+            "file_counts": {"in_progress": 0, "completed": len(file_ids), "failed": 0,
+                            "cancelled": 0, "total": len(file_ids)}
+        }
+
+    # --- Assistants ---
+
+    @app.get("/v1/assistants")
+    async def list_assistants():
+        return _list(list(state.assistants.values()))
+
+    @app.post("/v1/assistants")
+    async def create_assistant(request: Request):
+        body = await request.json()
+        assistant = {
+            "id": _new_id("asst"),
+            "object": "assistant",
+            "created_at": int(time.time()),
+            "description": None,
+            "tools": [],
+            "tool_resources": {},
+            "metadata": {},
+            **body
+        }
+        state.assistants[assistant["id"]] = assistant
+        return assistant
+
+    @app.post("/v1/assistants/{assistant_id}")
+    async def update_assistant(assistant_id: str, request: Request):
+        if assistant_id not in state.assistants:
+            return _error(404, f"No assistant found with id '{assistant_id}'.")
+        state.assistants[assistant_id].update(await request.json())
+        return state.assistants[assistant_id]
+
+    # --- Threads y mensajes ---
+
+    @app.post("/v1/threads")
+    async def create_thread(request: Request):
+        body = await request.json() if await request.body() else {}
+        return state.create_thread(body.get("messages"), body.get("metadata"))
+
+    @app.get("/v1/threads/{thread_id}")
+    async def retrieve_thread(thread_id: str):
+        if thread_id not in state.threads:
+            return _error(404, f"No thread found with id '{thread_id}'.")
+        return state.threads[thread_id]
+
+    @app.post("/v1/threads/{thread_id}/messages")
+    async def create_message(thread_id: str, request: Request):
+        if thread_id not in state.threads:
+            return _error(404, f"No thread found with id '{thread_id}'.")
+        body = await request.json()
+        return state.add_message(thread_id, body.get("role", "user"), body["content"],
+                                 metadata=body.get("metadata") or {})
+
+    @app.get("/v1/threads/{thread_id}/messages")
+    async def list_messages(thread_id: str, order: str = "desc", limit: int = 20, run_id: Optional[str] = None):
+        if thread_id not in state.threads:
+            return _error(404, f"No thread found with id '{thread_id}'.")
+        messages = [m for m in state.messages[thread_id] if run_id is None or m["run_id"] == run_id]
+        if order == "desc":
+            messages = messages[::-1]
+        return _list(messages[:limit])
+
+    # --- Runs ---
+
+    def start_run(thread_id: str, body: Dict) -> Dict:
+        for message in body.get("additional_messages") or []:
+            state.add_message(thread_id, message.get("role", "user"), message["content"])
+        assistant_id = body.get("assistant_id")
+        run = {
+            "id": _new_id("run"),
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "status": "queued",
+            "model": body.get("model") or state.assistants.get(assistant_id, {}).get("model", "gpt-4-turbo-preview"),
+            "instructions": body.get("instructions") or state.assistants.get(assistant_id, {}).get("instructions", ""),
+            "tools": state.assistants.get(assistant_id, {}).get("tools", []),
+            "metadata": body.get("metadata") or {},
+            "parallel_tool_calls": True,
+            "usage": None
+        }
+        state.runs[run["id"]] = run
+        return run
+
+    def answer_for(run: Dict) -> Tuple[str, List[Dict]]:
+        """Texto de la respuesta y sus anotaciones de citas."""
+        user_messages = [m for m in state.messages[run["thread_id"]] if m["role"] == "user"]
+        query = user_messages[-1]["content"][0]["text"]["value"] if user_messages else ""
+        # Las consultas llegan precedidas de las instrucciones de contexto de AssistantService
+        query = query.rsplit("Consulta del usuario:", 1)[-1].strip()
+        documents = state.documents(run["assistant_id"])
+        return cite_documents(fake_assistant_answer(query, list(documents)), documents)
+
+    def complete_run(run: Dict, answer: str, annotations: List[Dict]) -> Dict:
+        run.update(
+            status="completed",
+            completed_at=int(time.time()),
+            usage={"prompt_tokens": 500, "completion_tokens": len(answer.split()),
+                   "total_tokens": 500 + len(answer.split())}
+        )
+        return state.add_message(run["thread_id"], "assistant", answer, annotations,
+                                 assistant_id=run["assistant_id"], run_id=run["id"])
+
+    def sse(event: str, data) -> str:
+        payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+        return f"event: {event}\ndata: {payload}\n\n"
+
+    async def stream_run(run: Dict, delay: float):
+        """Eventos del streaming de la Assistants API para un run que responde con texto."""
+        yield sse("thread.run.created", run)
+        yield sse("thread.run.queued", run)
+        run["status"] = "in_progress"
+        yield sse("thread.run.in_progress", run)
+
+        answer, annotations = answer_for(run)
+        message_id = _new_id("msg")
+        draft = {
+            "id": message_id, "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": run["thread_id"], "role": "assistant", "content": [],
+            "assistant_id": run["assistant_id"], "run_id": run["id"], "attachments": [],
+            "metadata": {}, "status": "in_progress"
+        }
+        yield sse("thread.message.created", draft)
+        yield sse("thread.message.in_progress", draft)
+        for chunk in _chunks(answer):
+            if delay:
+                await asyncio.sleep(delay)
+            yield sse("thread.message.delta", {
+                "id": message_id,
+                "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": chunk, "annotations": []}}]}
+            })
+
+        message = complete_run(run, answer, annotations)
+        message["id"] = message_id
+        yield sse("thread.message.completed", message)
+        yield sse("thread.run.completed", run)
+        yield sse("done", "[DONE]")
+
+    def run_response(request: Request, run: Dict, body: Dict):
+        if body.get("stream"):
+            return StreamingResponse(stream_run(run, request.state.faults.stream_delay),
+                                     media_type="text/event-stream")
+        complete_run(run, *answer_for(run))
+        return run
+
+    @app.post("/v1/threads/runs")
+    async def create_thread_and_run(request: Request):
+        body = await request.json()
+        thread_body = body.get("thread") or {}
+        thread = state.create_thread(thread_body.get("messages"), thread_body.get("metadata"))
+        return run_response(request, start_run(thread["id"], body), body)
+
+    @app.post("/v1/threads/{thread_id}/runs")
+    async def create_run(thread_id: str, request: Request):
+        if thread_id not in state.threads:
+            return _error(404, f"No thread found with id '{thread_id}'.")
+        body = await request.json()
+        return run_response(request, start_run(thread_id, body), body)
+
+    @app.get("/v1/threads/{thread_id}/runs/{run_id}")
+    async def retrieve_run(thread_id: str, run_id: str):
+        run = state.runs.get(run_id)
+        if not run or run["thread_id"] != thread_id:
+            return _error(404, f"No run found with id '{run_id}'.")
+        return run
+
+    # --- Embeddings y chat ---
+
+    @app.post("/v1/embeddings")
+    async def create_embeddings(request: Request):
+        body = await request.json()
+        inputs = [body["input"]] if isinstance(body["input"], str) else body["input"]
+        dimensions = body.get("dimensions") or EMBEDDING_DIMENSIONS
+        data = []
+        for index, text in enumerate(inputs):
+            embedding = fake_embedding(text, dimensions)
+            if body.get("encoding_format") == "base64":
+                # El SDK pide base64 por defecto y lo decodifica como float32
+                embedding = base64.b64encode(np.asarray(embedding, dtype='<f4').tobytes()).decode('ascii')
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(len(text.split()) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    @app.post("/v1/chat/completions")
+    async def create_chat_completion(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return _error(400, "El servidor de pruebas no implementa chat.completions en streaming")
+        prompt = _text_content(body["messages"][-1]["content"])
+        if "Las categorías son:" in prompt:
+            content = json.dumps(fake_topic_percentages(prompt), ensure_ascii=False)
+        else:
+            content = fake_assistant_answer(prompt, [])
+        prompt_tokens, completion_tokens = len(prompt.split()), len(content.split())
+        return {
+            "id": _new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "logprobs": None,
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    return app
+
+@contextmanager
+def run_stub_server(faults: Optional[FaultProfile] = None,
+                    host: str = "127.0.0.1",
+                    port: int = 0,
+                    seed: Optional[int] = None) -> Iterator[str]:
+    """
+    Arranca el servidor en un hilo y devuelve su URL base (`.../v1`). Con
+    `port=0` se elige un puerto libre. Pensado para tests y pruebas de carga.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    config = uvicorn.Config(create_stub_app(faults, seed), log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("El servidor de pruebas de OpenAI no ha arrancado")
+            time.sleep(0.01)
+        yield f"http://{host}:{sock.getsockname()[1]}/v1"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos antes de cada respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Espera adicional aleatoria máxima")
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="Segundos entre fragmentos en streaming")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones que fallan")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, help="Cabecera Retry-After de los errores")
+    parser.add_argument("--seed", type=int, help="Semilla de la latencia y los errores")
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        stream_delay=args.stream_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after
+    )
+    logger.info(f"OpenAI stand-in en http://{args.host}:{args.port}/v1 con {faults}")
+    uvicorn.run(create_stub_app(faults, args.seed), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
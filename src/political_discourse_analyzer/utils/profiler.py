@@ -0,0 +1,162 @@
+# src/political_discourse_analyzer/utils/profiler.py
+"""
+Perfilado bajo demanda de peticiones individuales.
+
+`ProfilerMiddleware` perfila una petición cuando trae la cabecera
+`X-Profile` con el token configurado o cuando le toca por muestreo, y guarda
+el resultado en el directorio de perfiles:
+
+- modo `sampling`: un hilo muestrea la pila del hilo que atiende la petición
+  cada `interval_ms` y escribe las pilas en formato "collapsed"
+  (`flamegraph.pl`, speedscope, inferno).
+- modo `cprofile`: estadísticas de cProfile (`.prof`, para snakeviz o pstats).
+
+Los dos modos ven todo lo que se ejecuta en ese hilo durante la petición: en
+el bucle de eventos eso incluye otras peticiones concurrentes, por lo que sólo
+se perfila una petición a la vez. El middleware sólo se registra si el
+perfilado está activado, así que desactivado no tiene coste.
+"""
+import os
+import sys
+import time
+import hmac
+import random
+import cProfile
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Muestrea periódicamente la pila de un hilo y cuenta las pilas repetidas."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def write(self, path: Path):
+        """Escribe las pilas en formato collapsed: `marco;marco;... muestras`."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class _CProfileProfiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path: Path):
+        self.profile.dump_stats(str(path))
+
+class ProfilerMiddleware:
+    """Middleware ASGI que perfila las peticiones seleccionadas."""
+
+    EXTENSIONS = {"sampling": "collapsed", "cprofile": "prof"}
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.settings = settings
+        self.output_dir = Path(settings.output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._busy = threading.Lock()
+
+    def _triggered(self, scope: Dict) -> bool:
+        token = self.settings.token
+        if token:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER.encode() and hmac.compare_digest(value, token.encode()):
+                    return True
+        return self.settings.sample_rate > 0 and random.random() < self.settings.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._triggered(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            # Ya se está perfilando otra petición en este proceso
+            await self.app(scope, receive, send)
+            return
+
+        if self.settings.mode == "cprofile":
+            profiler = _CProfileProfiler()
+        else:
+            profiler = SamplingProfiler(threading.get_ident(), self.settings.interval_ms / 1000)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                if duration_ms >= self.settings.min_duration_ms:
+                    self._save(profiler, scope, status, duration_ms)
+            except Exception as e:
+                logger.warning(f"Error saving request profile: {str(e)}")
+            finally:
+                self._busy.release()
+
+    def _save(self, profiler, scope: Dict, status: int, duration_ms: float):
+        route = getattr(scope.get("route"), "path", scope.get("path", ""))
+        route = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        name = (f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{scope['method']}_{route}_{status}_"
+                f"{duration_ms:.0f}ms.{self.EXTENSIONS[self.settings.mode]}")
+        path = self.output_dir / name
+        profiler.write(path)
+        logger.info(f"Request profile written to {path}")
+        self._rotate()
+
+    def _rotate(self):
+        """Conserva sólo los `max_files` perfiles más recientes."""
+        profiles = sorted(
+            (p for p in self.output_dir.iterdir() if p.suffix.lstrip(".") in self.EXTENSIONS.values()),
+            key=lambda p: p.name
+        )
+        for old in profiles[:-self.settings.max_files]:
+            old.unlink(missing_ok=True)
@@ -0,0 +1,142 @@
+# src/political_discourse_analyzer/utils/report_build.py
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "build_manifest.json"
+
+class BuildStage(NamedTuple):
+    name: str
+    run: Callable[..., Any]
+    deps: Sequence[str]
+    inputs: Dict
+    outputs: Optional[Callable[[Any], List[str]]]
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ReportBuild:
+    """
+    Ejecuta las etapas de un informe como un pequeño make: cada etapa declara
+    sus dependencias y sus entradas externas (versión de datos, parámetros), y
+    se omite si la clave calculada con esas entradas y con los hashes de salida
+    de sus dependencias coincide con la del manifiesto y sus ficheros siguen
+    intactos. Si una etapa se repite pero su salida no cambia, las siguientes
+    tampoco se repiten.
+
+    El valor de cada etapa se guarda en `cache_dir` y sólo se carga si alguna
+    etapa posterior tiene que ejecutarse.
+    """
+
+    def __init__(self, cache_dir: str, force: bool = False):
+        self.cache_dir = cache_dir
+        self.force = force
+        self.stages: Dict[str, BuildStage] = {}
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {}
+        self._values: Dict[str, Any] = {}
+
+    def stage(self,
+              name: str,
+              run: Callable[..., Any],
+              deps: Sequence[str] = (),
+              inputs: Optional[Dict] = None,
+              outputs: Optional[Callable[[Any], List[str]]] = None):
+        """
+        Registra una etapa. `run` recibe los valores de `deps` en orden y puede ser
+        asíncrona; `outputs` devuelve, a partir del valor, los ficheros que genera.
+        Las etapas se registran en orden topológico.
+        """
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"La etapa {name} depende de etapas no registradas: {missing}")
+        self.stages[name] = BuildStage(name, run, tuple(deps), inputs or {}, outputs)
+
+    def _stage_key(self, stage: BuildStage) -> str:
+        payload = json.dumps({
+            'name': stage.name,
+            'inputs': stage.inputs,
+            'deps': {dep: self.manifest[dep]['output_hash'] for dep in stage.deps}
+        }, sort_keys=True, default=str)
+        return _hash_bytes(payload.encode('utf-8'))
+
+    def _value_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def _is_fresh(self, stage: BuildStage, key: str) -> bool:
+        entry = self.manifest.get(stage.name)
+        if self.force or not entry or entry['key'] != key:
+            return False
+        if not os.path.exists(self._value_path(stage.name)):
+            return False
+        return all(
+            os.path.exists(path) and _hash_file(path) == file_hash
+            for path, file_hash in entry['files'].items()
+        )
+
+    def _value(self, name: str) -> Any:
+        if name not in self._values:
+            with open(self._value_path(name), 'rb') as f:
+                self._values[name] = pickle.load(f)
+        return self._values[name]
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    async def run(self) -> Dict[str, str]:
+        """Ejecuta las etapas necesarias y devuelve {etapa: "built" | "unchanged" | "skipped"}."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        status = {}
+        for stage in self.stages.values():
+            key = self._stage_key(stage)
+            if self._is_fresh(stage, key):
+                status[stage.name] = "skipped"
+                continue
+
+            value = stage.run(*[self._value(dep) for dep in stage.deps])
+            if inspect.isawaitable(value):
+                value = await value
+            self._values[stage.name] = value
+
+            data = pickle.dumps(value)
+            tmp_path = f"{self._value_path(stage.name)}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._value_path(stage.name))
+
+            # La salida incluye el contenido de los ficheros, no sólo el valor devuelto
+            files = {path: _hash_file(path) for path in (stage.outputs(value) if stage.outputs else [])}
+            output_hash = _hash_bytes(data + json.dumps(files, sort_keys=True).encode('utf-8'))
+
+            previous = self.manifest.get(stage.name, {})
+            status[stage.name] = "unchanged" if previous.get('output_hash') == output_hash else "built"
+            self.manifest[stage.name] = {'key': key, 'output_hash': output_hash, 'files': files}
+            # Se guarda tras cada etapa para no repetir trabajo si falla una posterior
+            self._save_manifest()
+
+        logger.info(f"Report build: {status}")
+        return status
+
+    def value(self, name: str) -> Any:
+        """Valor de una etapa, cargado de la caché si no se ejecutó en esta pasada."""
+        return self._value(name)
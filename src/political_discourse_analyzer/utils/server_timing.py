@@ -0,0 +1,70 @@
+# src/political_discourse_analyzer/utils/server_timing.py
+"""
+Desglose de tiempos por petición para la cabecera `Server-Timing`.
+
+El middleware de la API abre una colección por petición y las etapas medidas
+(`metrics.stage`, `metrics.timed`, las llamadas a OpenAI y las sentencias SQL)
+suman su duración a la colección activa. Fuera de una petición no se registra
+nada.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+class RequestTimings:
+    """Duración acumulada y número de veces de cada etapa de una petición."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.entries: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float):
+        entry = self.entries.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def header(self) -> str:
+        """Valor de la cabecera `Server-Timing`, con el total al final."""
+        metrics = []
+        for name, (seconds, count) in list(self.entries.items()):
+            metric = f"{_INVALID_NAME_CHARS.sub('_', name)};dur={seconds * 1000:.1f}"
+            if count > 1:
+                metric += f';desc="{count}x"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> Dict:
+        """Desglose para el campo `debug.timings` de la respuesta."""
+        return {
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "stages": {
+                name: {"ms": round(seconds * 1000, 1), "count": count}
+                for name, (seconds, count) in list(self.entries.items())
+            }
+        }
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("pda_request_timings", default=None)
+
+def record_timing(name: str, seconds: float):
+    """Suma `seconds` a la etapa `name` de la petición en curso, si la hay."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+@contextmanager
+def collect_timings():
+    """Abre la colección de tiempos de una petición."""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
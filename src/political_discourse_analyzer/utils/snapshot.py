@@ -0,0 +1,329 @@
+# src/political_discourse_analyzer/utils/snapshot.py
+import os
+import sys
+import json
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from political_discourse_analyzer.services.database_service import (
+    DatabaseService, Interaction, InteractionTopicScore
+)
+from political_discourse_analyzer.services.analytics_service import SCORING_METHODS, SCORING_VERSION
+from political_discourse_analyzer.utils.export_interactions import EXPORT_COLUMNS, iter_interactions
+from political_discourse_analyzer.utils.topic_trends import ROLLUP_COLUMNS, compute_topic_trends
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "_manifest.json"
+SCORE_COLUMNS = ['id', 'interaction_id', 'method', 'category', 'score', 'scoring_version', 'mode', 'timestamp']
+
+def _require(module: str):
+    """Importa una dependencia opcional de los snapshots con un error claro."""
+    try:
+        return __import__(module)
+    except ImportError:
+        raise ImportError(
+            f"Los snapshots requieren '{module}'. Instálalo con: poetry install --extras snapshots"
+        )
+
+def _read_manifest(snapshot_dir: Path) -> Dict:
+    manifest_path = snapshot_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text(encoding='utf-8'))
+    return {"last_interaction_id": 0, "last_score_id": 0, "rows": {"interactions": 0, "topic_scores": 0}}
+
+def _write_manifest(snapshot_dir: Path, manifest: Dict):
+    tmp_path = snapshot_dir / (MANIFEST_FILE + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    os.replace(tmp_path, snapshot_dir / MANIFEST_FILE)
+
+def _iter_batches(rows: Iterator, batch_size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _iter_scores(db_service: DatabaseService, after_id: int, batch_size: int) -> Iterator:
+    with db_service.SessionLocal() as db:
+        query = db.query(
+            InteractionTopicScore.id,
+            InteractionTopicScore.interaction_id,
+            InteractionTopicScore.method,
+            InteractionTopicScore.category,
+            InteractionTopicScore.score,
+            InteractionTopicScore.scoring_version,
+            Interaction.mode,
+            Interaction.timestamp
+        ).join(
+            Interaction, Interaction.id == InteractionTopicScore.interaction_id
+        ).filter(InteractionTopicScore.id > after_id)
+        yield from query.order_by(InteractionTopicScore.id).yield_per(batch_size)
+
+def _write_partitioned(table_dir: Path, columns: List[str], batch: List) -> None:
+    """Escribe un lote en ficheros Parquet particionados por día."""
+    pa = _require('pyarrow')
+    import pyarrow.parquet as pq
+
+    data = {column: [row[i] for row in batch] for i, column in enumerate(columns)}
+    data['day'] = [timestamp.date().isoformat() if timestamp else None for timestamp in data['timestamp']]
+    # Nombre determinista por primer id: si se repite un lote tras un fallo, se sobrescribe
+    pq.write_to_dataset(
+        pa.table(data),
+        root_path=str(table_dir),
+        partition_cols=['day'],
+        basename_template=f"part-{batch[0][0]:012d}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+def create_snapshot(db_service: DatabaseService, snapshot_dir: str, batch_size: int = 50000) -> Dict:
+    """
+    Añade al snapshot las interacciones y puntuaciones de temas nuevas desde la
+    última ejecución. Las tablas se guardan como Parquet particionado por día en
+    `interactions/` y `topic_scores/`, y el progreso en `_manifest.json`.
+    """
+    snapshot_path = Path(snapshot_dir)
+    snapshot_path.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(snapshot_path)
+
+    for batch in _iter_batches(
+        iter_interactions(db_service, after_id=manifest['last_interaction_id'], batch_size=batch_size),
+        batch_size
+    ):
+        _write_partitioned(snapshot_path / 'interactions', EXPORT_COLUMNS, batch)
+        manifest['last_interaction_id'] = batch[-1][0]
+        manifest['rows']['interactions'] += len(batch)
+        _write_manifest(snapshot_path, manifest)
+
+    for batch in _iter_batches(_iter_scores(db_service, manifest['last_score_id'], batch_size), batch_size):
+        _write_partitioned(snapshot_path / 'topic_scores', SCORE_COLUMNS, batch)
+        manifest['last_score_id'] = batch[-1][0]
+        manifest['rows']['topic_scores'] += len(batch)
+        _write_manifest(snapshot_path, manifest)
+
+    manifest['updated_at'] = datetime.utcnow().isoformat()
+    _write_manifest(snapshot_path, manifest)
+    logger.info(
+        f"Snapshot actualizado: {manifest['rows']['interactions']} interacciones, "
+        f"{manifest['rows']['topic_scores']} puntuaciones"
+    )
+    return manifest
+
+class SnapshotStore:
+    """
+    Fuente de datos para el análisis basada en un snapshot Parquet, consultado
+    con DuckDB. Ofrece la misma interfaz que usa CitizenInterestAnalyzer de
+    AnalyticsService, pero sólo con las puntuaciones ya guardadas.
+    """
+
+    def __init__(self, snapshot_dir: str, scoring_version: str = SCORING_VERSION):
+        duckdb = _require('duckdb')
+        self.snapshot_dir = Path(snapshot_dir)
+        self.scoring_version = scoring_version
+        if not (self.snapshot_dir / 'interactions').exists():
+            raise FileNotFoundError(f"No se encontró un snapshot en {snapshot_dir}")
+        self.con = duckdb.connect()
+        self.con.execute(f"CREATE VIEW interactions AS {self._scan('interactions')}")
+        if (self.snapshot_dir / 'topic_scores').exists():
+            self.con.execute(f"CREATE VIEW topic_scores AS {self._scan('topic_scores')}")
+        else:
+            self.con.execute(
+                "CREATE VIEW topic_scores AS SELECT NULL::BIGINT AS id, NULL::BIGINT AS interaction_id, "
+                "NULL::VARCHAR AS method, NULL::VARCHAR AS category, NULL::DOUBLE AS score, "
+                "NULL::VARCHAR AS scoring_version, NULL::VARCHAR AS mode, "
+                "NULL::TIMESTAMP AS timestamp, NULL::DATE AS day WHERE false"
+            )
+
+    def _scan(self, table: str) -> str:
+        # Un lote repetido tras un fallo puede dejar filas duplicadas: se quedan por id
+        pattern = (self.snapshot_dir / table / '**' / '*.parquet').as_posix()
+        return (
+            f"SELECT * EXCLUDE (day), CAST(day AS DATE) AS day "
+            f"FROM read_parquet('{pattern}', hive_partitioning = true) "
+            f"QUALIFY row_number() OVER (PARTITION BY id) = 1"
+        )
+
+    @staticmethod
+    def _where(start_date: Optional[datetime], end_date: Optional[datetime],
+               mode: Optional[str], extra: Optional[List[str]] = None):
+        conditions, params = list(extra or []), []
+        if start_date:
+            conditions.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("timestamp <= ?")
+            params.append(end_date)
+        if mode is not None:
+            conditions.append("mode = ?")
+            params.append(mode)
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    def get_data_version(self,
+                         start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None,
+                         include_scores: bool = True) -> str:
+        """Token de versión del snapshot: cambia cuando se le añaden datos."""
+        manifest = _read_manifest(self.snapshot_dir)
+        version = f"snapshot-{manifest['last_interaction_id']}"
+        if include_scores:
+            version += f"-{manifest['last_score_id']}"
+        return f"{version}-v{self.scoring_version}"
+
+    def get_basic_statistics(self) -> Dict:
+        """Estadísticas básicas calculadas sobre el snapshot."""
+        total_interactions, total_conversations = self.con.execute(
+            "SELECT count(*), count(DISTINCT thread_id) FROM interactions"
+        ).fetchone()
+        modes_distribution = dict(self.con.execute(
+            "SELECT mode, count(DISTINCT thread_id) FROM interactions GROUP BY mode"
+        ).fetchall())
+        return {
+            "total_conversations": total_conversations,
+            "total_interactions": total_interactions,
+            "modes_distribution": modes_distribution,
+            "average_interactions": total_interactions / total_conversations if total_conversations > 0 else 0,
+            "unique_users": total_conversations
+        }
+
+    def iter_queries(self, batch_size: int = 10000) -> Iterator[str]:
+        """Recorre el texto de las consultas por lotes, leyendo sólo esa columna."""
+        # Cursor propio para no interferir con otras consultas de la conexión
+        cursor = self.con.cursor()
+        try:
+            cursor.execute("SELECT query FROM interactions ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (text,) in rows:
+                    yield text
+        finally:
+            cursor.close()
+
+    def get_topic_categories(self) -> List[str]:
+        rows = self.con.execute(
+            "SELECT DISTINCT category FROM topic_scores WHERE scoring_version = ? ORDER BY category",
+            [self.scoring_version]
+        ).fetchall()
+        return [category for (category,) in rows]
+
+    def iter_interaction_topic_shares(self,
+                                      start_date: Optional[datetime] = None,
+                                      end_date: Optional[datetime] = None,
+                                      mode: Optional[str] = None,
+                                      batch_size: int = 100000) -> Iterator[Tuple[int, str, float]]:
+        """Cuotas de cada tema por interacción, con la misma definición que DatabaseService."""
+        where, params = self._where(start_date, end_date, mode, ["scoring_version = ?"])
+        cursor = self.con.cursor()
+        try:
+            cursor.execute(
+                f"SELECT interaction_id, category, avg(coalesce(share, 0)) FROM ("
+                f"  SELECT interaction_id, category, score / nullif(sum(score) OVER ("
+                f"    PARTITION BY interaction_id, method), 0) AS share"
+                f"  FROM topic_scores{where}"
+                f") GROUP BY interaction_id, category ORDER BY interaction_id",
+                [self.scoring_version] + params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    async def get_topic_distribution(self,
+                                     start_date: Optional[datetime] = None,
+                                     end_date: Optional[datetime] = None,
+                                     mode: Optional[str] = None) -> Dict:
+        """Distribución de temas con la misma normalización que AnalyticsService."""
+        where, params = self._where(start_date, end_date, mode, ["scoring_version = ?"])
+        rows = self.con.execute(
+            f"SELECT method, category, sum(score), count(*) FROM topic_scores{where} "
+            f"GROUP BY method, category",
+            [self.scoring_version] + params
+        ).fetchall()
+
+        where, params = self._where(start_date, end_date, mode)
+        total = self.con.execute(f"SELECT count(*) FROM interactions{where}", params).fetchone()[0]
+        n_interactions = max((count for _, _, _, count in rows), default=0)
+        if not n_interactions:
+            return {
+                "status": "no_data",
+                "message": "No se encontraron interacciones puntuadas en el snapshot",
+                "pending_interactions": total
+            }
+
+        categories = sorted({category for _, category, _, _ in rows})
+        results = {method: {category: 0.0 for category in categories} for method in SCORING_METHODS}
+        for method, category, score_sum, count in rows:
+            results[method][category] = score_sum / count
+        results['combined_analysis'] = {
+            category: sum(results[method][category] for method in SCORING_METHODS) / 3
+            for category in categories
+        }
+        return {
+            "status": "success",
+            "total_interactions": n_interactions,
+            "pending_interactions": total - n_interactions,
+            "period": {
+                "start": start_date.isoformat() if start_date else "all",
+                "end": end_date.isoformat() if end_date else "all"
+            },
+            "results": results
+        }
+
+    async def get_topic_trends(self,
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               mode: Optional[str] = None,
+                               freq: str = 'D',
+                               window: int = 7,
+                               z_threshold: float = 3.0) -> Dict:
+        """Tendencias temporales calculadas con agregados diarios de DuckDB."""
+        where, params = self._where(None, None, mode, ["scoring_version = ?"])
+        if start_date:
+            where += " AND day >= ?"
+            params.append(start_date.date())
+        if end_date:
+            where += " AND day <= ?"
+            params.append(end_date.date())
+        rollups = self.con.execute(
+            f"SELECT day, method, category, sum(score) AS score_sum, count(*) AS interaction_count "
+            f"FROM topic_scores{where} GROUP BY day, method, category ORDER BY day",
+            [self.scoring_version] + params
+        ).df()
+        trends = compute_topic_trends(
+            rollups[ROLLUP_COLUMNS],
+            freq=freq,
+            window=window,
+            z_threshold=z_threshold,
+            start=start_date.date() if start_date else None,
+            end=end_date.date() if end_date else None
+        )
+        trends["period"] = {
+            "start": start_date.isoformat() if start_date else "all",
+            "end": end_date.isoformat() if end_date else "all"
+        }
+        return trends
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea o actualiza un snapshot Parquet de las interacciones")
+    parser.add_argument("--output", default="data/snapshots", help="Directorio del snapshot")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stdout)
+    load_dotenv()
+    create_snapshot(DatabaseService(), args.output, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# src/political_discourse_analyzer/utils/topic_relationships.py
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy import sparse
+
+RELATIONSHIP_MEASURES = ('correlation', 'pmi')
+
+def _rows_to_matrix(rows: List[Tuple], category_index: Dict[str, int]) -> np.ndarray:
+    ids, categories, scores = zip(*rows)
+    _, row_index = np.unique(np.asarray(ids), return_inverse=True)
+    column_index = np.fromiter((category_index[category] for category in categories),
+                               dtype=np.intp, count=len(categories))
+    matrix = np.zeros((row_index.max() + 1, len(category_index)))
+    matrix[row_index, column_index] = np.asarray(scores, dtype=float)
+    return matrix
+
+def iter_score_chunks(rows: Iterable[Tuple],
+                      categories: Sequence[str],
+                      chunk_size: int = 100000) -> Iterator[np.ndarray]:
+    """
+    Convierte filas (interaction_id, categoría, puntuación) ordenadas por
+    interacción en bloques densos de la matriz interacciones × categorías.
+
+    Las filas de una misma interacción nunca se reparten entre dos bloques, de
+    modo que cada fila de la matriz está completa. Las categorías desconocidas
+    se ignoran.
+    """
+    category_index = {category: i for i, category in enumerate(categories)}
+    rows = (row for row in rows if row[1] in category_index)
+    pending: List[Tuple] = []
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            break
+        pending.extend(batch)
+        # La última interacción puede continuar en el siguiente lote
+        last_id = pending[-1][0]
+        cut = len(pending)
+        while cut and pending[cut - 1][0] == last_id:
+            cut -= 1
+        if cut:
+            yield _rows_to_matrix(pending[:cut], category_index)
+            pending = pending[cut:]
+    if pending:
+        yield _rows_to_matrix(pending, category_index)
+
+def accumulate_cooccurrence(chunks: Iterable[np.ndarray],
+                            n_categories: int,
+                            measure: str = 'correlation',
+                            presence_threshold: Optional[float] = None) -> Dict:
+    """
+    Acumula en una pasada los estadísticos suficientes de la matriz de
+    puntuaciones: sumas y matriz de Gram para la correlación, o conteos de
+    presencia y coocurrencia para la PMI. Una categoría está presente en una
+    interacción si su puntuación supera `presence_threshold` (por defecto, el
+    reparto uniforme 1/k). La memoria depende sólo de k y del tamaño de bloque.
+    """
+    threshold = 1.0 / n_categories if presence_threshold is None else presence_threshold
+    stats = {"n": 0}
+    if measure == 'correlation':
+        stats.update(sums=np.zeros(n_categories), gram=np.zeros((n_categories, n_categories)))
+    else:
+        stats.update(presence=np.zeros(n_categories), cooccurrence=np.zeros((n_categories, n_categories)))
+
+    for chunk in chunks:
+        stats["n"] += chunk.shape[0]
+        if measure == 'correlation':
+            stats["sums"] += chunk.sum(axis=0)
+            stats["gram"] += chunk.T @ chunk
+        else:
+            # Conteos enteros por bloque: exactos en float32 y el doble de rápidos
+            present = (chunk > threshold).astype(np.float32)
+            stats["presence"] += present.sum(axis=0)
+            stats["cooccurrence"] += present.T @ present
+    return stats
+
+def correlation_from_stats(stats: Dict) -> np.ndarray:
+    """Correlación de Pearson entre categorías a partir de las sumas y la matriz de Gram."""
+    n = stats["n"]
+    mean = stats["sums"] / n
+    covariance = stats["gram"] / n - np.outer(mean, mean)
+    std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.outer(std, std)
+    correlation[~np.isfinite(correlation)] = np.nan
+    np.fill_diagonal(correlation, 1.0)
+    return np.clip(correlation, -1.0, 1.0)
+
+def npmi_from_stats(stats: Dict) -> np.ndarray:
+    """
+    PMI normalizada (en [-1, 1]) de la coocurrencia de categorías: -1 si nunca
+    aparecen juntas, 0 si son independientes y 1 si siempre aparecen juntas.
+    """
+    n = stats["n"]
+    p_single = stats["presence"] / n
+    p_joint = stats["cooccurrence"] / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pmi = np.log(p_joint / np.outer(p_single, p_single))
+        npmi = pmi / -np.log(p_joint)
+    npmi[p_joint == 0] = -1.0
+    # Con p_ij = 1 el denominador se anula: siempre aparecen juntas
+    npmi[p_joint == 1] = 1.0
+    # Una categoría que nunca aparece no tiene relación definida
+    unused = p_single == 0
+    npmi[unused, :] = np.nan
+    npmi[:, unused] = np.nan
+    np.fill_diagonal(npmi, 1.0)
+    return npmi
+
+def sparse_adjacency(matrix: np.ndarray, threshold: float, positive_only: bool = False) -> sparse.coo_matrix:
+    """
+    Triángulo superior de la matriz con las relaciones cuyo valor absoluto
+    supera el umbral, o sólo las positivas que lo superan con `positive_only`.
+    """
+    with np.errstate(invalid='ignore'):
+        strength = matrix if positive_only else np.abs(matrix)
+        mask = np.triu(strength > threshold, k=1)
+    rows, columns = np.nonzero(mask)
+    return sparse.coo_matrix((matrix[rows, columns], (rows, columns)), shape=matrix.shape)
+
+def build_topic_graph(adjacency: sparse.coo_matrix, categories: Sequence[str]) -> nx.Graph:
+    """
+    Grafo de temas a partir de la adyacencia dispersa. `weight` es el valor
+    absoluto de la relación y `correlation` conserva su signo. Los temas sin
+    relaciones por encima del umbral se mantienen como nodos aislados.
+    """
+    G = nx.Graph()
+    G.add_nodes_from(categories)
+    G.add_edges_from(
+        (categories[i], categories[j], {'weight': abs(float(value)), 'correlation': float(value)})
+        for i, j, value in zip(adjacency.row, adjacency.col, adjacency.data)
+    )
+    return G
+
+def compute_topic_relationships(chunks: Iterable[np.ndarray],
+                                categories: Sequence[str],
+                                measure: str = 'correlation',
+                                threshold: float = 0.5,
+                                presence_threshold: Optional[float] = None) -> Dict:
+    """
+    Calcula las relaciones entre temas a partir de la matriz de puntuaciones por
+    interacción, recibida por bloques (ver `iter_score_chunks`).
+
+    `measure` es `correlation` (correlación de las puntuaciones entre
+    interacciones) o `pmi` (PMI normalizada de la coocurrencia). Devuelve la
+    matriz k × k, la adyacencia dispersa con las relaciones por encima de
+    `threshold` y el grafo correspondiente. Con `pmi` sólo cuentan las
+    asociaciones positivas: una NPMI de -1 significa que los temas nunca
+    aparecen juntos y no debe pesar como enlace en comunidades ni centralidad.
+    """
+    if measure not in RELATIONSHIP_MEASURES:
+        raise ValueError(f"Medida no soportada: {measure}")
+
+    categories = list(categories)
+    stats = accumulate_cooccurrence(chunks, len(categories), measure, presence_threshold) if categories else {"n": 0}
+    if stats["n"] < 2 or len(categories) < 2:
+        return {
+            "measure": measure,
+            "n_interactions": stats["n"],
+            "matrix": pd.DataFrame(index=categories, columns=categories, dtype=float),
+            "adjacency": sparse.coo_matrix((len(categories), len(categories))),
+            "graph": nx.Graph()
+        }
+
+    matrix = correlation_from_stats(stats) if measure == 'correlation' else npmi_from_stats(stats)
+    adjacency = sparse_adjacency(matrix, threshold, positive_only=measure == 'pmi')
+    return {
+        "measure": measure,
+        "n_interactions": stats["n"],
+        "matrix": pd.DataFrame(matrix, index=categories, columns=categories),
+        "adjacency": adjacency,
+        "graph": build_topic_graph(adjacency, categories)
+    }
@@ -0,0 +1,96 @@
+# src/political_discourse_analyzer/utils/topic_trends.py
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+ROLLUP_COLUMNS = ['day', 'method', 'category', 'score_sum', 'interaction_count']
+CHANGE_TOLERANCE = 1e-9
+
+def _combined(sums: pd.DataFrame, counts: pd.DataFrame) -> pd.DataFrame:
+    """Media por categoría de las puntuaciones medias de cada método (análisis combinado)."""
+    means = sums / counts.replace(0, np.nan)
+    return means.T.groupby(level='category').mean().T
+
+def _shares(combined: pd.DataFrame) -> pd.DataFrame:
+    return combined.div(combined.sum(axis=1, min_count=1), axis=0)
+
+def _series_to_list(series: pd.Series) -> list:
+    return [None if not np.isfinite(value) else round(float(value), 6) for value in series]
+
+def _z_to_json(value: float) -> Optional[float]:
+    return round(float(value), 3) if np.isfinite(value) else None
+
+def compute_topic_trends(rollups: pd.DataFrame,
+                         freq: str = 'D',
+                         window: int = 7,
+                         z_threshold: float = 3.0,
+                         start: Optional[date] = None,
+                         end: Optional[date] = None) -> Dict:
+    """
+    Calcula la evolución temporal de los temas a partir de agregados diarios.
+
+    `rollups` tiene las columnas de ROLLUP_COLUMNS (sumas de puntuaciones y número
+    de interacciones por día, método y categoría). Para cada periodo (`D` diario,
+    `W` semanal) se obtiene la cuota de cada tema sobre el análisis combinado, la
+    cuota móvil en `window` periodos, su tasa de crecimiento respecto a `window`
+    periodos antes y los puntos de cambio, marcados cuando la cuota se aleja más de
+    `z_threshold` desviaciones típicas de la media de la ventana anterior.
+    """
+    if rollups.empty:
+        return {"status": "no_data", "periods": [], "categories": {}}
+
+    frame = rollups.copy()
+    frame['day'] = pd.to_datetime(frame['day'])
+
+    sums = frame.pivot_table(index='day', columns=['method', 'category'],
+                             values='score_sum', aggfunc='sum', fill_value=0.0)
+    counts = frame.pivot_table(index='day', columns=['method', 'category'],
+                               values='interaction_count', aggfunc='sum', fill_value=0)
+
+    # Días sin interacciones cuentan como periodos vacíos, no se omiten
+    index = pd.date_range(pd.Timestamp(start) if start else sums.index.min(),
+                          pd.Timestamp(end) if end else sums.index.max(),
+                          freq='D', name='day')
+    sums = sums.reindex(index, fill_value=0.0)
+    counts = counts.reindex(index, fill_value=0)
+    if freq != 'D':
+        sums = sums.resample(freq).sum()
+        counts = counts.resample(freq).sum()
+
+    shares = _shares(_combined(sums, counts))
+    rolling_shares = _shares(_combined(
+        sums.rolling(window, min_periods=1).sum(),
+        counts.rolling(window, min_periods=1).sum()
+    ))
+    growth = (rolling_shares / rolling_shares.shift(window) - 1).replace([np.inf, -np.inf], np.nan)
+
+    # Una ventana anterior constante (desviación 0) da z infinito ante cualquier cambio
+    # real; la tolerancia evita marcar diferencias de redondeo
+    previous = shares.rolling(window, min_periods=window)
+    deviation = shares - previous.mean().shift(1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = deviation / previous.std().shift(1)
+    change_points = (z_scores.abs() >= z_threshold) & (deviation.abs() > CHANGE_TOLERANCE)
+
+    periods = [timestamp.date().isoformat() for timestamp in shares.index]
+    return {
+        "status": "success",
+        "freq": freq,
+        "window": window,
+        "periods": periods,
+        "interactions": [int(value) for value in counts.max(axis=1)],
+        "categories": {
+            category: {
+                "share": _series_to_list(shares[category]),
+                "rolling_share": _series_to_list(rolling_shares[category]),
+                "growth_rate": _series_to_list(growth[category]),
+                "change_points": [
+                    {"period": periods[i], "z_score": _z_to_json(z_scores[category].iloc[i])}
+                    for i in np.flatnonzero(change_points[category].to_numpy())
+                ]
+            }
+            for category in shares.columns
+        }
+    }
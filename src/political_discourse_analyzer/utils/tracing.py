@@ -0,0 +1,540 @@
+# src/political_discourse_analyzer/utils/tracing.py
+"""
+Trazas al estilo OpenTelemetry sin depender del SDK.
+
+Una traza empieza en una petición HTTP (o en un trabajo del worker) y cada
+etapa, llamada a OpenAI o sentencia SQL cuelga de ella como span hijo. El span
+activo se propaga con `contextvars`, así que sigue a las tareas de asyncio y a
+`asyncio.to_thread`.
+
+Los spans de una traza se acumulan en memoria y se exportan juntos al cerrar
+el span raíz, lo que permite dos criterios de muestreo:
+
+- `sample_rate`: fracción de trazas que se exportan siempre (decisión en la raíz,
+  o la del `traceparent` entrante).
+- `slow_threshold_ms`: las trazas no muestreadas se exportan igualmente si la
+  raíz tarda al menos ese tiempo.
+
+Sin ninguno de los dos, los spans no se registran y el coste es una lectura de
+un `ContextVar`.
+
+Uso:
+    python -m political_discourse_analyzer.utils.tracing collector --port 4318 --output traces.jsonl
+    python -m political_discourse_analyzer.utils.tracing waterfall traces.jsonl --slowest 3
+"""
+import json
+import time
+import queue
+import random
+import logging
+import argparse
+import inspect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límite de spans por traza: un informe puede lanzar miles de sentencias SQL
+MAX_SPANS_PER_TRACE = 2000
+STATUS_CODES = {"UNSET": 0, "OK": 1, "ERROR": 2}
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+class _Trace:
+    """Spans terminados de una traza, pendientes de la decisión de exportación."""
+    __slots__ = ("trace_id", "sampled", "spans", "dropped", "finished")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Dict] = []
+        self.dropped = 0
+        self.finished = False
+
+class Span:
+    __slots__ = ("tracer", "trace", "name", "kind", "span_id", "parent_id", "is_root",
+                 "start_ns", "end_ns", "attributes", "events", "status", "status_message")
+
+    def __init__(self, tracer: 'Tracer', trace: _Trace, name: str, parent_id: Optional[str],
+                 kind: str = "internal", attributes: Optional[Dict] = None, is_root: bool = False):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.is_root = is_root
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status = "UNSET"
+        self.status_message = ""
+
+    recording = True
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_unix_nano": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException):
+        self.status = "ERROR"
+        self.status_message = str(exc)[:500]
+        self.add_event("exception", **{"exception.type": type(exc).__name__,
+                                        "exception.message": self.status_message})
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": self.tracer.service_name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": self.status, "message": self.status_message}
+        }
+
+class _NonRecordingSpan:
+    """Span de una traza que no se registra; sus hijos tampoco se registran."""
+    recording = False
+    trace_id = span_id = traceparent = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_event(self, name, **attributes):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+_current_span: ContextVar[Optional[object]] = ContextVar("pda_current_span", default=None)
+
+def current_span():
+    """Span activo en el contexto actual (o None fuera de una traza)."""
+    return _current_span.get()
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Interpreta una cabecera W3C `traceparent` como (trace_id, span_id, sampled)."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+class Tracer:
+    def __init__(self, service_name: str = "political-discourse-analyzer"):
+        self.service_name = service_name
+        self.sample_rate = 0.0
+        self.slow_threshold_ms: Optional[float] = None
+        self.exporter: Optional['BatchSpanProcessor'] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and (self.sample_rate > 0 or self.slow_threshold_ms is not None)
+
+    def start_span(self, name: str, kind: str = "internal", attributes: Optional[Dict] = None,
+                   root: bool = True, traceparent: Optional[str] = None):
+        """
+        Crea un span hijo del activo sin activarlo. Sin span activo se inicia una
+        traza nueva (si `root` es True) o se devuelve un span que no registra.
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            if not parent.recording:
+                return NON_RECORDING_SPAN
+            return Span(self, parent.trace, name, parent.span_id, kind, attributes)
+        if not root or not self.enabled:
+            return NON_RECORDING_SPAN
+
+        remote = parse_traceparent(traceparent)
+        if remote:
+            trace_id, parent_id, sampled = remote
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_threshold_ms is None:
+            return NON_RECORDING_SPAN
+        return Span(self, _Trace(trace_id, sampled), name, parent_id, kind, attributes, is_root=True)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", root: bool = True,
+             traceparent: Optional[str] = None, **attributes):
+        """Crea un span, lo activa durante el bloque y lo cierra al salir."""
+        span = self.start_span(name, kind, attributes, root=root, traceparent=traceparent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def _on_end(self, span: Span):
+        trace = span.trace
+        if trace.finished:
+            # Span que termina después de la raíz (p. ej. un recálculo en segundo plano)
+            if trace.sampled and self.exporter is not None:
+                self.exporter.submit([span.to_dict()])
+            return
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append(span.to_dict())
+        else:
+            trace.dropped += 1
+        if not span.is_root:
+            return
+
+        trace.finished = True
+        duration_ms = (span.end_ns - span.start_ns) / 1e6
+        if not trace.sampled and duration_ms >= self.slow_threshold_ms:
+            # Muestreo por cola: la traza lenta se exporta y los spans tardíos también
+            trace.sampled = True
+            trace.spans[-1]["attributes"]["sampling.reason"] = "slow"
+        if trace.sampled and self.exporter is not None:
+            if trace.dropped:
+                trace.spans[-1]["attributes"]["trace.dropped_spans"] = trace.dropped
+            self.exporter.submit(trace.spans)
+        trace.spans = []
+
+    def shutdown(self):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+            self.exporter = None
+
+TRACER = Tracer()
+
+def traced(name: Optional[str] = None, root: bool = False, **attributes) -> Callable:
+    """
+    Decorador que envuelve una función (síncrona o asíncrona) en un span. Por
+    defecto sólo crea spans dentro de una traza existente.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with TRACER.span(span_name, root=root, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(span_name, root=root, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- Exportación ---
+
+class JsonlSpanExporter:
+    """Añade cada span como una línea JSON a un fichero."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        pass
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+def to_otlp(spans: List[Dict]) -> Dict:
+    """Convierte spans al cuerpo JSON de OTLP/HTTP (`/v1/traces`)."""
+    by_service: Dict[str, List[Dict]] = {}
+    for span in spans:
+        by_service.setdefault(span["service"], []).append({
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "parentSpanId": span["parent_span_id"] or "",
+            "name": span["name"],
+            "kind": SPAN_KINDS.get(span["kind"], 1),
+            "startTimeUnixNano": str(span["start_time_unix_nano"]),
+            "endTimeUnixNano": str(span["end_time_unix_nano"]),
+            "attributes": _otlp_attributes(span["attributes"]),
+            "events": [
+                {"name": event["name"], "timeUnixNano": str(event["time_unix_nano"]),
+                 "attributes": _otlp_attributes(event["attributes"])}
+                for event in span["events"]
+            ],
+            "status": {"code": STATUS_CODES[span["status"]["code"]], "message": span["status"]["message"]}
+        })
+    return {"resourceSpans": [
+        {
+            "resource": {"attributes": _otlp_attributes({"service.name": service})},
+            "scopeSpans": [{"scope": {"name": "political_discourse_analyzer"}, "spans": service_spans}]
+        }
+        for service, service_spans in by_service.items()
+    ]}
+
+def _from_otlp_value(value: Dict):
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("stringValue", "doubleValue", "boolValue"):
+        if key in value:
+            return value[key]
+    return None
+
+def from_otlp(body: Dict) -> List[Dict]:
+    """Operación inversa de `to_otlp`, para el colector local."""
+    kinds = {code: kind for kind, code in SPAN_KINDS.items()}
+    statuses = {code: status for status, code in STATUS_CODES.items()}
+    spans = []
+    for resource_spans in body.get("resourceSpans", []):
+        resource = {item["key"]: _from_otlp_value(item["value"])
+                    for item in resource_spans.get("resource", {}).get("attributes", [])}
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                status = span.get("status", {})
+                spans.append({
+                    "trace_id": span["traceId"],
+                    "span_id": span["spanId"],
+                    "parent_span_id": span.get("parentSpanId") or None,
+                    "name": span["name"],
+                    "kind": kinds.get(span.get("kind", 1), "internal"),
+                    "service": resource.get("service.name", "unknown"),
+                    "start_time_unix_nano": int(span["startTimeUnixNano"]),
+                    "end_time_unix_nano": int(span["endTimeUnixNano"]),
+                    "attributes": {item["key"]: _from_otlp_value(item["value"])
+                                   for item in span.get("attributes", [])},
+                    "events": [
+                        {"name": event["name"], "time_unix_nano": int(event["timeUnixNano"]),
+                         "attributes": {item["key"]: _from_otlp_value(item["value"])
+                                        for item in event.get("attributes", [])}}
+                        for event in span.get("events", [])
+                    ],
+                    "status": {"code": statuses.get(status.get("code", 0), "UNSET"),
+                               "message": status.get("message", "")}
+                })
+    return spans
+
+class OtlpHttpSpanExporter:
+    """Envía los spans en JSON a un colector OTLP/HTTP."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        import httpx
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Dict]):
+        response = self.client.post(self.endpoint, json=to_otlp(spans))
+        response.raise_for_status()
+
+    def close(self):
+        self.client.close()
+
+class BatchSpanProcessor:
+    """
+    Exporta los spans desde un hilo propio, en lotes, para no añadir latencia
+    a las peticiones. Si la cola se llena, los spans se descartan.
+    """
+
+    def __init__(self, exporter, max_queue: int = 10000, batch_size: int = 512,
+                 interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: Iterable[Dict]):
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _drain(self) -> List[Dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Dict]):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Error exporting {len(batch)} spans: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            while batch := self._drain():
+                self._export(batch)
+
+    def shutdown(self):
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 5)
+        while batch := self._drain():
+            self._export(batch)
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} spans: export queue full")
+        self.exporter.close()
+
+def configure_tracing(settings, service_name: Optional[str] = None) -> Tracer:
+    """Configura el tracer global a partir de `TracingSettings`."""
+    TRACER.shutdown()
+    if service_name:
+        TRACER.service_name = service_name
+    TRACER.sample_rate = settings.sample_rate
+    TRACER.slow_threshold_ms = settings.slow_threshold_ms
+    if not settings.enabled:
+        return TRACER
+    if settings.exporter == "otlp":
+        exporter = OtlpHttpSpanExporter(settings.otlp_endpoint)
+    else:
+        exporter = JsonlSpanExporter(settings.path)
+    TRACER.exporter = BatchSpanProcessor(exporter)
+    logger.info(
+        f"Tracing enabled ({settings.exporter}): sample_rate={settings.sample_rate}, "
+        f"slow_threshold_ms={settings.slow_threshold_ms}"
+    )
+    return TRACER
+
+# --- Consulta de trazas ---
+
+def load_spans(path: str) -> Dict[str, List[Dict]]:
+    """Lee un fichero JSONL de spans agrupándolos por traza."""
+    traces: Dict[str, List[Dict]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+def _root_of(spans: List[Dict]) -> Dict:
+    ids = {span["span_id"] for span in spans}
+    roots = [span for span in spans if span["parent_span_id"] not in ids]
+    return min(roots or spans, key=lambda span: span["start_time_unix_nano"])
+
+def format_waterfall(spans: List[Dict], width: int = 50) -> str:
+    """Representa una traza como cascada: un span por línea, sangrado por nivel."""
+    root = _root_of(spans)
+    start = min(span["start_time_unix_nano"] for span in spans)
+    end = max(span["end_time_unix_nano"] for span in spans)
+    total = max(end - start, 1)
+    children: Dict[Optional[str], List[Dict]] = {}
+    for span in spans:
+        children.setdefault(span["parent_span_id"], []).append(span)
+
+    lines = [f"trace {root['trace_id']}  {root['name']}  {total / 1e6:.1f} ms  ({len(spans)} spans)"]
+
+    def walk(span: Dict, depth: int):
+        offset = int((span["start_time_unix_nano"] - start) / total * width)
+        length = max(1, int((span["end_time_unix_nano"] - span["start_time_unix_nano"]) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        duration_ms = (span["end_time_unix_nano"] - span["start_time_unix_nano"]) / 1e6
+        label = ("  " * depth + span["name"])[:48]
+        error = "  ERROR" if span["status"]["code"] == "ERROR" else ""
+        lines.append(f"{label:<48} {duration_ms:>9.1f} ms |{bar:<{width}}|{error}")
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start_time_unix_nano"]):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return "\n".join(lines)
+
+def create_collector_app(output: str):
+    """Colector OTLP/HTTP mínimo que guarda los spans recibidos en un fichero JSONL."""
+    from fastapi import FastAPI, Request
+
+    app = FastAPI(title="OTLP collector stand-in")
+    exporter = JsonlSpanExporter(output)
+
+    @app.post("/v1/traces")
+    async def receive_traces(request: Request):
+        exporter.export(from_otlp(await request.json()))
+        return {}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Herramientas de trazas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    collector = subparsers.add_parser("collector", help="Colector OTLP/HTTP local")
+    collector.add_argument("--host", default="127.0.0.1")
+    collector.add_argument("--port", type=int, default=4318)
+    collector.add_argument("--output", default="traces/spans.jsonl")
+
+    waterfall = subparsers.add_parser("waterfall", help="Muestra trazas como cascada")
+    waterfall.add_argument("path", help="Fichero JSONL de spans")
+    waterfall.add_argument("--trace-id", help="Traza concreta (por defecto, las más lentas)")
+    waterfall.add_argument("--slowest", type=int, default=1, help="Número de trazas más lentas a mostrar")
+    waterfall.add_argument("--width", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == "collector":
+        import uvicorn
+        uvicorn.run(create_collector_app(args.output), host=args.host, port=args.port, log_level="warning")
+        return
+
+    traces = load_spans(args.path)
+    if args.trace_id:
+        selected = [traces[args.trace_id]]
+    else:
+        def duration(spans):
+            root = _root_of(spans)
+            return root["end_time_unix_nano"] - root["start_time_unix_nano"]
+        selected = sorted(traces.values(), key=duration, reverse=True)[:args.slowest]
+    print("\n\n".join(format_waterfall(spans, args.width) for spans in selected))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pytest
 import os
+import uuid
+import subprocess
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -8,7 +10,8 @@ from political_discourse_analyzer.services.database_service import Base
 from political_discourse_analyzer.core.main import create_app
 from political_discourse_analyzer.models.settings import ApplicationSettings
 from political_discourse_analyzer.services.assistant_service import AssistantService
-from political_discourse_analyzer.services.database_service import DatabaseService
+from political_discourse_analyzer.services.database_service import DatabaseService, Interaction
+from political_discourse_analyzer.utils.openai_stub import run_stub_server
 
 #  Cargar variables de entorno para tests
 load_dotenv()
@@ -73,8 +76,44 @@ def test_client(test_settings):
     with TestClient(app) as client:
         yield client
 
+@pytest.fixture(scope="session")
+def openai_stub():
+    """Servidor local que sustituye a la API de OpenAI (ver utils/openai_stub.py)."""
+    with run_stub_server() as base_url:
+        yield base_url
+
+@pytest.fixture
+def search_client(openai_stub, monkeypatch):
+    """Cliente de la API con los servicios inicializados contra el servidor local de OpenAI."""
+    monkeypatch.setenv("OPENAI_BASE_URL", openai_stub)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("DB_NAME", TEST_DB_NAME)
+    app = create_app(init_services=True)
+    with TestClient(app) as client:
+        yield client
+
 @pytest.fixture
 def test_db_service():
     """Servicio de base de datos para pruebas."""
     os.environ["DB_NAME"] = TEST_DB_NAME
     return DatabaseService()
+
+@pytest.fixture
+def make_interaction(test_db_service):
+    """
+    Inserta interacciones con la marca de tiempo indicada. Por defecto usan un
+    modo propio de cada test (`make_interaction.mode`) para poder filtrarlas.
+    """
+    test_mode = f"test-{uuid.uuid4().hex[:8]}"
+
+    def create(timestamp, thread_id="test_thread", query="consulta", response="respuesta",
+               mode=test_mode, citations=None):
+        with test_db_service.SessionLocal() as db:
+            interaction = Interaction(thread_id=thread_id, query=query, response=response,
+                                      mode=mode, citations=citations, timestamp=timestamp)
+            db.add(interaction)
+            db.commit()
+            return interaction.id
+
+    create.mode = test_mode
+    return create
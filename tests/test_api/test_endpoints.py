@@ -8,24 +8,55 @@ def test_read_root(test_client: TestClient):
     assert response.json()["status"] == "active"
     assert "version" in response.json()
 
-@pytest.mark.skip(reason="Requiere OpenAI API")
-def test_search_neutral_mode(test_client: TestClient):
-    """Probar búsqueda en modo neutral."""
+def test_search_neutral_mode(search_client: TestClient):
+    """Probar búsqueda en modo neutral y una pregunta de seguimiento en el mismo thread."""
     request_data = {
         "query": "¿Qué propone el PSOE en materia de vivienda?",
         "mode": "neutral"
     }
-    response = test_client.post("/search", json=request_data)
+    response = search_client.post("/search", json=request_data)
     assert response.status_code == 200
+    assert "vivienda" in response.json()["response"]
+    # Las anotaciones file_citation del asistente se devuelven como citas
+    citations = response.json()["citations"]
+    assert citations and all(c["text"].endswith("†source】") and c["file_id"] for c in citations)
+
+    follow_up = search_client.post("/search", json={
+        "query": "¿Y sobre el alquiler?",
+        "mode": "neutral",
+        "thread_id": response.json()["thread_id"]
+    })
+    assert follow_up.status_code == 200
+    assert follow_up.json()["thread_id"] == response.json()["thread_id"]
 
-@pytest.mark.skip(reason="Requiere OpenAI API")
-def test_search_personal_mode(test_client: TestClient):
+    # La conversación se crea con la primera interacción y cuenta las dos
+    from political_discourse_analyzer.core import main
+    from political_discourse_analyzer.services.database_service import Conversation
+    with main.db_service.SessionLocal() as db:
+        conversation = db.query(Conversation).filter_by(thread_id=response.json()["thread_id"]).one()
+        assert conversation.total_interactions == 2
+
+def test_search_timing_breakdown(search_client: TestClient):
+    """Server-Timing y debug.timings desglosan las llamadas a OpenAI y las escrituras."""
+    response = search_client.post(
+        "/search?debug=timings",
+        json={"query": "¿Qué propone el PP sobre sanidad?", "mode": "neutral"}
+    )
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    for stage in ("openai;", "run_stream;", "db_save;", "db;", "total;"):
+        assert stage in server_timing
+    stages = response.json()["debug"]["timings"]["stages"]
+    assert stages["openai"]["count"] == 1  # thread, mensaje y run en una sola petición
+
+@pytest.mark.skip(reason="Modo personal en desarrollo: no hay asistente configurado")
+def test_search_personal_mode(search_client: TestClient):
     """Probar búsqueda en modo personal."""
     request_data = {
         "query": "¿Qué propone el PSOE en materia de vivienda?",
         "mode": "personal"
     }
-    response = test_client.post("/search", json=request_data)
+    response = search_client.post("/search", json=request_data)
     assert response.status_code == 200
 
 def test_search_invalid_mode(test_client: TestClient):
@@ -35,4 +66,48 @@ def test_search_invalid_mode(test_client: TestClient):
         "mode": "invalid_mode"
     }
     response = test_client.post("/search", json=request_data)
-    assert response.status_code in [400, 422]  # Validación de entrada o error de modo
\ No newline at end of file
+    assert response.status_code in [400, 422]  # Validación de entrada o error de modo
+def test_search_fails_fast_while_circuit_open(search_client: TestClient):
+    """Con el circuito de OpenAI abierto /search responde 503 con Retry-After sin llamar a OpenAI."""
+    from political_discourse_analyzer.core import main
+    breaker = main.OPENAI_GUARD.breaker
+    try:
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(retry_after=30)
+        response = search_client.post("/search", json={"query": "¿Qué propone el PSOE?", "mode": "neutral"})
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 29
+    finally:
+        breaker.record_success()
+
+async def test_analytics_computation_runs_off_the_event_loop(monkeypatch):
+    """El cálculo síncrono de una ruta de analítica no bloquea el bucle que atiende /search."""
+    import asyncio
+    import time
+    from starlette.requests import Request
+    from political_discourse_analyzer.core import main
+    from political_discourse_analyzer.services.result_cache import ResultCache
+
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+
+    def version():
+        time.sleep(0.1)
+        return "v1"
+
+    async def compute():
+        time.sleep(0.2)
+        return {"status": "success"}
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticking = asyncio.create_task(ticker())
+    response = await main._cached_response(Request({"type": "http", "headers": []}), ("test",), version, compute)
+    ticking.cancel()
+    assert response.status_code == 200 and response.headers["X-Cache"] == "miss"
+    assert ticks >= 10
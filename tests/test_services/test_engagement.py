@@ -0,0 +1,91 @@
+import uuid
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from political_discourse_analyzer.models.settings import AISettings
+from political_discourse_analyzer.services.analytics_service import AnalyticsService
+from political_discourse_analyzer.services.database_service import Conversation
+
+# Periodo propio de estos tests para no mezclarse con otras conversaciones de la base de datos
+PERIOD_START = datetime(2001, 1, 1)
+PERIOD_END = datetime(2001, 1, 31)
+
+@pytest.fixture
+def analytics(test_db_service):
+    return AnalyticsService(test_db_service, AISettings(openai_api_key="sk-test"))
+
+@pytest.fixture
+def conversations(test_db_service):
+    """Conversaciones en dos modos: (modo, interacciones, duración en minutos)."""
+    suffix = uuid.uuid4().hex[:8]
+    rows = [(f"a-{suffix}", n, minutes) for n, minutes in ((1, 0), (2, 5), (3, 12), (8, 40))]
+    rows += [(f"b-{suffix}", n, minutes) for n, minutes in ((1, 0), (5, 30))]
+    with test_db_service.SessionLocal() as db:
+        for i, (mode, interactions, minutes) in enumerate(rows):
+            created_at = PERIOD_START + timedelta(days=i)
+            db.add(Conversation(
+                thread_id=f"engagement-{suffix}-{i}", mode=mode, total_interactions=interactions,
+                created_at=created_at, last_interaction=created_at + timedelta(minutes=minutes)
+            ))
+        # Fuera del periodo: no debe contar
+        db.add(Conversation(
+            thread_id=f"engagement-{suffix}-outside", mode=f"a-{suffix}", total_interactions=50,
+            created_at=PERIOD_END + timedelta(days=30), last_interaction=PERIOD_END + timedelta(days=30)
+        ))
+        db.commit()
+    yield rows
+    with test_db_service.SessionLocal() as db:
+        db.query(Conversation).filter(
+            Conversation.thread_id.startswith(f"engagement-{suffix}")
+        ).delete(synchronize_session=False)
+        db.commit()
+
+def expected_percentiles(values, scale=1):
+    return {f"p{q}": round(float(np.percentile(values, q)) / scale, 2) for q in (50, 90, 99)}
+
+async def test_percentiles_and_rollup(analytics, conversations):
+    """Percentiles SQL iguales a los de numpy, por modo y en la fila total del ROLLUP."""
+    result = await analytics.get_engagement_metrics(PERIOD_START, PERIOD_END)
+    assert result["status"] == "success"
+
+    assert result["metrics"]["total_conversations"] == len(conversations)
+    assert result["metrics"]["conversation_length_percentiles"] == expected_percentiles(
+        [n for _, n, _ in conversations]
+    )
+    for mode in {mode for mode, _, _ in conversations}:
+        rows = [(n, minutes) for row_mode, n, minutes in conversations if row_mode == mode]
+        metrics = result["by_mode"][mode]
+        assert metrics["total_conversations"] == len(rows)
+        assert metrics["total_followup_conversations"] == sum(1 for n, _ in rows if n > 1)
+        assert metrics["conversation_length_percentiles"] == expected_percentiles([n for n, _ in rows])
+        assert metrics["conversation_duration_minutes_percentiles"] == expected_percentiles(
+            [minutes for _, minutes in rows]
+        )
+
+async def test_sessionization(analytics, make_interaction):
+    """Un hueco mayor que idle_gap_minutes abre una sesión nueva en el mismo thread."""
+    start = datetime(2024, 3, 5, 10)
+    offsets = {"thread-a": (0, 5, 10, 60, 62), "thread-b": (0, 100)}
+    for thread, minutes in offsets.items():
+        for offset in minutes:
+            make_interaction(start + timedelta(minutes=offset), thread_id=f"{thread}-{make_interaction.mode}")
+
+    result = await analytics.get_engagement_metrics(mode=make_interaction.mode, idle_gap_minutes=30)
+    sessions = result["sessions"]["overall"]
+    # thread-a: [0, 5, 10] y [60, 62]; thread-b: [0] y [100]
+    assert sessions["total_sessions"] == 4
+    assert sessions["sessions_per_thread"] == 2
+    assert sessions["multi_turn_sessions"] == 2
+    assert sessions["session_length_percentiles"] == expected_percentiles([3, 2, 1, 1])
+    assert sessions["session_duration_minutes_percentiles"] == expected_percentiles([10, 2, 0, 0])
+
+async def test_report_uses_period(analytics, conversations, monkeypatch):
+    """El informe completo calcula el engagement sobre el mismo periodo que los temas."""
+    async def no_topics(start_date, end_date, progress=None):
+        return {"status": "success"}
+
+    monkeypatch.setattr(analytics, "get_topic_distribution", no_topics)
+    report = await analytics.generate_comprehensive_report(PERIOD_START, PERIOD_END)
+    engagement = report["engagement_metrics"]
+    assert engagement["period"]["start"] == PERIOD_START.isoformat()
+    assert engagement["metrics"]["total_conversations"] == len(conversations)
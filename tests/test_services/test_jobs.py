@@ -0,0 +1,138 @@
+import pytest
+from datetime import datetime, timedelta
+from political_discourse_analyzer.core.worker import AnalyticsWorker
+from political_discourse_analyzer.models.settings import AISettings
+from political_discourse_analyzer.services.analytics_service import AnalyticsService
+from political_discourse_analyzer.services.database_service import AnalyticsJob
+from political_discourse_analyzer.utils.openai_resilience import OpenAIUnavailable
+
+@pytest.fixture
+def job_queue(test_db_service):
+    """Servicio de base de datos con la cola de trabajos vacía."""
+    with test_db_service.SessionLocal() as db:
+        db.query(AnalyticsJob).delete()
+        db.commit()
+    return test_db_service
+
+class FakeAnalytics:
+    """Servicio de analítica mínimo: devuelve `result` o lanza `error`."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result or {"status": "success"}
+        self.error = error
+
+    async def generate_comprehensive_report(self, start_date, end_date, progress=None):
+        progress(0.5, "Mitad")
+        if self.error:
+            raise self.error
+        return self.result
+
+def test_enqueue_dedupe(job_queue):
+    """Un trabajo con la misma clave sólo se encola una vez mientras no falle."""
+    first = job_queue.enqueue_job("report", {}, dedupe_key="report:all")
+    second = job_queue.enqueue_job("report", {}, dedupe_key="report:all")
+    assert first["id"] == second["id"]
+
+    claimed = job_queue.claim_job("w1")
+    job_queue.fail_job(claimed["id"], "w1", "boom")
+    job_queue.claim_job("w1")
+    job_queue.fail_job(claimed["id"], "w1", "boom")
+    job_queue.claim_job("w1")
+    assert job_queue.fail_job(claimed["id"], "w1", "boom")["status"] == "failed"
+    assert job_queue.enqueue_job("report", {}, dedupe_key="report:all")["id"] != first["id"]
+
+def test_claim_skips_locked_jobs(job_queue):
+    """Un trabajo bloqueado por otro worker no se reserva dos veces."""
+    first = job_queue.enqueue_job("report", {})
+    second = job_queue.enqueue_job("report", {})
+    with job_queue.SessionLocal() as other_worker:
+        other_worker.query(AnalyticsJob).filter(AnalyticsJob.id == first["id"]).with_for_update().one()
+        assert job_queue.claim_job("w2")["id"] == second["id"]
+        assert job_queue.claim_job("w2") is None
+        other_worker.rollback()
+    assert job_queue.claim_job("w1")["id"] == first["id"]
+
+def test_retry_backoff_and_lease_expiry(job_queue):
+    """Los fallos se reintentan tras la espera y una reserva caducada no reintenta sin fin."""
+    job = job_queue.enqueue_job("report", {}, max_attempts=2)
+    claimed = job_queue.claim_job("w1")
+    requeued = job_queue.fail_job(claimed["id"], "w1", "boom", retry_delay_seconds=60)
+    assert requeued["status"] == "queued" and requeued["attempts"] == 1
+    assert job_queue.claim_job("w1") is None
+
+    with job_queue.SessionLocal() as db:
+        db.query(AnalyticsJob).filter(AnalyticsJob.id == job["id"]).update({
+            AnalyticsJob.run_after: datetime.utcnow() - timedelta(seconds=1)
+        })
+        db.commit()
+    assert job_queue.claim_job("w1")["attempts"] == 2
+
+    # El worker w1 deja de responder en su último intento: no se recupera, se da por fallido
+    with job_queue.SessionLocal() as db:
+        db.query(AnalyticsJob).filter(AnalyticsJob.id == job["id"]).update({
+            AnalyticsJob.heartbeat_at: datetime.utcnow() - timedelta(hours=1)
+        })
+        db.commit()
+    assert job_queue.claim_job("w2") is None
+    assert job_queue.get_job(job["id"])["status"] == "failed"
+
+def test_late_finisher_cannot_overwrite(job_queue):
+    """Un worker cuya reserva recuperó otro no puede cerrar el trabajo."""
+    job = job_queue.enqueue_job("report", {})
+    job_queue.claim_job("w1")
+    with job_queue.SessionLocal() as db:
+        db.query(AnalyticsJob).filter(AnalyticsJob.id == job["id"]).update({
+            AnalyticsJob.heartbeat_at: datetime.utcnow() - timedelta(hours=1)
+        })
+        db.commit()
+    assert job_queue.claim_job("w2")["attempts"] == 2
+
+    assert not job_queue.complete_job(job["id"], "w1", {"status": "success", "owner": "w1"})
+    assert job_queue.fail_job(job["id"], "w1", "boom") is None
+    assert job_queue.complete_job(job["id"], "w2", {"status": "success", "owner": "w2"})
+    assert job_queue.get_job(job["id"])["result"]["owner"] == "w2"
+
+async def test_worker_run_once(job_queue):
+    """El worker guarda el resultado o reencola el trabajo con espera exponencial."""
+    worker = AnalyticsWorker(job_queue, FakeAnalytics({"status": "success", "total": 3}), worker_id="w1")
+    done = job_queue.enqueue_job("report", {})
+    assert await worker.run_once()
+    finished = job_queue.get_job(done["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["result"]["total"] == 3
+    assert finished["progress"] == 1.0
+    assert not await worker.run_once()
+
+    worker.analytics_service = FakeAnalytics(error=RuntimeError("boom"))
+    failing = job_queue.enqueue_job("report", {})
+    assert await worker.run_once()
+    retried = job_queue.get_job(failing["id"])
+    assert retried["status"] == "queued"
+    assert retried["error"] == "boom"
+    assert retried["attempts"] == 1
+    # La espera del primer reintento es retry_base_delay (30 s)
+    assert not await worker.run_once()
+
+async def test_worker_postpones_job_when_openai_unavailable(job_queue, make_interaction, monkeypatch):
+    """Con OpenAI saturado el informe espera el Retry-After sin gastar intentos."""
+    make_interaction(datetime(2024, 3, 5, 12))
+    analytics = AnalyticsService(job_queue, AISettings(openai_api_key="sk-test"))
+
+    async def unavailable(query):
+        raise OpenAIUnavailable("OpenAI no está disponible temporalmente", retry_after=45, reason="circuit_open")
+
+    monkeypatch.setattr(analytics, "score_interaction", unavailable)
+    worker = AnalyticsWorker(job_queue, analytics, worker_id="w1")
+    job = job_queue.enqueue_job("report", {}, max_attempts=1)
+    for _ in range(3):
+        assert await worker.run_once()
+        postponed = job_queue.get_job(job["id"])
+        assert postponed["status"] == "queued" and postponed["attempts"] == 0
+        assert not await worker.run_once()
+        with job_queue.SessionLocal() as db:
+            run_after = db.query(AnalyticsJob.run_after).filter(AnalyticsJob.id == job["id"]).scalar()
+            assert run_after > datetime.utcnow() + timedelta(seconds=40)
+            db.query(AnalyticsJob).filter(AnalyticsJob.id == job["id"]).update({
+                AnalyticsJob.run_after: datetime.utcnow() - timedelta(seconds=1)
+            })
+            db.commit()
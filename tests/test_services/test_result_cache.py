@@ -0,0 +1,83 @@
+import asyncio
+from political_discourse_analyzer.services.result_cache import ResultCache
+
+async def test_hit_for_same_version():
+    """Una misma versión de datos sólo se calcula una vez."""
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"status": "success", "value": len(calls)}
+
+    first, status_first = await cache.get_or_compute(("topics",), "v1", compute)
+    second, status_second = await cache.get_or_compute(("topics",), "v1", compute)
+
+    assert status_first == "miss"
+    assert status_second == "hit"
+    assert first.etag == second.etag
+    assert len(calls) == 1
+
+async def test_stale_while_revalidate():
+    """Con una versión nueva se sirve el resultado anterior y se recalcula en segundo plano."""
+    cache = ResultCache(stale_seconds=60)
+
+    async def compute_v1():
+        return {"status": "success", "value": 1}
+
+    async def compute_v2():
+        return {"status": "success", "value": 2}
+
+    await cache.get_or_compute(("topics",), "v1", compute_v1)
+    stale, status = await cache.get_or_compute(("topics",), "v2", compute_v2)
+    assert status == "stale"
+    assert stale.value["value"] == 1
+
+    await asyncio.sleep(0)
+    fresh, status = await cache.get_or_compute(("topics",), "v2", compute_v2)
+    assert status == "hit"
+    assert fresh.value["value"] == 2
+
+async def test_stale_window_starts_when_version_changes():
+    """La ventana de obsoleto se cuenta desde el cambio de versión, no desde el cálculo."""
+    cache = ResultCache(stale_seconds=60)
+
+    async def compute():
+        return {"status": "success"}
+
+    async def never_done():
+        await asyncio.Event().wait()
+
+    entry, _ = await cache.get_or_compute(("topics",), "v1", compute)
+    # Calculada hace mucho pero aún vigente: al cambiar la versión sigue sirviéndose
+    entry.created_at -= 3600
+    _, status = await cache.get_or_compute(("topics",), "v2", never_done)
+    assert status == "stale"
+    assert entry.stale_since is not None
+
+    # Pasada la ventana desde el cambio de versión ya no se sirve
+    entry.stale_since -= 61
+    _, status = await cache.get_or_compute(("topics",), "v3", compute)
+    assert status == "miss"
+    for inflight in list(cache._inflight.values()):
+        inflight.cancel()
+
+async def test_lru_eviction_and_errors_not_cached():
+    """Se respeta el tamaño máximo y los resultados con error no se guardan."""
+    cache = ResultCache(max_entries=2, stale_seconds=0)
+
+    async def compute():
+        return {"status": "success"}
+
+    async def failing():
+        return {"status": "error", "message": "boom"}
+
+    for key in ("a", "b", "c"):
+        await cache.get_or_compute((key,), "v1", compute)
+    _, status = await cache.get_or_compute(("a",), "v1", compute)
+    assert status == "miss"
+
+    cacheable = lambda result: result.get("status") != "error"
+    await cache.get_or_compute(("err",), "v1", failing, cacheable)
+    _, status = await cache.get_or_compute(("err",), "v1", failing, cacheable)
+    assert status == "miss"
@@ -0,0 +1,144 @@
+import uuid
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from political_discourse_analyzer.models.settings import AISettings
+from political_discourse_analyzer.services.analytics_service import (
+    AnalyticsService, ScoringError, SCORING_MAX_FAILURES, SCORING_VERSION
+)
+from political_discourse_analyzer.services.database_service import (
+    InteractionScoringFailure, InteractionTopicScore, Interaction
+)
+
+def raw_totals(db_service, scoring_version, start_date, end_date, mode):
+    """Totales calculados directamente desde las puntuaciones individuales."""
+    totals = {}
+    with db_service.SessionLocal() as db:
+        rows = db.query(InteractionTopicScore).join(
+            Interaction, Interaction.id == InteractionTopicScore.interaction_id
+        ).filter(
+            InteractionTopicScore.scoring_version == scoring_version,
+            Interaction.timestamp >= start_date,
+            Interaction.timestamp <= end_date,
+            Interaction.mode == mode
+        ).all()
+        for row in rows:
+            score_sum, count = totals.setdefault(row.method, {}).get(row.category, (0.0, 0))
+            totals[row.method][row.category] = (score_sum + row.score, count + 1)
+    return totals
+
+def test_save_topic_scores_once(test_db_service, make_interaction):
+    """Una interacción sólo se puntúa una vez y los agregados no se duplican."""
+    version = f"test-{uuid.uuid4().hex[:8]}"
+    timestamp = datetime(2024, 3, 5, 12)
+    interaction_id = make_interaction(timestamp)
+    scores = {"embeddings": {"vivienda": 0.8, "sanidad": 0.2}}
+
+    assert test_db_service.save_topic_scores(interaction_id, timestamp, make_interaction.mode, scores, version)
+    assert not test_db_service.save_topic_scores(interaction_id, timestamp, make_interaction.mode, scores, version)
+
+    totals = test_db_service.get_topic_score_totals(version, mode=make_interaction.mode)
+    assert totals["embeddings"]["vivienda"] == (0.8, 1)
+    assert totals["embeddings"]["sanidad"] == (0.2, 1)
+
+def test_totals_match_raw_scores(test_db_service, make_interaction):
+    """Agregados diarios más tramos parciales dan lo mismo que sumar interacción a interacción."""
+    version = f"test-{uuid.uuid4().hex[:8]}"
+    mode = make_interaction.mode
+    timestamps = [datetime(2024, 3, day, hour) for day in (1, 2, 3, 4) for hour in (0, 9, 18, 23)]
+    for i, timestamp in enumerate(timestamps):
+        interaction_id = make_interaction(timestamp)
+        scores = {
+            "embeddings": {"vivienda": (i % 5) / 4, "sanidad": 1 - (i % 3) / 2},
+            "llm": {"vivienda": (i % 2) * 0.5, "sanidad": 0.25}
+        }
+        assert test_db_service.save_topic_scores(interaction_id, timestamp, mode, scores, version)
+
+    # Días completos (2 y 3) desde los agregados y extremos parciales de los días 1 y 4
+    ranges = [
+        (datetime(2024, 3, 1, 9), datetime(2024, 3, 4, 18)),
+        (datetime(2024, 3, 1), datetime(2024, 3, 4)),
+        (datetime(2024, 3, 2, 10), datetime(2024, 3, 2, 23)),
+    ]
+    for start_date, end_date in ranges:
+        totals = test_db_service.get_topic_score_totals(version, start_date, end_date, mode)
+        expected = raw_totals(test_db_service, version, start_date, end_date, mode)
+        assert totals.keys() == expected.keys()
+        for method, categories in expected.items():
+            for category, (score_sum, count) in categories.items():
+                assert abs(totals[method][category][0] - score_sum) < 1e-9
+                assert totals[method][category][1] == count
+
+async def test_failed_scoring_is_not_saved(test_db_service, make_interaction, monkeypatch):
+    """Si un método de análisis falla la interacción queda pendiente, sin ceros en los agregados."""
+    make_interaction(datetime(2024, 3, 5, 12))
+    service = AnalyticsService(test_db_service, AISettings(openai_api_key="sk-test"))
+
+    async def failing_score(query):
+        raise ScoringError("Error en análisis LLM: respuesta vacía")
+
+    monkeypatch.setattr(service, "score_interaction", failing_score)
+    assert await service.score_pending_interactions(mode=make_interaction.mode) == 0
+    assert test_db_service.count_unscored_interactions(SCORING_VERSION, mode=make_interaction.mode) == 1
+    assert test_db_service.get_topic_score_totals(SCORING_VERSION, mode=make_interaction.mode) == {}
+
+async def test_failing_interactions_back_off(test_db_service, make_interaction, monkeypatch):
+    """Una interacción que siempre falla se aplaza, no bloquea a las nuevas y acaba abandonándose."""
+    failing_id = make_interaction(datetime(2024, 3, 5, 12), query="falla")
+    make_interaction(datetime(2024, 3, 5, 13))
+    service = AnalyticsService(test_db_service, AISettings(openai_api_key="sk-test"))
+
+    async def score(query):
+        if query == "falla":
+            raise ScoringError("Error en análisis LLM: respuesta vacía")
+        return {"llm_analysis": {"vivienda": 1.0}}
+
+    def make_due():
+        with test_db_service.SessionLocal() as db:
+            db.query(InteractionScoringFailure).filter(
+                InteractionScoringFailure.interaction_id == failing_id
+            ).update({InteractionScoringFailure.retry_after: datetime(2000, 1, 1)})
+            db.commit()
+
+    monkeypatch.setattr(service, "score_interaction", score)
+    mode = make_interaction.mode
+    assert await service.score_pending_interactions(mode=mode, limit=1) == 0
+    # El fallo queda aplazado: la siguiente pasada puntúa la interacción más reciente
+    assert await service.score_pending_interactions(mode=mode, limit=1) == 1
+    assert test_db_service.get_unscored_interactions(SCORING_VERSION, mode=mode, max_failures=SCORING_MAX_FAILURES) == []
+
+    for _ in range(SCORING_MAX_FAILURES - 1):
+        make_due()
+        assert [row[0] for row in test_db_service.get_unscored_interactions(SCORING_VERSION, mode=mode)] == [failing_id]
+        await service.score_pending_interactions(mode=mode)
+    make_due()
+    assert test_db_service.get_unscored_interactions(SCORING_VERSION, mode=mode, max_failures=SCORING_MAX_FAILURES) == []
+    with test_db_service.SessionLocal() as db:
+        failure = db.query(InteractionScoringFailure).filter(
+            InteractionScoringFailure.interaction_id == failing_id
+        ).one()
+        assert failure.failures == SCORING_MAX_FAILURES
+        assert failure.scoring_version == SCORING_VERSION
+    assert test_db_service.count_unscored_interactions(SCORING_VERSION, mode=mode) == 1
+
+def fake_chat_client(content):
+    """Cliente de OpenAI mínimo cuya respuesta de chat es siempre `content`."""
+    def create(**kwargs):
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+@pytest.mark.parametrize("content", [
+    '{"economía": "alto"}', '{"economía": null}', '{"economía": {"valor": 60}}', '{"economía": true}'
+])
+async def test_non_numeric_llm_scores_are_rejected(test_db_service, content):
+    """Un valor no numérico en la respuesta del LLM es un ScoringError, no un ValueError."""
+    service = AnalyticsService(test_db_service, AISettings(openai_api_key="sk-test"))
+    service.client = fake_chat_client(content)
+    with pytest.raises(ScoringError):
+        await service.analyze_topic_with_llm("¿Qué proponen sobre el empleo?")
+
+    service.client = fake_chat_client('{"economía": 60, "sanidad": 40.5}')
+    scores = await service.analyze_topic_with_llm("¿Qué proponen sobre el empleo?")
+    assert scores["economía"] == 60.0 and scores["sanidad"] == 40.5
+    assert set(scores) == set(service.categories)
@@ -0,0 +1,103 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from pydantic import ValidationError
+from political_discourse_analyzer.models.settings import AdmissionSettings
+from political_discourse_analyzer.utils.admission import (
+    ANALYTICS, INTERACTIVE, AdmissionController, AdmissionMiddleware, AdmissionRejected, ClassLimits
+)
+
+async def test_interactive_has_reserved_capacity_and_priority():
+    controller = AdmissionController(2, {
+        INTERACTIVE: ClassLimits(max_concurrent=2, max_queue=10, queue_timeout=1),
+        ANALYTICS: ClassLimits(max_concurrent=1, max_queue=1, queue_timeout=0.05),
+    })
+    assert await controller.acquire(ANALYTICS) == 0.0
+    queued_analytics = asyncio.create_task(controller.acquire(ANALYTICS))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire(ANALYTICS)
+    assert rejected.value.reason == "queue_full"
+
+    # La analítica está en su límite, pero /search tiene su hueco reservado
+    assert await controller.acquire(INTERACTIVE) == 0.0
+    queued_interactive = asyncio.create_task(controller.acquire(INTERACTIVE))
+    await asyncio.sleep(0)
+
+    # El hueco que libera la analítica es para la consulta interactiva en cola
+    controller.release(ANALYTICS)
+    assert await asyncio.wait_for(queued_interactive, 0.01) > 0
+    assert not queued_analytics.done()
+    with pytest.raises(AdmissionRejected) as rejected:
+        await queued_analytics
+    assert rejected.value.reason == "timeout"
+    assert controller.stats() == {INTERACTIVE: {"inflight": 2, "queued": 0},
+                                  ANALYTICS: {"inflight": 0, "queued": 0}}
+
+async def test_middleware_sheds_analytics_but_serves_search():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/analytics/report")
+    async def report():
+        await release.wait()
+        return {"status": "success"}
+
+    @app.post("/search")
+    async def search():
+        return {"response": "ok"}
+
+    app.add_middleware(AdmissionMiddleware, settings=AdmissionSettings(
+        capacity=4, analytics_max_concurrent=1, analytics_max_queue=0
+    ))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        slow_report = asyncio.create_task(client.get("/analytics/report"))
+        await asyncio.sleep(0.05)
+
+        rejected = await client.get("/analytics/report")
+        assert rejected.status_code == 503 and int(rejected.headers["retry-after"]) >= 1
+        assert (await client.post("/search")).status_code == 200
+
+        release.set()
+        assert (await slow_report).status_code == 200
+
+async def test_exports_have_their_own_limit_and_job_polls_are_not_throttled():
+    """Dos exportaciones en curso no dejan sin hueco a la analítica ni a la consulta de trabajos."""
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/export/interactions")
+    async def export():
+        await release.wait()
+        return {"status": "success"}
+
+    @app.get("/analytics/jobs/{job_id}")
+    async def job(job_id: int):
+        return {"id": job_id, "status": "running"}
+
+    @app.get("/analytics/topics")
+    async def topics():
+        return {"status": "success"}
+
+    app.add_middleware(AdmissionMiddleware, settings=AdmissionSettings(
+        capacity=8, analytics_max_concurrent=1, analytics_max_queue=0,
+        export_max_concurrent=2, export_max_queue=0
+    ))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        exports = [asyncio.create_task(client.get("/export/interactions")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        assert (await client.get("/export/interactions")).status_code == 503
+        assert (await client.get("/analytics/jobs/1")).status_code == 200
+        assert (await client.get("/analytics/topics")).status_code == 200
+
+        release.set()
+        assert [response.status_code for response in await asyncio.gather(*exports)] == [200, 200]
+
+def test_settings_keep_capacity_reserved_for_search():
+    with pytest.raises(ValidationError):
+        AdmissionSettings(capacity=4, analytics_max_concurrent=4)
+    with pytest.raises(ValidationError):
+        AdmissionSettings(capacity=4, analytics_max_concurrent=2, export_max_concurrent=2)
+    AdmissionSettings(capacity=4, analytics_max_concurrent=2, export_max_concurrent=1)
@@ -0,0 +1,44 @@
+import pandas as pd
+from datetime import datetime, timedelta
+from political_discourse_analyzer.services.database_service import Interaction
+from political_discourse_analyzer.utils.analysis_script import CitizenInterestAnalyzer
+
+def test_basic_statistics_match_row_by_row(test_db_service, make_interaction, monkeypatch):
+    """Los agregados SQL coinciden con lo que se calculaba cargando todas las interacciones."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    start = datetime(2024, 3, 5, 10)
+    for i in range(7):
+        make_interaction(start + timedelta(minutes=i), thread_id=f"stats-{make_interaction.mode}-{i % 3}",
+                         query=f"consulta {i}")
+
+    analyzer = CitizenInterestAnalyzer()
+    stats = analyzer.get_basic_statistics()
+
+    # Cálculo anterior: todas las filas en memoria
+    with test_db_service.SessionLocal() as db:
+        interactions = db.query(Interaction).all()
+    analytics = test_db_service.get_analytics()
+    assert stats["total_interactions"] == len(interactions)
+    assert stats["unique_users"] == len(set(interaction.thread_id for interaction in interactions))
+    assert stats["total_conversations"] == analytics["total_conversations"]
+    assert stats["modes_distribution"] == analytics["modes_distribution"]
+    assert sorted(stats["queries"]) == sorted(interaction.query for interaction in interactions)
+    # El iterable de consultas puede recorrerse más de una vez
+    assert len(list(stats["queries"])) == len(interactions)
+
+def test_filtered_statistics_match_pandas(test_db_service, make_interaction):
+    """get_interaction_statistics e iter_queries dan lo mismo que pandas sobre las mismas filas."""
+    start = datetime(2024, 3, 5, 10)
+    for i in range(10):
+        make_interaction(start + timedelta(hours=i), thread_id=f"pandas-{make_interaction.mode}-{i % 4}",
+                         query=f"consulta {i}")
+    end = start + timedelta(hours=6)
+
+    with test_db_service.engine.connect() as connection:
+        df = pd.read_sql_table("interactions", connection)
+    df = df[(df["mode"] == make_interaction.mode) & (df["timestamp"] >= start) & (df["timestamp"] <= end)]
+
+    stats = test_db_service.get_interaction_statistics(start, end, make_interaction.mode)
+    assert stats == {"total_interactions": len(df), "unique_threads": df["thread_id"].nunique()}
+    assert list(test_db_service.iter_queries(start, end, make_interaction.mode, batch_size=3)) == \
+        df.sort_values("id")["query"].tolist()
@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import pytest
+from datetime import datetime, timedelta
+from political_discourse_analyzer.utils import export_interactions
+from political_discourse_analyzer.utils.export_interactions import (
+    EXPORT_COLUMNS, export_to_file, iter_export_chunks, iter_interactions
+)
+
+def sample_rows(n):
+    start = datetime(2024, 3, 5, 10)
+    return [(i, f"thread-{i % 3}", f"consulta, {i}", f"respuesta\n{i}", "neutral", None,
+             start + timedelta(minutes=i)) for i in range(1, n + 1)]
+
+def test_gzip_chunks_are_complete_members():
+    """Cada bloque comprimido es un miembro gzip y su concatenación es un gzip válido."""
+    rows = sample_rows(50)
+    plain = b"".join(chunk for chunk, _ in iter_export_chunks(rows, "csv", chunk_size=256))
+    chunks = list(iter_export_chunks(rows, "csv", compress=True, chunk_size=256))
+
+    assert len(chunks) > 1
+    for chunk, last_id in chunks:
+        records = list(csv.reader(io.StringIO(gzip.decompress(chunk).decode("utf-8"))))
+        # Los bloques terminan en un límite de registro
+        assert int(records[-1][0]) == last_id
+    assert chunks[-1][1] == 50
+    assert gzip.decompress(b"".join(chunk for chunk, _ in chunks)) == plain
+
+    records = list(csv.reader(io.StringIO(plain.decode("utf-8"))))
+    assert records[0] == EXPORT_COLUMNS
+    assert [int(record[0]) for record in records[1:]] == list(range(1, 51))
+
+def test_after_id_keyset_paging(test_db_service, make_interaction):
+    """`after_id` continúa justo después del último id exportado."""
+    start = datetime(2024, 3, 5, 10)
+    ids = [make_interaction(start + timedelta(minutes=i)) for i in range(5)]
+    rows = list(iter_interactions(test_db_service, mode=make_interaction.mode, after_id=ids[1], batch_size=2))
+    assert [row[0] for row in rows] == ids[2:]
+
+def test_export_resumes_from_checkpoint(test_db_service, make_interaction, monkeypatch, tmp_path):
+    """Una exportación interrumpida se continúa desde su punto de control sin duplicar filas."""
+    start = datetime(2024, 3, 5, 10)
+    ids = [make_interaction(start + timedelta(minutes=i), query=f"consulta {i}") for i in range(40)]
+    small_chunks = lambda *args, **kwargs: iter_export_chunks(*args, **kwargs, chunk_size=512)
+
+    expected = tmp_path / "expected.csv.gz"
+    monkeypatch.setattr(export_interactions, "iter_export_chunks", small_chunks)
+    export_to_file(test_db_service, str(expected), compress=True, mode=make_interaction.mode)
+
+    def crashing_chunks(*args, **kwargs):
+        chunks = small_chunks(*args, **kwargs)
+        yield next(chunks)
+        raise KeyboardInterrupt
+
+    output = tmp_path / "export.csv.gz"
+    monkeypatch.setattr(export_interactions, "iter_export_chunks", crashing_chunks)
+    with pytest.raises(KeyboardInterrupt):
+        export_to_file(test_db_service, str(output), compress=True, mode=make_interaction.mode)
+    # Escritura a medias posterior al último punto de control
+    with open(output, "ab") as f:
+        f.write(b"\x1f\x8b incompleto")
+
+    monkeypatch.setattr(export_interactions, "iter_export_chunks", small_chunks)
+    last_id = export_to_file(test_db_service, str(output), compress=True,
+                             mode=make_interaction.mode, resume=True)
+
+    assert last_id == ids[-1]
+    content = gzip.decompress(output.read_bytes())
+    assert content == gzip.decompress(expected.read_bytes())
+    records = list(csv.reader(io.StringIO(content.decode("utf-8"))))
+    assert [int(record[0]) for record in records[1:]] == ids
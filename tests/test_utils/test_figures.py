@@ -0,0 +1,34 @@
+import os
+from political_discourse_analyzer.utils.figures import FigureJob, FigureRenderer
+
+def _jobs(weight):
+    return [FigureJob('topic_network', 'topic_network', {
+        'nodes': ['economía', 'sanidad'],
+        'edges': [['economía', 'sanidad', weight]],
+        'centrality': {'economía': 0.7, 'sanidad': 0.7}
+    })]
+
+def test_figures_are_cached_by_input_data(tmp_path):
+    """Los mismos datos reutilizan la figura guardada; datos nuevos generan otra."""
+    renderer = FigureRenderer(str(tmp_path), fmt='svg', preview=True, max_workers=1)
+
+    paths = renderer.render(_jobs(0.8))
+    renderer.render(_jobs(0.8))
+    assert paths == {'topic_network': str(tmp_path / 'topic_network.svg')}
+    assert os.path.exists(paths['topic_network'])
+    assert len(os.listdir(renderer.cache_dir)) == 1
+
+    renderer.render(_jobs(0.9))
+    assert len(os.listdir(renderer.cache_dir)) == 2
+
+def test_cache_keeps_most_recently_used(tmp_path):
+    """La caché no crece sin límite: se descartan las figuras usadas hace más tiempo."""
+    renderer = FigureRenderer(str(tmp_path), fmt='svg', preview=True, max_workers=1, max_cache_files=2)
+    for weight in (0.6, 0.7, 0.8):
+        renderer.render(_jobs(weight))
+    renderer.render(_jobs(0.7))
+    renderer.render(_jobs(0.9))
+
+    remaining = set(os.listdir(renderer.cache_dir))
+    assert len(remaining) == 2
+    assert remaining == {renderer._cache_key(_jobs(weight)[0]) + '.svg' for weight in (0.7, 0.9)}
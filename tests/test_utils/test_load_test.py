@@ -0,0 +1,49 @@
+import httpx
+from fastapi import FastAPI
+from political_discourse_analyzer.utils.load_test import LoadGenerator, load_workload, parse_mix
+
+CSV = """id,thread_id,query,response,mode,citations,timestamp
+1,thread_a,¿Qué propone el PSOE sobre vivienda?,r,neutral,,2024-07-01T10:00:00
+2,thread_b,¿Y sobre sanidad?,r,neutral,,2024-07-01T10:01:00
+3,thread_a,¿Y el alquiler?,r,neutral,,2024-07-01T10:00:30
+4,thread_c,¿Qué opinas de las pensiones?,r,personal,,2024-07-01T10:02:00
+"""
+
+def test_workload_groups_threads_in_order(tmp_path):
+    """Las consultas de cada thread se reproducen en orden, con el tiempo real entre ellas."""
+    path = tmp_path / "interactions.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    workload = load_workload(str(path))
+
+    first = next(c for c in workload.conversations if len(c.queries) == 2)
+    assert first.queries == ["¿Qué propone el PSOE sobre vivienda?", "¿Y el alquiler?"]
+    assert first.gaps == [30.0]
+    # Sin asistente personal en el backend: se reproduce como neutral y se informa
+    assert {c.mode for c in workload.conversations} == {"neutral"}
+    assert workload.remapped_modes == {"personal": 1}
+    assert parse_mix("search=3,diagnostic=1") == {"search": 0.75, "diagnostic": 0.25}
+
+async def test_follow_ups_reuse_thread(tmp_path):
+    """Los seguimientos se envían con el thread_id de la primera respuesta."""
+    path = tmp_path / "interactions.csv"
+    path.write_text(CSV, encoding="utf-8")
+    app = FastAPI()
+    seen = []
+
+    @app.post("/search")
+    async def search(body: dict):
+        seen.append(body["thread_id"])
+        return {"response": "ok", "thread_id": body["thread_id"] or f"thread_{len(seen)}"}
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    generator = LoadGenerator(load_workload(str(path)), mix={"search": 1.0}, concurrency=1,
+                              duration=0.05, seed=0, client=client)
+    report = await generator.run()
+    await client.aclose()
+
+    assert report["errors"] == 0
+    assert report["config"]["remapped_modes"] == {"personal": {"replayed_as": "neutral", "conversations": 1}}
+    assert report["endpoints"]["search.first"]["requests"] >= 1
+    follow_ups = [thread_id for thread_id in seen if thread_id]
+    assert follow_ups and all(thread_id.startswith("thread_") for thread_id in follow_ups)
@@ -0,0 +1,50 @@
+import threading
+from political_discourse_analyzer.utils.metrics import Counter, Histogram, MetricsRegistry, Timer
+
+def test_shards_are_merged_across_threads():
+    """Cada hilo escribe en su fragmento; la exposición suma todos."""
+    requests = Counter("test_requests_total", "Peticiones", ("route",))
+    latency = Histogram("test_latency_seconds", "Latencia", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            requests.inc(route="/search")
+            latency.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    registry = MetricsRegistry()
+    registry.register(requests)
+    registry.register(latency)
+    text = registry.render()
+
+    assert requests.value(route="/search") == 4000
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_requests_total{route="/search"} 4000' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'test_latency_seconds_bucket{le="1"} 4000' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4000' in text
+    assert 'test_latency_seconds_count 4000' in text
+
+async def test_timer_decorates_sync_and_async_functions():
+    stages = Histogram("test_stage_seconds", "Etapas", ("stage",))
+
+    @Timer(stages, {"stage": "sync"})
+    def sync_step():
+        return 1
+
+    @Timer(stages, {"stage": "async"})
+    async def async_step():
+        return 2
+
+    assert sync_step() == 1
+    assert await async_step() == 2
+    with Timer(stages, {"stage": "block"}):
+        pass
+
+    counts = {key[0]: values[-1] for key, values in stages.collect().items()}
+    assert counts == {"sync": 1, "async": 1, "block": 1}
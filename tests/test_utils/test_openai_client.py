@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from political_discourse_analyzer.models.settings import AISettings
+from political_discourse_analyzer.utils.openai_client import close_openai_clients, get_openai_clients
+from political_discourse_analyzer.utils.openai_stub import run_stub_server
+
+@pytest.fixture(autouse=True)
+def shared_clients():
+    yield
+    close_openai_clients()
+
+def test_services_share_one_pooled_connection():
+    """Las llamadas de distintos servicios reutilizan la misma conexión."""
+    with run_stub_server(seed=0) as base_url:
+        settings = AISettings(openai_api_key="sk-test", base_url=base_url, embeddings_timeout=3)
+        clients = get_openai_clients(settings)
+        assert get_openai_clients(settings) is clients
+
+        for text in ("vivienda", "sanidad", "educación"):
+            clients.client.embeddings.create(model="text-embedding-3-small", input=text,
+                                             timeout=clients.timeout("embeddings"))
+
+        stats = clients.pool_stats()
+        assert stats["connections"] == 1 and stats["idle"] == 1
+        assert clients.timeout("embeddings") == httpx.Timeout(3, connect=settings.connect_timeout)
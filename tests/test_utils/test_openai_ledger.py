@@ -0,0 +1,43 @@
+import httpx
+import openai
+import pytest
+from political_discourse_analyzer.utils.metrics import openai_call
+from political_discourse_analyzer.utils.openai_ledger import (
+    OpenAILedger, count_attempt, estimate_cost, openai_feature
+)
+from political_discourse_analyzer.utils.openai_stub import run_stub_server
+
+def test_cost_uses_longest_matching_price():
+    assert estimate_cost("text-embedding-3-small", 1_000_000, 0) == pytest.approx(0.02)
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert estimate_cost("modelo-desconocido", 10, 10) is None
+
+def test_calls_are_recorded_with_feature_and_retries(monkeypatch):
+    """Cada llamada deja una fila; los reintentos del SDK se cuentan como intentos."""
+    rows = []
+    ledger = OpenAILedger()
+    ledger.configure(rows.extend, flush_interval=60)
+    monkeypatch.setattr("political_discourse_analyzer.utils.metrics.LEDGER", ledger)
+
+    with run_stub_server(seed=0) as base_url:
+        failing_url = base_url.replace("/v1", "/faults/error_rate=1,error_status=500/v1")
+        hooks = {"request": [count_attempt]}
+        client = openai.Client(api_key="sk-test", base_url=base_url, http_client=httpx.Client(event_hooks=hooks))
+        failing = openai.Client(api_key="sk-test", base_url=failing_url, max_retries=1,
+                                http_client=httpx.Client(event_hooks=hooks))
+
+        with openai_feature("topic_scoring"):
+            with openai_call("embeddings.create", "text-embedding-3-small") as call:
+                response = client.embeddings.create(model="text-embedding-3-small", input="vivienda")
+                call.usage = response.usage
+            with pytest.raises(openai.InternalServerError):
+                with openai_call("chat.completions.create", "gpt-4-turbo"):
+                    failing.chat.completions.create(
+                        model="gpt-4-turbo", messages=[{"role": "user", "content": "hola"}]
+                    )
+    ledger.shutdown()
+
+    ok, failed = rows
+    assert ok["feature"] == "topic_scoring" and ok["outcome"] == "ok" and ok["attempts"] == 1
+    assert ok["prompt_tokens"] > 0 and ok["cost_usd"] > 0
+    assert failed["outcome"] == "error" and failed["attempts"] == 2
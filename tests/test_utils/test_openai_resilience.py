@@ -0,0 +1,67 @@
+import asyncio
+import openai
+import pytest
+from political_discourse_analyzer.utils.metrics import openai_call
+from political_discourse_analyzer.utils.openai_resilience import (
+    AdaptiveLimiter, CircuitBreaker, OpenAIGuard, OpenAIUnavailable, retry_after_from
+)
+from political_discourse_analyzer.utils.openai_stub import run_stub_server
+
+def test_breaker_honors_provider_retry_after_and_probes():
+    """Un 429 con Retry-After abre el circuito al menos ese tiempo; luego pasa una sola prueba."""
+    with run_stub_server(seed=0) as base_url:
+        limited_url = base_url.replace("/v1", "/faults/error_rate=1,error_status=429,retry_after=20/v1")
+        client = openai.Client(api_key="sk-test", base_url=limited_url, max_retries=0)
+        with pytest.raises(openai.RateLimitError) as error:
+            client.embeddings.create(model="text-embedding-3-small", input="vivienda")
+    assert retry_after_from(error.value) == 20
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=1)
+    breaker.before_call()
+    breaker.record_failure(retry_after_from(error.value))
+    breaker.before_call()
+    breaker.record_failure(retry_after_from(error.value))
+    with pytest.raises(OpenAIUnavailable) as rejected:
+        breaker.before_call()
+    assert rejected.value.retry_after >= 19 and rejected.value.reason == "circuit_open"
+
+    breaker.open_until = 0  # ha pasado el tiempo de espera
+    breaker.before_call()
+    with pytest.raises(OpenAIUnavailable):
+        breaker.before_call()  # sólo una llamada de prueba a la vez
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_limiter_halves_on_overload_and_grows_additively():
+    limiter = AdaptiveLimiter(initial=4, minimum=1, maximum=8)
+    for _ in range(4):
+        assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+
+    limiter.release(overloaded=True)
+    limiter.release(overloaded=True)  # mismo episodio: no vuelve a reducir
+    assert limiter.limit == 2
+    limiter.release()
+    limiter.release()
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+
+async def test_cancelled_call_is_not_a_success(monkeypatch):
+    """Una llamada cancelada libera su hueco sin cerrar el circuito ni subir el límite."""
+    guard = OpenAIGuard()
+    monkeypatch.setattr("political_discourse_analyzer.utils.metrics.OPENAI_GUARD", guard)
+    guard.breaker.state = CircuitBreaker.HALF_OPEN
+    limit = guard.limiter.limit
+
+    async def probe():
+        with openai_call("embeddings.create", "text-embedding-3-small"):
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    assert guard.limiter.inflight == 0 and guard.limiter.limit == limit
+    guard.breaker.before_call()  # la prueba vuelve a estar disponible
@@ -0,0 +1,53 @@
+import openai
+import pytest
+from political_discourse_analyzer.utils.openai_stub import FaultProfile, run_stub_server
+
+@pytest.fixture(scope="module")
+def stub_url():
+    with run_stub_server(seed=0) as base_url:
+        yield base_url
+
+def test_fault_spec_overrides_defaults():
+    """El prefijo de la URL sólo cambia los parámetros que indica."""
+    profile = FaultProfile(latency=0.1, error_status=503).with_spec("error_rate=0.5,latency=0")
+
+    assert profile.latency == 0.0
+    assert profile.error_rate == 0.5
+    assert profile.error_status == 503
+    with pytest.raises(ValueError):
+        profile.with_spec("unknown=1")
+
+def test_assistant_run_streams_answer(stub_url):
+    """Un run en streaming termina con la respuesta guardada como último mensaje del thread."""
+    client = openai.Client(api_key="sk-test", base_url=stub_url)
+    assistant = client.beta.assistants.create(name="Test", model="gpt-4-turbo-preview", instructions="")
+    thread = client.beta.threads.create()
+    client.beta.threads.messages.create(thread_id=thread.id, role="user",
+                                        content="¿Qué propone el PSOE sobre vivienda?")
+
+    with client.beta.threads.runs.stream(thread_id=thread.id, assistant_id=assistant.id) as stream:
+        stream.until_done()
+        streamed = stream.get_final_messages()[0].content[0].text.value
+
+    messages = client.beta.threads.messages.list(thread_id=thread.id)
+    assert messages.data[0].role == "assistant"
+    assert messages.data[0].content[0].text.value == streamed
+    assert "vivienda" in streamed
+
+def test_embeddings_are_deterministic(stub_url):
+    client = openai.Client(api_key="sk-test", base_url=stub_url)
+    first = client.embeddings.create(model="text-embedding-3-small", input="vivienda pública").data[0].embedding
+    second = client.embeddings.create(model="text-embedding-3-small", input="vivienda pública").data[0].embedding
+
+    assert len(first) == 1536
+    assert first == second
+
+def test_injected_errors_by_base_url(stub_url):
+    """Los errores se eligen por cliente con el prefijo /faults/ de la URL base."""
+    client = openai.Client(
+        api_key="sk-test",
+        base_url=stub_url.replace("/v1", "/faults/error_rate=1,error_status=429/v1"),
+        max_retries=0
+    )
+    with pytest.raises(openai.RateLimitError):
+        client.chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "hola"}])
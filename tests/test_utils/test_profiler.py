@@ -0,0 +1,46 @@
+import httpx
+from fastapi import FastAPI
+from political_discourse_analyzer.models.settings import ProfilerSettings
+from political_discourse_analyzer.utils.profiler import ProfilerMiddleware
+
+def busy_loop(seconds: float):
+    import time
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+def make_client(tmp_path, **settings) -> httpx.AsyncClient:
+    app = FastAPI()
+
+    @app.get("/analytics/topics")
+    async def topics():
+        busy_loop(0.1)
+        return {"status": "success"}
+
+    app.add_middleware(ProfilerMiddleware, settings=ProfilerSettings(
+        enabled=True, output_dir=tmp_path, interval_ms=1, **settings
+    ))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def test_profiles_only_authorized_requests(tmp_path):
+    async with make_client(tmp_path, token="secreto") as client:
+        assert (await client.get("/analytics/topics")).status_code == 200
+        assert (await client.get("/analytics/topics", headers={"X-Profile": "otro"})).status_code == 200
+        assert list(tmp_path.iterdir()) == []
+
+        assert (await client.get("/analytics/topics", headers={"X-Profile": "secreto"})).status_code == 200
+
+    [profile] = tmp_path.iterdir()
+    assert profile.name.endswith(".collapsed") and "_GET_analytics_topics_200_" in profile.name
+    lines = profile.read_text(encoding="utf-8").splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "busy_loop" in stack and int(count) > 0
+
+async def test_rotation_keeps_newest_profiles(tmp_path):
+    async with make_client(tmp_path, sample_rate=1.0, mode="cprofile", max_files=2) as client:
+        for _ in range(4):
+            await client.get("/analytics/topics")
+
+    assert len([p for p in tmp_path.iterdir() if p.suffix == ".prof"]) == 2
@@ -0,0 +1,54 @@
+from political_discourse_analyzer.utils.report_build import ReportBuild
+
+def _build(tmp_path, calls, version, parity=False):
+    build = ReportBuild(str(tmp_path / '.build'))
+
+    def source():
+        calls.append('source')
+        return {'version': version}
+
+    def summary(data):
+        calls.append('summary')
+        return 'par' if parity else data['version']
+
+    def write(text):
+        calls.append('write')
+        path = tmp_path / 'report.txt'
+        path.write_text(text)
+        return str(path)
+
+    build.stage('source', source, inputs={'data_version': version})
+    build.stage('summary', summary, deps=['source'])
+    build.stage('write', write, deps=['summary'], outputs=lambda path: [path])
+    return build
+
+async def test_unchanged_inputs_skip_every_stage(tmp_path):
+    """Con las mismas entradas no se ejecuta ninguna etapa."""
+    calls = []
+    await _build(tmp_path, calls, 'v1').run()
+    status = await _build(tmp_path, calls, 'v1').run()
+
+    assert status == {'source': 'skipped', 'summary': 'skipped', 'write': 'skipped'}
+    assert calls == ['source', 'summary', 'write']
+
+async def test_changed_input_stops_when_output_is_unchanged(tmp_path):
+    """Si una etapa repetida produce lo mismo, las siguientes no se repiten."""
+    calls = []
+    await _build(tmp_path, calls, 'v1', parity=True).run()
+    calls.clear()
+    status = await _build(tmp_path, calls, 'v2', parity=True).run()
+
+    assert status == {'source': 'built', 'summary': 'unchanged', 'write': 'skipped'}
+    assert calls == ['source', 'summary']
+
+async def test_missing_output_file_is_rebuilt(tmp_path):
+    """Un fichero de salida borrado o modificado obliga a repetir su etapa."""
+    calls = []
+    await _build(tmp_path, calls, 'v1').run()
+    (tmp_path / 'report.txt').write_text('editado')
+    calls.clear()
+    status = await _build(tmp_path, calls, 'v1').run()
+
+    assert status['write'] == 'unchanged'
+    assert calls == ['write']
+    assert (tmp_path / 'report.txt').read_text() == 'v1'
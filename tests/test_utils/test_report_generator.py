@@ -0,0 +1,20 @@
+import zipfile
+from political_discourse_analyzer.utils.report_generator import ReportGenerator, get_template_environment
+
+def test_report_package_is_written_from_output_dir(tmp_path):
+    """El ZIP se crea directamente desde los ficheros, sin directorio intermedio."""
+    (tmp_path / 'topic_network.png').write_bytes(b'png')
+    images = [{'path': str(tmp_path / 'topic_network.png'), 'description': 'Red de temas'}]
+
+    generator = ReportGenerator(str(tmp_path))
+    generator.generate_html_report("# Informe", images)
+    generator.generate_latex_report("# Informe", images)
+    zip_path = generator.create_report_package()
+
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(archive.namelist()) == [
+            'analysis_report.html', 'analysis_report.tex', 'images/topic_network.png'
+        ]
+        assert archive.getinfo('images/topic_network.png').compress_type == zipfile.ZIP_STORED
+    assert not (tmp_path / 'report_package').exists()
+    assert get_template_environment() is get_template_environment()
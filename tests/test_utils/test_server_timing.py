@@ -0,0 +1,32 @@
+import asyncio
+from political_discourse_analyzer.utils.metrics import Histogram, Timer
+from political_discourse_analyzer.utils.server_timing import collect_timings, record_timing
+
+def test_timings_are_collected_per_request():
+    stages = Histogram("test_timing_stage_seconds", "Etapas", ("stage",))
+
+    record_timing("db", 1.0)  # fuera de una petición no se registra
+    with collect_timings() as timings:
+        with Timer(stages, {"stage": "run_stream"}, timing="run_stream"):
+            pass
+        record_timing("db", 0.010)
+        record_timing("db", 0.005)
+
+    header = timings.header()
+    assert header.startswith("run_stream;dur=")
+    assert 'db;dur=15.0;desc="2x"' in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    assert timings.as_dict()["stages"]["db"] == {"ms": 15.0, "count": 2}
+
+def test_concurrent_requests_do_not_share_timings():
+    async def request(name):
+        with collect_timings() as timings:
+            await asyncio.sleep(0)
+            record_timing(name, 0.001)
+            await asyncio.sleep(0)
+        return set(timings.entries)
+
+    async def main():
+        return await asyncio.gather(request("a"), request("b"))
+
+    assert asyncio.run(main()) == [{"a"}, {"b"}]
@@ -0,0 +1,50 @@
+import pytest
+from datetime import datetime, timedelta
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from political_discourse_analyzer.utils.export_interactions import EXPORT_COLUMNS
+from political_discourse_analyzer.utils.snapshot import (
+    SnapshotStore, _read_manifest, _write_partitioned, create_snapshot
+)
+
+def test_create_snapshot_partitions_and_manifest(test_db_service, make_interaction, tmp_path):
+    """El snapshot se particiona por día y las ejecuciones siguientes sólo añaden lo nuevo."""
+    ids = [make_interaction(datetime(2024, 3, day, 12), thread_id=f"snapshot-{day}") for day in (5, 5, 6)]
+
+    manifest = create_snapshot(test_db_service, str(tmp_path), batch_size=2)
+    assert manifest["last_interaction_id"] >= ids[-1]
+    assert (tmp_path / "interactions" / "day=2024-03-05").is_dir()
+    assert (tmp_path / "interactions" / "day=2024-03-06").is_dir()
+    assert _read_manifest(tmp_path) == manifest
+
+    rows = manifest["rows"]["interactions"]
+    assert create_snapshot(test_db_service, str(tmp_path))["rows"]["interactions"] == rows
+
+    new_id = make_interaction(datetime(2024, 3, 7, 12), thread_id="snapshot-7")
+    manifest = create_snapshot(test_db_service, str(tmp_path))
+    assert manifest["rows"]["interactions"] == rows + 1
+    assert manifest["last_interaction_id"] == new_id
+
+    store = SnapshotStore(str(tmp_path))
+    stored = store.con.execute(
+        "SELECT id, CAST(day AS VARCHAR) FROM interactions WHERE mode = ? ORDER BY id", [make_interaction.mode]
+    ).fetchall()
+    assert stored == [(ids[0], "2024-03-05"), (ids[1], "2024-03-05"), (ids[2], "2024-03-06"),
+                      (new_id, "2024-03-07")]
+
+def test_store_drops_rows_of_repeated_batches(tmp_path):
+    """Un lote repetido tras un fallo no duplica filas al leer el snapshot."""
+    start = datetime(2024, 3, 5, 10)
+    rows = [(i, f"thread-{i}", f"consulta {i}", "respuesta", "neutral", None, start + timedelta(hours=i))
+            for i in range(1, 6)]
+    _write_partitioned(tmp_path / "interactions", EXPORT_COLUMNS, rows[:3])
+    # Reintento con otro tamaño de lote: escribe de nuevo las filas 2 y 3 en otro fichero
+    _write_partitioned(tmp_path / "interactions", EXPORT_COLUMNS, rows[1:])
+
+    store = SnapshotStore(str(tmp_path))
+    assert store.con.execute("SELECT count(*) FROM read_parquet(?)",
+                             [(tmp_path / "interactions" / "**" / "*.parquet").as_posix()]).fetchone()[0] == 7
+    assert store.get_basic_statistics()["total_interactions"] == 5
+    assert [row[0] for row in store.con.execute("SELECT id FROM interactions ORDER BY id").fetchall()] == [1, 2, 3, 4, 5]
@@ -0,0 +1,54 @@
+import numpy as np
+from political_discourse_analyzer.utils.topic_relationships import (
+    compute_topic_relationships, iter_score_chunks
+)
+
+CATEGORIES = ['economía', 'sanidad', 'vivienda']
+
+def _rows(matrix):
+    return [
+        (interaction_id, category, float(score))
+        for interaction_id, row in enumerate(matrix, start=1)
+        for category, score in zip(CATEGORIES, row)
+    ]
+
+def test_chunks_keep_interactions_whole():
+    """Las filas de una interacción no se reparten entre bloques."""
+    matrix = np.random.default_rng(0).random((10, 3))
+    chunks = list(iter_score_chunks(_rows(matrix), CATEGORIES, chunk_size=4))
+
+    assert len(chunks) > 1
+    np.testing.assert_allclose(np.vstack(chunks), matrix)
+
+def test_correlation_matches_numpy():
+    """La correlación acumulada por bloques coincide con np.corrcoef sobre la matriz completa."""
+    rng = np.random.default_rng(1)
+    base = rng.random(500)
+    matrix = np.column_stack([base, base + 0.05 * rng.random(500), rng.random(500)])
+
+    result = compute_topic_relationships(
+        iter_score_chunks(_rows(matrix), CATEGORIES, chunk_size=300), CATEGORIES, threshold=0.5
+    )
+
+    np.testing.assert_allclose(result['matrix'].to_numpy(), np.corrcoef(matrix, rowvar=False), atol=1e-9)
+    assert list(result['graph'].edges()) == [('economía', 'sanidad')]
+    # Vivienda no se relaciona con nada pero sigue en el grafo
+    assert list(result['graph'].nodes()) == CATEGORIES
+    assert result['adjacency'].nnz == 1
+
+def test_pmi_marks_cooccurring_topics():
+    """
+    Temas que siempre aparecen juntos tienen PMI normalizada 1 y los que nunca,
+    -1; estos últimos no quedan conectados en el grafo.
+    """
+    matrix = np.array([[0.5, 0.5, 0.0], [0.0, 0.0, 1.0]] * 50)
+
+    result = compute_topic_relationships(
+        iter_score_chunks(_rows(matrix), CATEGORIES), CATEGORIES, measure='pmi', threshold=0.5
+    )
+
+    assert result['matrix'].loc['economía', 'sanidad'] == 1.0
+    assert result['matrix'].loc['economía', 'vivienda'] == -1.0
+    assert list(result['graph'].edges()) == [('economía', 'sanidad')]
+    assert result['graph'].degree('vivienda') == 0
+    assert result['adjacency'].nnz == 1
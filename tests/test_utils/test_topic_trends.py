@@ -0,0 +1,37 @@
+import pandas as pd
+from datetime import date, timedelta
+from political_discourse_analyzer.utils.topic_trends import ROLLUP_COLUMNS, compute_topic_trends
+
+METHODS = ['embedding_analysis', 'llm_analysis', 'linguistic_analysis']
+
+def _rollups(days: int, spike_day: int = None) -> pd.DataFrame:
+    """Agregados sintéticos: vivienda domina salvo un pico de sanidad."""
+    rows = []
+    start = date(2024, 1, 1)
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        vivienda, sanidad = (0.2, 0.8) if offset == spike_day else (0.7, 0.3)
+        for method in METHODS:
+            rows.append((day, method, 'vivienda', vivienda * 10, 10))
+            rows.append((day, method, 'sanidad', sanidad * 10, 10))
+    return pd.DataFrame(rows, columns=ROLLUP_COLUMNS)
+
+def test_daily_shares_and_change_points():
+    """Las cuotas suman 1 y el pico se marca como punto de cambio."""
+    trends = compute_topic_trends(_rollups(30, spike_day=20), window=7, z_threshold=3.0)
+
+    assert trends["status"] == "success"
+    assert len(trends["periods"]) == 30
+    first_total = trends["categories"]["vivienda"]["share"][0] + trends["categories"]["sanidad"]["share"][0]
+    assert abs(first_total - 1) < 1e-6
+    assert [cp["period"] for cp in trends["categories"]["sanidad"]["change_points"]] == ["2024-01-21"]
+
+def test_weekly_resample_and_missing_days():
+    """Los días sin datos se mantienen como periodos vacíos."""
+    trends = compute_topic_trends(_rollups(3), freq='W', window=2, end=date(2024, 1, 21))
+
+    assert trends["interactions"] == [30, 0, 0]
+    assert trends["categories"]["vivienda"]["share"][1] is None
+
+def test_empty_rollups():
+    assert compute_topic_trends(pd.DataFrame(columns=ROLLUP_COLUMNS))["status"] == "no_data"
@@ -0,0 +1,61 @@
+from political_discourse_analyzer.utils.tracing import Tracer, format_waterfall, from_otlp, to_otlp
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, spans):
+        self.spans.extend(spans)
+
+def make_tracer(sample_rate=0.0, slow_threshold_ms=None):
+    tracer = Tracer(service_name="test")
+    tracer.sample_rate = sample_rate
+    tracer.slow_threshold_ms = slow_threshold_ms
+    tracer.exporter = ListExporter()
+    return tracer
+
+def test_child_spans_are_exported_with_their_trace():
+    tracer = make_tracer(sample_rate=1.0)
+    parent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    with tracer.span("POST /search", kind="server", traceparent=parent) as root:
+        with tracer.span("openai runs.stream", kind="client", root=False) as run:
+            run.add_event("text.created")
+        try:
+            with tracer.span("sql INSERT", root=False):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+
+    spans = {span["name"]: span for span in tracer.exporter.spans}
+    assert set(spans) == {"POST /search", "openai runs.stream", "sql INSERT"}
+    assert {span["trace_id"] for span in spans.values()} == {"0af7651916cd43dd8448eb211c80319c"}
+    assert spans["POST /search"]["parent_span_id"] == "b7ad6b7169203331"
+    assert spans["openai runs.stream"]["parent_span_id"] == root.span_id
+    assert spans["sql INSERT"]["status"]["code"] == "ERROR"
+
+    # Ida y vuelta por OTLP/JSON, como hace el colector local
+    assert from_otlp(to_otlp(tracer.exporter.spans)) == tracer.exporter.spans
+    waterfall = format_waterfall(tracer.exporter.spans)
+    assert waterfall.splitlines()[1].startswith("POST /search")
+    assert "  openai runs.stream" in waterfall
+
+def test_unsampled_traces_are_kept_only_when_slow():
+    tracer = make_tracer(sample_rate=0.0, slow_threshold_ms=0)
+    with tracer.span("GET /analytics/topics"):
+        with tracer.span("sql SELECT", root=False):
+            pass
+    assert [span["name"] for span in tracer.exporter.spans] == ["sql SELECT", "GET /analytics/topics"]
+    assert tracer.exporter.spans[-1]["attributes"]["sampling.reason"] == "slow"
+
+    tracer = make_tracer(sample_rate=0.0, slow_threshold_ms=60_000)
+    with tracer.span("GET /"):
+        pass
+    assert tracer.exporter.spans == []
+
+    # Sin muestreo ni umbral no se registra nada, ni siquiera los hijos
+    tracer = make_tracer()
+    with tracer.span("GET /") as root:
+        with tracer.span("sql SELECT", root=False) as child:
+            assert not root.recording and not child.recording
+    assert tracer.exporter.spans == []